@@ -0,0 +1,173 @@
+"""
+Background writer for /ocr debug captures.
+
+Encoding and writing JPEGs used to happen inside the request. Captures are
+now handed to a single daemon thread through a bounded queue: when the queue
+is full the capture is dropped rather than slowing the request down. A
+sampling rate limits how many requests are captured at all, and the output
+directory is pruned by age and total size so debugging can stay on in
+production without filling the disk.
+
+Queued captures are decoded images that outlive their request, so when the
+writer is given a ``MemoryBudget`` each one holds its size against the
+budget until it has been written, and a capture that does not fit is dropped.
+"""
+
+import itertools
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from memory_budget import MemoryBudget
+
+
+class DebugImageWriter:
+    def __init__(self, directory: Path, max_queue: int = 8, sample_every: int = 1,
+                 max_age_seconds: float = 24 * 3600, max_total_bytes: int = 500 * 1024 * 1024,
+                 prune_every: int = 20, budget: Optional[MemoryBudget] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(exist_ok=True)
+        self.sample_every = max(1, sample_every)
+        self.max_age_seconds = max_age_seconds
+        self.max_total_bytes = max_total_bytes
+        self.prune_every = max(1, prune_every)
+        self.budget = budget
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max(1, max_queue))
+        self._requests = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {'written': 0, 'dropped': 0, 'failed': 0, 'pruned': 0}
+        self._thread: Optional[threading.Thread] = None
+
+    def should_capture(self) -> bool:
+        """Keep one request in every ``sample_every``."""
+        return next(self._requests) % self.sample_every == 0
+
+    def submit(self, filename: str, image: Any) -> bool:
+        """Queue a PIL image or BGR array for writing; False if it was dropped.
+
+        The caller must not modify ``image`` afterwards; it is encoded later
+        on the writer thread without being copied.
+        """
+        self._ensure_started()
+        if isinstance(image, Image.Image):
+            # decode now so the writer thread never races the request on a lazy load
+            image.load()
+        nbytes = _image_bytes(image)
+        if self.budget is not None and not self.budget.try_reserve(nbytes):
+            self._bump('dropped')
+            print(f"[debug_images] Memory budget full, dropped {filename}")
+            return False
+        try:
+            self._queue.put_nowait((filename, image, nbytes))
+            return True
+        except queue.Full:
+            self._release(nbytes)
+            self._bump('dropped')
+            print(f"[debug_images] Queue full, dropped {filename}")
+            return False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, queued=self._queue.qsize())
+
+    def prune(self) -> None:
+        """Delete captures older than ``max_age_seconds``, then the oldest
+        remaining ones until the directory is under ``max_total_bytes``."""
+        now = time.time()
+        files = []
+        for path in self.directory.iterdir():
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                files.append((st.st_mtime, st.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if now - mtime <= self.max_age_seconds and total <= self.max_total_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            self._bump('pruned', removed)
+            print(f"[debug_images] Pruned {removed} old captures")
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="debug-image-writer", daemon=True)
+                self._thread.start()
+
+    def _release(self, nbytes: int) -> None:
+        if self.budget is not None:
+            self.budget.release(nbytes)
+
+    def _bump(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def _write(self, filename: str, image: Any) -> None:
+        path = self.directory / filename
+        if isinstance(image, np.ndarray):
+            if not cv2.imwrite(str(path), image):
+                raise IOError(f"cv2.imwrite failed for {path}")
+            return
+        if isinstance(image, Image.Image) and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(path)
+
+    def _run(self) -> None:
+        self.prune()
+        since_prune = 0
+        while True:
+            filename, image, nbytes = self._queue.get()
+            try:
+                self._write(filename, image)
+                self._bump('written')
+            except Exception as e:
+                self._bump('failed')
+                print(f"[debug_images] Failed to write {filename}: {type(e).__name__}: {e}")
+            finally:
+                del image
+                self._release(nbytes)
+                self._queue.task_done()
+            since_prune += 1
+            if since_prune >= self.prune_every:
+                since_prune = 0
+                self.prune()
+
+
+def _image_bytes(image: Any) -> int:
+    """Decoded size of a queued capture."""
+    if isinstance(image, np.ndarray):
+        return image.nbytes
+    if isinstance(image, Image.Image):
+        return image.width * image.height * len(image.getbands())
+    return 0
+
+
+def writer_from_env(directory: Path, budget: Optional[MemoryBudget] = None) -> DebugImageWriter:
+    """Build the writer from the DEBUG_* environment variables."""
+    return DebugImageWriter(
+        directory,
+        budget=budget,
+        max_queue=int(os.getenv("DEBUG_QUEUE_SIZE", "8")),
+        sample_every=int(os.getenv("DEBUG_SAMPLE_EVERY", "1")),
+        max_age_seconds=float(os.getenv("DEBUG_MAX_AGE_HOURS", "24")) * 3600,
+        max_total_bytes=int(float(os.getenv("DEBUG_MAX_MB", "500")) * 1024 * 1024),
+    )
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Adversarial-input benchmark for the SDS field extractor.
+
+Feeds ``sds_extractor.parse_text`` documents built to hit the worst cases of
+its patterns (very long OCR lines, long whitespace and blank-line runs,
+whitespace- or tab-only sections, repeated labels with no values, random
+garbage) at increasing sizes, and reports the time per document. Linear matching shows up as time roughly
+doubling with size; the run fails if any document takes longer than
+``--budget`` seconds.
+
+Example:
+    python loadtest/bench_extractor.py --sizes 25000,50000,100000 --budget 2
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("SDS_TEXT_STORE", "")  # nothing here comes from a real PDF
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sds_parser_new.sds_extractor import parse_text  # noqa: E402
+
+SECTION1 = "1. IDENTIFICATION\nProduct Name: Bench Solvent\nSupplier: Bench Chemicals\n"
+SECTION14 = "14. TRANSPORT INFORMATION\n"
+
+
+def _garbage(rng: random.Random, n: int) -> str:
+    alphabet = string.ascii_letters + string.digits + " .:-/|"
+    return ''.join(rng.choice(alphabet) for _ in range(n))
+
+
+# each case builds a document of roughly ``n`` characters
+CASES: Dict[str, Callable[[random.Random, int], str]] = {
+    'long line in section 14': lambda rng, n: SECTION1 + SECTION14 + ("xpacking grou " * (n // 14)) + "\n",
+    'packing group repeated': lambda rng, n: SECTION1 + SECTION14 + ("packing group " * (n // 14)) + "\n",
+    'label then whitespace': lambda rng, n: SECTION1 + SECTION14 + "Class" + " " * n + "x\n",
+    'date label then whitespace': lambda rng, n: "Revision Date" + " " * n + "x\n" + SECTION1,
+    'date labels repeated': lambda rng, n: ("Issued " * (n // 7)) + "\n" + SECTION1,
+    'whitespace-only section 14': lambda rng, n: SECTION1 + SECTION14 + " \n" * (n // 2),
+    'tab-only section 14': lambda rng, n: SECTION1 + SECTION14 + "\t\t\t\n" * (n // 4),
+    'tab/space line in section 14': lambda rng, n: SECTION1 + SECTION14 + " \t" * (n // 2) + "\n",
+    'blank line runs': lambda rng, n: SECTION1 + "\n" * n + SECTION14 + " \n" * (n // 2) + "15. REGULATORY\n",
+    'labels without values': lambda rng, n: SECTION1 + SECTION14 + "Class\nUN Number\nPacking group\n" * (n // 30),
+    'section 1 labels only': lambda rng, n: "1. IDENTIFICATION\n" + "Product Name\nSupplier\n" * (n // 22) + SECTION14,
+    'section headings only': lambda rng, n: "".join(f"{i % 16 + 1}. \n" for i in range(n // 5)),
+    'garbage OCR line': lambda rng, n: SECTION1 + SECTION14 + _garbage(rng, n) + "\n",
+    'garbage OCR lines': lambda rng, n: SECTION1 + SECTION14 + "\n".join(
+        _garbage(rng, rng.randint(1, 200)) for _ in range(n // 100)),
+}
+
+
+def run_case(build: Callable[[random.Random, int], str], n: int, seed: int) -> float:
+    text = build(random.Random(seed), n)
+    start = time.perf_counter()
+    parse_text(text)
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the SDS extractor on adversarial text')
+    parser.add_argument('--sizes', default='25000,50000,100000', help='document sizes in characters')
+    parser.add_argument('--budget', type=float, default=2.0, help='max seconds allowed per document')
+    parser.add_argument('--cases', default=','.join(CASES), help='comma-separated subset of cases')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    names = [c.strip() for c in args.cases.split(',') if c.strip()]
+    unknown = set(names) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    worst = 0.0
+    print(f"{'case':<28}" + ''.join(f"{n:>10}" for n in sizes) + f"{'growth':>9}")
+    for name in names:
+        times: List[float] = [run_case(CASES[name], n, args.seed) for n in sizes]
+        worst = max(worst, *times)
+        growth = f"{times[-1] / times[0]:.1f}x" if len(times) > 1 and times[0] > 0 else '-'
+        print(f"{name:<28}" + ''.join(f"{t * 1000:>8.0f}ms" for t in times) + f"{growth:>9}")
+
+    ok = worst <= args.budget
+    print(f"\nWorst document: {worst:.3f}s (budget {args.budget:.1f}s) - {'OK' if ok else 'OVER BUDGET'}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
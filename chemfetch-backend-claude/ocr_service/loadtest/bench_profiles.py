@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark the OCR inference profiles from ``ocr_profiles.py`` against each other.
+
+Loads every requested profile, runs each over the same label images and
+reports load time, mean/p95 inference latency and how closely each
+profile's text matches the reference profile (``accurate`` by default).
+
+Example:
+    python loadtest/bench_profiles.py --images scans/*.jpg --repeat 5
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_profiles import PROFILES, build_model  # noqa: E402
+from run_load import label_image, percentile  # noqa: E402
+
+
+def result_text(result) -> str:
+    if isinstance(result, list) and result and isinstance(result[0], dict):
+        return "\n".join(result[0].get('rec_texts', []))
+    return "\n".join(entry[1][0] for block in result or [] if block for entry in block)
+
+
+def load_images(paths: List[str]) -> List[np.ndarray]:
+    if not paths:
+        data = np.frombuffer(label_image(None), dtype=np.uint8)
+        return [cv2.imdecode(data, cv2.IMREAD_COLOR)]
+    images = []
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            raise SystemExit(f"Could not read image: {path}")
+        images.append(img)
+    return images
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark PaddleOCR inference profiles')
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--reference', default='accurate', help='profile whose text is treated as ground truth')
+    parser.add_argument('--images', nargs='*', default=[], help='label images (default: a rendered sample)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per image')
+    args = parser.parse_args(argv)
+
+    names = [p.strip() for p in args.profiles.split(',') if p.strip()]
+    images = load_images(args.images)
+    texts: Dict[str, List[str]] = {}
+    rows = []
+
+    for name in names:
+        start = time.perf_counter()
+        model = build_model(name)
+        load_s = time.perf_counter() - start
+        model.predict(images[0])  # warm-up
+        timings = []
+        texts[name] = []
+        for img in images:
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                result = model.predict(img)
+                timings.append((time.perf_counter() - t0) * 1000)
+            texts[name].append(result_text(result))
+        rows.append((name, load_s, float(np.mean(timings)), percentile(timings, 95)))
+        del model
+
+    ref = texts.get(args.reference)
+    print(f"\n{'profile':<10}{'load s':>8}{'mean ms':>10}{'p95 ms':>10}{'text match':>12}")
+    for name, load_s, mean_ms, p95_ms in rows:
+        if ref is None:
+            match = '-'
+        else:
+            ratios = [difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(texts[name], ref)]
+            match = f"{np.mean(ratios):.3f}"
+        print(f"{name:<10}{load_s:>8.1f}{mean_ms:>10.0f}{p95_ms:>10.0f}{match:>12}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
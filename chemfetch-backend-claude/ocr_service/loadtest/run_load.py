@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Load-test the OCR service endpoints at a fixed concurrency.
+
+Starts the stand-in vendor server from ``vendor_server.py`` (unless
+``--vendor-url`` points elsewhere) so /verify-sds, /parse-sds and
+/parse-pdf-direct fetch PDFs with controlled latency, bandwidth, size,
+wrong content types and mid-stream failures. /ocr is sent a label image.
+
+Reports throughput, p50/p95/p99 latency and error/timeout rates per endpoint,
+and samples the service's RSS from /metrics/memory while the test runs.
+
+Example:
+    python loadtest/run_load.py --endpoints verify-sds,parse-pdf-direct \\
+        --concurrency 8 --requests 200 --latency-ms 200 --bandwidth-kbps 2048 \\
+        --wrong-content-type-rate 0.05 --fail-rate 0.05
+"""
+
+import argparse
+import io
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import requests
+
+from vendor_server import sds_pdf, start_vendor_server
+
+ENDPOINTS = ('ocr', 'verify-sds', 'parse-sds', 'parse-pdf-direct')
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def label_image(path: Optional[str]) -> bytes:
+    """The image sent to /ocr: ``--image`` if given, else a rendered label."""
+    if path:
+        with open(path, 'rb') as f:
+            return f.read()
+    from PIL import Image, ImageDraw
+    img = Image.new('RGB', (1200, 800), 'white')
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(["ACME SOLVENT CLEANER", "Flammable Liquid", "UN1993 Class 3", "5 L"]):
+        draw.text((80, 120 + i * 120), line, fill='black')
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.results: Dict[str, List[Dict[str, Any]]] = {ep: [] for ep in args.endpoints}
+        self.rss: List[Dict[str, float]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.image = label_image(args.image) if 'ocr' in args.endpoints else b''
+
+    def pdf_url(self) -> str:
+        a = self.args
+        q: Dict[str, Any] = {
+            'size_kb': a.size_kb,
+            'latency_ms': a.latency_ms,
+            'bandwidth_kbps': a.bandwidth_kbps,
+            'n': self.rng.randrange(a.distinct_urls),
+        }
+        roll = self.rng.random()
+        if roll < a.wrong_content_type_rate:
+            q['content_type'] = 'text/html'
+        elif roll < a.wrong_content_type_rate + a.fail_rate:
+            q['fail_after_kb'] = max(1, a.size_kb // 2)
+        return f"{a.vendor_url}/sds.pdf?{urlencode(q)}"
+
+    def send(self, session: requests.Session, endpoint: str, i: int) -> Dict[str, Any]:
+        url = f"{self.args.service}/{endpoint}"
+        if endpoint == 'ocr':
+            kwargs = {'files': {'image': ('label.jpg', self.image, 'image/jpeg')}}
+        elif endpoint == 'verify-sds':
+            kwargs = {'json': {'url': self.pdf_url(), 'name': 'Loadtest Solvent'}}
+        else:
+            kwargs = {'json': {'pdf_url': self.pdf_url(), 'product_id': i + 1}}
+        start = time.perf_counter()
+        try:
+            resp = session.post(url, timeout=self.args.timeout, **kwargs)
+            outcome = 'ok' if resp.status_code < 400 else f'http_{resp.status_code}'
+        except requests.Timeout:
+            outcome = 'timeout'
+        except requests.RequestException as e:
+            outcome = type(e).__name__
+        return {'latency': time.perf_counter() - start, 'outcome': outcome}
+
+    def worker(self, worker_id: int, jobs: List[tuple]) -> None:
+        session = requests.Session()
+        for i, endpoint in jobs:
+            result = self.send(session, endpoint, i)
+            with self._lock:
+                self.results[endpoint].append(result)
+
+    def sample_rss(self) -> None:
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                stats = requests.get(f"{self.args.service}/metrics/memory", timeout=2).json()
+                self.rss.append({
+                    't': round(time.perf_counter() - start, 2),
+                    'rss_mb': round(stats.get('rss_bytes', 0) / 2**20, 1),
+                    'reserved_mb': round(stats.get('in_use_bytes', 0) / 2**20, 1),
+                })
+            except (requests.RequestException, ValueError):
+                pass
+            self._stop.wait(self.args.rss_interval)
+
+    def run(self) -> Dict[str, Any]:
+        a = self.args
+        jobs = [(i, a.endpoints[i % len(a.endpoints)]) for i in range(a.requests)]
+        per_worker = [jobs[w::a.concurrency] for w in range(a.concurrency)]
+        sampler = threading.Thread(target=self.sample_rss, daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=a.concurrency) as pool:
+            list(pool.map(self.worker, range(a.concurrency), per_worker))
+        elapsed = time.perf_counter() - started
+        self._stop.set()
+        sampler.join()
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, results in self.results.items():
+            latencies = [r['latency'] for r in results if r['outcome'] == 'ok']
+            outcomes: Dict[str, int] = {}
+            for r in results:
+                outcomes[r['outcome']] = outcomes.get(r['outcome'], 0) + 1
+            n = len(results) or 1
+            endpoints[endpoint] = {
+                'requests': len(results),
+                'throughput_rps': round(len(results) / elapsed, 2),
+                'p50_s': percentile(latencies, 50),
+                'p95_s': percentile(latencies, 95),
+                'p99_s': percentile(latencies, 99),
+                'mean_s': statistics.fmean(latencies) if latencies else None,
+                'error_rate': round(sum(v for k, v in outcomes.items() if k != 'ok') / n, 4),
+                'timeout_rate': round(outcomes.get('timeout', 0) / n, 4),
+                'outcomes': outcomes,
+            }
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'concurrency': self.args.concurrency,
+            'endpoints': endpoints,
+            'rss': self.rss,
+            'peak_rss_mb': max((s['rss_mb'] for s in self.rss), default=None),
+        }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    def ms(v):
+        return f"{v * 1000:8.0f}" if v is not None else "       -"
+
+    print(f"\nElapsed {report['elapsed_s']}s at concurrency {report['concurrency']}")
+    print(f"{'endpoint':<18}{'reqs':>6}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'err%':>7}{'tmo%':>7}")
+    for endpoint, r in report['endpoints'].items():
+        print(f"{endpoint:<18}{r['requests']:>6}{r['throughput_rps']:>8}{ms(r['p50_s'])} {ms(r['p95_s'])} "
+              f"{ms(r['p99_s'])}{r['error_rate'] * 100:>7.1f}{r['timeout_rate'] * 100:>7.1f}")
+        if set(r['outcomes']) != {'ok'}:
+            print(f"{'':<18}outcomes: {r['outcomes']}")
+    if report['rss']:
+        trail = ', '.join(f"{s['t']}s:{s['rss_mb']}MB" for s in report['rss'][:: max(1, len(report['rss']) // 10)])
+        print(f"\nService RSS (peak {report['peak_rss_mb']}MB): {trail}")
+    else:
+        print("\nService RSS: /metrics/memory not reachable")
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description='Load-test the ChemFetch OCR service')
+    parser.add_argument('--service', default='http://localhost:5001', help='OCR service base URL')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                        help=f"comma-separated subset of {', '.join(ENDPOINTS)}")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=100, help='total requests across endpoints')
+    parser.add_argument('--timeout', type=float, default=150.0, help='client timeout per request (s)')
+    parser.add_argument('--image', help='image file to send to /ocr')
+    parser.add_argument('--vendor-url', help='use an already running vendor stand-in')
+    parser.add_argument('--vendor-port', type=int, default=8765)
+    parser.add_argument('--size-kb', type=int, default=200, help='size of served PDFs')
+    parser.add_argument('--latency-ms', type=float, default=0, help='vendor time to first byte')
+    parser.add_argument('--bandwidth-kbps', type=float, default=0, help='vendor bandwidth, 0 = unlimited')
+    parser.add_argument('--wrong-content-type-rate', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='share of downloads cut mid-stream')
+    parser.add_argument('--distinct-urls', type=int, default=1000, help='spread of distinct PDF URLs')
+    parser.add_argument('--rss-interval', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the full report to this file')
+    args = parser.parse_args(argv)
+
+    args.endpoints = [e.strip().strip('/') for e in args.endpoints.split(',') if e.strip()]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    if not args.vendor_url:
+        start_vendor_server(args.vendor_port)
+        sds_pdf(args.size_kb)  # build the PDF before the clock starts
+        args.vendor_url = f"http://127.0.0.1:{args.vendor_port}"
+        print(f"[loadtest] Vendor stand-in on {args.vendor_url}")
+
+    report = LoadTest(args).run()
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
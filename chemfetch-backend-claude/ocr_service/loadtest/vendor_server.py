@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Stand-in for a vendor SDS download server, used by the load tests.
+
+Serves synthetic SDS PDFs whose behaviour is controlled per request through
+query parameters, so a single URL template covers the slow, large, mislabelled
+and broken downloads we see from real vendors:
+
+    /sds.pdf?size_kb=800&latency_ms=300&bandwidth_kbps=512
+    /sds.pdf?content_type=text/html
+    /sds.pdf?fail_after_kb=64        (connection dropped mid-body)
+    /sds.pdf?status=503
+
+Run standalone with ``python vendor_server.py --port 8765``.
+"""
+
+import argparse
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import fitz
+
+SDS_TEMPLATE = [
+    "SAFETY DATA SHEET",
+    "Issue Date: 2023-05-01",
+    "1. IDENTIFICATION OF THE MATERIAL AND SUPPLIER",
+    "Product Name: Loadtest Solvent {n}",
+    "Manufacturer: Stand-in Chemicals Pty Ltd",
+    "Recommended use: Industrial cleaning",
+    "2. HAZARD IDENTIFICATION",
+    "Signal Word: Danger  Hazard Statement: H225 Highly flammable liquid and vapour",
+    "3. COMPOSITION / INFORMATION ON INGREDIENTS",
+    "4. FIRST AID MEASURES",
+    "14. TRANSPORT INFORMATION",
+    "UN Number: 1993",
+    "Transport hazard class: 3",
+    "Packing group: II",
+    "15. REGULATORY INFORMATION",
+    "16. OTHER INFORMATION",
+]
+
+# PyMuPDF is not thread-safe; PDFs are built once per size under this lock
+_pdf_lock = threading.Lock()
+
+
+def _filler_page(doc, n: int) -> None:
+    page = doc.new_page()
+    for row in range(45):
+        page.insert_text((50, 40 + row * 16), f"Section 16 filler page {n} row {row} " * 3, fontsize=8)
+
+
+@lru_cache(maxsize=32)
+def sds_pdf(size_kb: int) -> bytes:
+    """Synthetic SDS padded with filler pages to roughly ``size_kb``."""
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, line in enumerate(SDS_TEMPLATE):
+        page.insert_text((50, 60 + i * 16), line.format(n=size_kb), fontsize=10)
+    data = doc.tobytes()
+    target = size_kb * 1024
+    if len(data) >= target:
+        return data
+    _filler_page(doc, 1)
+    per_page = max(len(doc.tobytes()) - len(data), 1)
+    for n in range(2, 2 + (target - len(data)) // per_page):
+        _filler_page(doc, n)
+    data = doc.tobytes()
+    return data
+
+
+class VendorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # keep load-test output readable
+        pass
+
+    def do_GET(self):
+        q = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+        latency = float(q.get("latency_ms", 0)) / 1000
+        bandwidth = float(q.get("bandwidth_kbps", 0)) * 1024 / 8  # bytes/s, 0 = unlimited
+        status = int(q.get("status", 200))
+        fail_after = int(float(q.get("fail_after_kb", -1)) * 1024)
+
+        if latency:
+            time.sleep(latency)
+        if status != 200:
+            self.send_error(status)
+            return
+
+        with _pdf_lock:
+            body = sds_pdf(int(q.get("size_kb", 50)))
+        self.send_response(200)
+        self.send_header("Content-Type", q.get("content_type", "application/pdf"))
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"loadtest-{len(body)}"')
+        self.end_headers()
+
+        chunk = 16 * 1024
+        for start in range(0, len(body), chunk):
+            if 0 <= fail_after <= start:
+                # drop the connection mid-body
+                self.close_connection = True
+                return
+            part = body[start:start + chunk]
+            self.wfile.write(part)
+            if bandwidth:
+                time.sleep(len(part) / bandwidth)
+
+
+def start_vendor_server(port: int = 8765, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Start the stand-in server on a daemon thread and return it."""
+    server = ThreadingHTTPServer((host, port), VendorHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="vendor-server", daemon=True).start()
+    return server
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Stand-in vendor SDS PDF server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    server = ThreadingHTTPServer((args.host, args.port), VendorHandler)
+    print(f"[vendor_server] Serving synthetic SDS PDFs on http://{args.host}:{args.port}/sds.pdf")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,163 @@
+"""
+Admission control for memory-heavy requests.
+
+Every /ocr, /verify-sds and /parse-* request reserves its expected footprint
+against a process-wide budget before doing any work. Requests that would
+exceed the budget wait up to ``wait_seconds`` for others to finish and are
+then rejected; a single request larger than the whole budget is rejected
+immediately. Downloaded payloads go to ``SpooledTemporaryFile`` so only the
+first ``SPOOL_MAX_BYTES`` of each stays in memory.
+
+Memory that stays resident for the life of the process, such as OCR models
+loaded beyond the default one, is taken off the budget with ``set_aside``.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+# bytes of a download kept in RAM before spilling to disk
+SPOOL_MAX_BYTES = int(float(os.getenv("SPOOL_MAX_MB", "8")) * MB)
+
+# decoded RGB copies an /ocr request holds at its peak: full image, crop,
+# scaled image, BGR array, grey + CLAHE + BGR preprocessed, model input
+IMAGE_COPIES = 6
+# pdfminer/PyMuPDF working memory relative to the PDF size
+PDF_PARSE_FACTOR = 4
+# reservation for a PDF whose size isn't known up front
+DEFAULT_PDF_BYTES = int(float(os.getenv("DEFAULT_PDF_MB", "16")) * MB)
+
+
+class BudgetExceeded(Exception):
+    """Raised when a reservation cannot be admitted."""
+
+
+class MemoryBudget:
+    def __init__(self, total_bytes: int, wait_seconds: float = 10.0):
+        self.total_bytes = total_bytes
+        self.wait_seconds = wait_seconds
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._stats = {'admitted': 0, 'waited': 0, 'rejected': 0, 'peak_bytes': 0, 'set_aside_bytes': 0}
+
+    @contextmanager
+    def reserve(self, nbytes: int, label: str = "request") -> Iterator[None]:
+        """Hold ``nbytes`` of the budget for the duration of the block."""
+        nbytes = max(0, int(nbytes))
+        self._acquire(nbytes, label)
+        try:
+            yield
+        finally:
+            self.release(nbytes)
+
+    def try_reserve(self, nbytes: int) -> bool:
+        """Take ``nbytes`` only if it fits right now; the caller must ``release`` it.
+
+        For background work such as debug captures: the bytes count towards
+        ``in_use_bytes`` and ``peak_bytes`` but not the request admission stats.
+        """
+        nbytes = max(0, int(nbytes))
+        with self._cond:
+            if self._in_use + nbytes > self.total_bytes:
+                return False
+            self._in_use += nbytes
+            self._stats['peak_bytes'] = max(self._stats['peak_bytes'], self._in_use)
+        return True
+
+    def release(self, nbytes: int) -> None:
+        with self._cond:
+            self._in_use -= max(0, int(nbytes))
+            self._cond.notify_all()
+
+    def set_aside(self, nbytes: int, label: str) -> None:
+        """Permanently take ``nbytes`` of resident memory off the budget."""
+        nbytes = max(0, int(nbytes))
+        with self._cond:
+            self.total_bytes = max(0, self.total_bytes - nbytes)
+            self._stats['set_aside_bytes'] += nbytes
+            remaining = self.total_bytes
+        print(f"[memory_budget] Set aside {nbytes // MB}MB for {label}; {remaining // MB}MB left for requests")
+
+    def _acquire(self, nbytes: int, label: str) -> None:
+        if nbytes > self.total_bytes:
+            with self._cond:
+                self._stats['rejected'] += 1
+            raise BudgetExceeded(
+                f"{label} needs {nbytes // MB}MB, more than the {self.total_bytes // MB}MB budget")
+        deadline = time.monotonic() + self.wait_seconds
+        with self._cond:
+            waited = False
+            while self._in_use + nbytes > self.total_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['rejected'] += 1
+                    raise BudgetExceeded(
+                        f"{label} needs {nbytes // MB}MB; {self._in_use // MB}MB of "
+                        f"{self.total_bytes // MB}MB already reserved")
+                waited = True
+                self._cond.wait(remaining)
+            self._in_use += nbytes
+            self._stats['admitted'] += 1
+            if waited:
+                self._stats['waited'] += 1
+            self._stats['peak_bytes'] = max(self._stats['peak_bytes'], self._in_use)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            out = dict(self._stats, in_use_bytes=self._in_use, total_bytes=self.total_bytes)
+        rss = current_rss_bytes()
+        if rss is not None:
+            out['rss_bytes'] = rss
+        peak = peak_rss_bytes()
+        if peak is not None:
+            out['peak_rss_bytes'] = peak
+        return out
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Current resident set size, read from /proc where available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, where the platform reports it."""
+    if resource is None:
+        return None
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def image_footprint(width: int, height: int, upload_bytes: int = 0) -> int:
+    """Expected peak bytes for OCR on a ``width`` x ``height`` image."""
+    return width * height * 3 * IMAGE_COPIES + upload_bytes
+
+
+def pdf_footprint(size_bytes: Optional[int]) -> int:
+    """Expected peak bytes for downloading and parsing a PDF of ``size_bytes``."""
+    size = size_bytes if size_bytes else DEFAULT_PDF_BYTES
+    return min(size, SPOOL_MAX_BYTES) + size * PDF_PARSE_FACTOR
+
+
+def spooled_buffer() -> tempfile.SpooledTemporaryFile:
+    """Binary buffer that spills to disk past ``SPOOL_MAX_BYTES``."""
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode='w+b')
+
+
+budget = MemoryBudget(
+    total_bytes=int(float(os.getenv("MEMORY_BUDGET_MB", "1024")) * MB),
+    wait_seconds=float(os.getenv("MEMORY_WAIT_SECONDS", "10")),
+)
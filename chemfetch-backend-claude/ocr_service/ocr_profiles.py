@@ -0,0 +1,114 @@
+"""
+Named PaddleOCR inference profiles.
+
+Each profile pins the detection/recognition model variant, oneDNN (MKL-DNN)
+acceleration, CPU thread count, the text-line angle classifier and the
+detection input size. ``OCR_PROFILE`` picks the default, which is the only
+model loaded unless a deployment opts in to more with a comma-separated
+``OCR_PROFILES``; each listed profile is one more resident model, and a
+request can ask for any loaded profile with ``profile=<name>``.
+
+Most label scans are upright, short and photographed close up, so the
+``fast`` profile drops the angle classifier and uses mobile models with a
+smaller detection limit. ``accurate`` keeps server models and the classifier
+for difficult scans.
+
+Each load records the process memory it added in ``MODEL_BYTES`` (or
+``OCR_MODEL_MB`` where RSS cannot be read) so the service can take resident
+models off its memory budget.
+"""
+
+import os
+import time
+from typing import Any, Dict, List
+
+from memory_budget import MB, current_rss_bytes
+
+CPU_THREADS = int(os.getenv("OCR_CPU_THREADS", str(os.cpu_count() or 4)))
+OCR_DEVICE = os.getenv("OCR_DEVICE", "cpu")
+# resident size assumed for a model when RSS is not available
+MODEL_BYTES_FALLBACK = int(float(os.getenv("OCR_MODEL_MB", "150")) * MB)
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    'fast': {
+        'text_detection_model_name': 'PP-OCRv5_mobile_det',
+        'text_recognition_model_name': 'en_PP-OCRv4_mobile_rec',
+        'use_textline_orientation': False,
+        'text_det_limit_side_len': 736,
+        'enable_mkldnn': True,
+    },
+    'balanced': {
+        'text_detection_model_name': 'PP-OCRv5_mobile_det',
+        'text_recognition_model_name': 'en_PP-OCRv4_mobile_rec',
+        'use_textline_orientation': True,
+        'text_det_limit_side_len': 960,
+        'enable_mkldnn': True,
+    },
+    'accurate': {
+        'text_detection_model_name': 'PP-OCRv5_server_det',
+        'text_recognition_model_name': 'PP-OCRv5_server_rec',
+        'use_textline_orientation': True,
+        'text_det_limit_side_len': 1600,
+        'enable_mkldnn': True,
+    },
+}
+
+DEFAULT_PROFILE = os.getenv("OCR_PROFILE", "balanced")
+# every extra profile is another resident model, so extras are opt-in
+ENABLED_PROFILES = [p.strip() for p in os.getenv("OCR_PROFILES", DEFAULT_PROFILE).split(",") if p.strip()]
+# resident bytes each loaded profile added to the process
+MODEL_BYTES: Dict[str, int] = {}
+
+
+def profile_kwargs(name: str) -> Dict[str, Any]:
+    """PaddleOCR (3.x) constructor arguments for profile ``name``."""
+    return dict(
+        PROFILES[name],
+        text_det_limit_type='max',
+        # whole-page document correction is never useful for product labels
+        use_doc_orientation_classify=False,
+        use_doc_unwarping=False,
+        cpu_threads=CPU_THREADS,
+        device=OCR_DEVICE,
+    )
+
+
+def build_model(name: str):
+    """Load the PaddleOCR model for profile ``name``.
+
+    PaddleOCR 2.x silently ignores unknown keyword arguments, so the 3.x
+    arguments are only used when the installed major version is 3 or later;
+    otherwise the closest 2.x settings are passed.
+    """
+    import paddleocr
+    from paddleocr import PaddleOCR
+
+    major = int(str(getattr(paddleocr, '__version__', '3')).split('.')[0] or 3)
+    if major >= 3:
+        return PaddleOCR(**profile_kwargs(name))
+    settings = PROFILES[name]
+    return PaddleOCR(
+        lang="en",
+        use_angle_cls=settings['use_textline_orientation'],
+        det_limit_side_len=settings['text_det_limit_side_len'],
+        enable_mkldnn=settings['enable_mkldnn'],
+        cpu_threads=CPU_THREADS,
+        use_gpu=OCR_DEVICE.startswith('gpu'),
+    )
+
+
+def load_profiles(names: List[str]) -> Dict[str, Any]:
+    """Preload one resident model per profile, logging load times."""
+    unknown = [n for n in names if n not in PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown OCR profiles: {', '.join(unknown)} (known: {', '.join(PROFILES)})")
+    models = {}
+    for name in names:
+        start = time.perf_counter()
+        rss = current_rss_bytes()
+        models[name] = build_model(name)
+        after = current_rss_bytes()
+        MODEL_BYTES[name] = max(0, after - rss) if rss is not None and after is not None else MODEL_BYTES_FALLBACK
+        print(f"[ocr_profiles] Loaded '{name}' in {time.perf_counter() - start:.1f}s "
+              f"(+{MODEL_BYTES[name] // MB}MB)")
+    return models
@@ -1,19 +1,17 @@
 import os
 import json
+import hashlib
 import tempfile
-from io import BytesIO
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Tuple, Optional, Union
+from typing import List, Dict, Any, Tuple, Optional
 from pdfminer.high_level import extract_text
-import requests
 import threading
 import time
 
 import cv2
 import numpy as np
-from flask import Flask, request, jsonify
-from paddleocr import PaddleOCR
+from flask import Flask, Response, request, jsonify, make_response, send_from_directory
 from PIL import Image
 
 # -----------------------------------------------------------------------------
@@ -21,33 +19,64 @@ from PIL import Image
 # the service is started from project root.
 # -----------------------------------------------------------------------------
 try:
-    from parse_sds import parse_sds_pdf  # when running inside ocr_service
+    from parse_sds import attach_status, parse_sds_pdf, download_pdf, is_unchanged, transform_to_chemfetch_format  # when running inside ocr_service
 except Exception:
     try:
         # Fallback if app is executed from project root and ocr_service is a pkg
-        from ocr_service.parse_sds import parse_sds_pdf  # type: ignore
+        from ocr_service.parse_sds import attach_status, parse_sds_pdf, download_pdf, is_unchanged, transform_to_chemfetch_format  # type: ignore
     except Exception as e:
         parse_sds_pdf = None  # will be checked before use
         _import_err = e
 
+from debug_images import writer_from_env
+from ocr_profiles import DEFAULT_PROFILE, ENABLED_PROFILES, MODEL_BYTES, PROFILES, load_profiles, profile_kwargs
+from memory_budget import BudgetExceeded, budget, image_footprint, pdf_footprint, spooled_buffer
+from request_profiler import PROFILE_DIR, install_signal_handler, is_admin, profiled
+from single_flight import CoalesceTimeout, SingleFlight, normalise_url
+from pdf_downloader import DownloadRejected, downloader
+from sds_parser_new.ocr_layout import joined_text, postprocess_ocr
+
 # Also import the new SDS extractor directly for the HTTP endpoint
 try:
-    from sds_parser_new.sds_extractor import parse_pdf as parse_pdf_direct
+    from sds_parser_new.sds_extractor import parse_pdf as parse_pdf_direct, extract_pages as extract_sds_pages, resolve_fields
 except Exception as e:
     parse_pdf_direct = None
+    extract_sds_pages = None
+    resolve_fields = None
     _direct_import_err = e
 
 # -----------------------------------------------------------------------------
 # Environment & global config
 # -----------------------------------------------------------------------------
-os.environ.setdefault("CUDA_VISIBLE_DEVICES", "0")
 os.environ.setdefault("FLAGS_log_dir", tempfile.gettempdir())
 
 app = Flask(__name__)
+# Reject oversized uploads before Werkzeug buffers them
+app.config['MAX_CONTENT_LENGTH'] = int(float(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024)
 # Debug image dumping via env var or ?mode=debug
 DEBUG_IMAGES_ENV = os.getenv("DEBUG_IMAGES", "0") == "1"
 DEBUG_DIR = Path("debug_images")
-DEBUG_DIR.mkdir(exist_ok=True)
+# Captures are written off the request path; see debug_images.py for the
+# DEBUG_SAMPLE_EVERY / DEBUG_QUEUE_SIZE / DEBUG_MAX_AGE_HOURS / DEBUG_MAX_MB knobs.
+# Queued captures hold their decoded size against the memory budget until written.
+debug_writer = writer_from_env(DEBUG_DIR, budget)
+# Server-side OCR post-processing defaults (overridable per request)
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "0"))
+OCR_MIN_BOX_AREA = float(os.getenv("OCR_MIN_BOX_AREA", "0"))
+
+# Profiling: X-Profile + X-Admin-Token per request, SIGUSR1 for the whole
+# service; see request_profiler.py for the PROFILE_* knobs
+install_signal_handler()
+
+# Identical concurrent requests (same normalised PDF URL, same /ocr upload and
+# options) share one computation; waiters give up after their endpoint's timeout
+inflight = SingleFlight(timeout=float(os.getenv("COALESCE_WAIT_SECONDS", "180")))
+
+# Optional binary encoding for compact /ocr responses
+try:
+    import msgpack
+except Exception:
+    msgpack = None
 
 # -----------------------------------------------------------------------------
 # Cross-platform timeout utility
@@ -91,17 +120,36 @@ def run_with_timeout(func, args=(), kwargs=None, timeout=120):
 # -----------------------------------------------------------------------------
 # Helpers
 # -----------------------------------------------------------------------------
-def box_area(box: List[List[float]] | np.ndarray) -> float:
-    pts = np.asarray(box, dtype=np.float32).reshape(-1, 2)
-    if pts.shape[0] < 3:
-        _, _, w, h = cv2.boundingRect(pts.astype(np.int32))
-        return float(w * h)
-    return float(cv2.contourArea(pts))
-
+def columnar_payload(pp: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact response: parallel arrays instead of one object per box.
 
-def box_origin(box: List[List[float]] | np.ndarray) -> Tuple[float, float]:
-    pts = np.asarray(box, dtype=np.float32).reshape(-1, 2)
-    return float(pts[:, 0].min()), float(pts[:, 1].min())
+    Boxes are reduced to axis-aligned ``[x0, y0, x1, y1]`` rectangles.
+    """
+    pts = pp['boxes']
+    rects = np.concatenate([pts.min(axis=1), pts.max(axis=1)], axis=1) if len(pts) else np.zeros((0, 4))
+    return {
+        'texts': pp['texts'],
+        'scores': np.round(pp['scores'].astype(np.float64), 4).tolist(),
+        'boxes': np.round(rects.astype(np.float64), 1).tolist(),
+        'line_ids': pp['line_ids'].tolist(),
+    }
+
+
+def lines_payload(pp: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Default response: one ``{text, confidence, box}`` object per box, with
+    ``box`` in the shape PaddleOCR returned it and a ``line`` id when the
+    boxes were grouped into visual lines."""
+    lines = [
+        {'text': txt, 'confidence': score, 'box': box}
+        for txt, score, box in zip(
+            pp['texts'], pp['scores'].astype(np.float64).tolist(),
+            pp['source_boxes'].astype(np.float64).tolist()
+        )
+    ]
+    if pp['grouped']:
+        for line, line_id in zip(lines, pp['line_ids'].tolist()):
+            line['line'] = line_id
+    return lines
 
 
 def resize_to_max_side(img: Image.Image, max_side: int) -> Image.Image:
@@ -123,17 +171,42 @@ def preprocess_array(img: np.ndarray) -> np.ndarray:
     return cv2.cvtColor(enhanced, cv2.COLOR_GRAY2BGR)
 
 # -----------------------------------------------------------------------------
-# Initialize OCR model
+# Initialize OCR models (one resident model per inference profile)
 # -----------------------------------------------------------------------------
 try:
-    ocr_model = PaddleOCR(
-        lang="en",
-        det_model_dir=None,
-        rec_model_dir=None,
-        use_angle_cls=True,
-    )
+    # the default loads first so Paddle's one-off start-up cost is not billed to the extras
+    ocr_models = load_profiles(sorted(ENABLED_PROFILES, key=lambda name: name != DEFAULT_PROFILE))
 except Exception as e:
     raise RuntimeError(f"Failed to initialize PaddleOCR: {e}")
+if DEFAULT_PROFILE not in ocr_models:
+    raise RuntimeError(f"Default OCR profile '{DEFAULT_PROFILE}' is not in OCR_PROFILES={ENABLED_PROFILES}")
+ocr_model = ocr_models[DEFAULT_PROFILE]
+# MEMORY_BUDGET_MB is sized for requests next to the default model; every
+# extra resident model comes out of it
+extra_models = [name for name in ocr_models if name != DEFAULT_PROFILE]
+if extra_models:
+    budget.set_aside(sum(MODEL_BYTES[name] for name in extra_models),
+                     f"OCR profiles {', '.join(extra_models)}")
+# /ocr and the scanned-PDF fallback share the resident models; serialise
+# predict() per model since the predictors are not thread-safe
+model_locks = {name: threading.Lock() for name in ocr_models}
+
+# Scanned SDS PDFs go through a resident model instead of spawning Tesseract
+# per page. SDS_OCR_BACKEND=tesseract keeps the old behaviour.
+SDS_OCR_BACKEND = os.getenv("SDS_OCR_BACKEND", "paddle")
+SDS_OCR_PROFILE = os.getenv("SDS_OCR_PROFILE", DEFAULT_PROFILE)
+try:
+    from sds_parser_new.ocr_backends import PaddleBackend, backend_stats, set_ocr_backend
+    if SDS_OCR_BACKEND == "paddle" and SDS_OCR_PROFILE in ocr_models:
+        set_ocr_backend(PaddleBackend(
+            ocr_models[SDS_OCR_PROFILE],
+            lock=model_locks[SDS_OCR_PROFILE],
+            batch_size=int(os.getenv("SDS_OCR_BATCH_PAGES", "4")),
+        ))
+        print(f"[OCR] Scanned SDS pages use the resident '{SDS_OCR_PROFILE}' model")
+except Exception as e:
+    backend_stats = None
+    print(f"[OCR] Scanned SDS pages fall back to Tesseract: {e}")
 
 # -----------------------------------------------------------------------------
 # Health check
@@ -149,10 +222,20 @@ def gpu_check():
         count = 0
     return jsonify({"cuda_compiled": compiled, "device_count": count})
 
+
+@app.route("/ocr/profiles")
+def ocr_profiles():
+    return jsonify({
+        "default": DEFAULT_PROFILE,
+        "loaded": {name: profile_kwargs(name) for name in ocr_models},
+        "available": list(PROFILES),
+    })
+
 # -----------------------------------------------------------------------------
 # OCR endpoint
 # -----------------------------------------------------------------------------
 @app.route('/ocr', methods=['POST'])
+@profiled
 def ocr():
     print("[OCR] Form keys:", list(request.form.keys()), "Files:", list(request.files.keys()))
 
@@ -178,27 +261,72 @@ def ocr():
         except Exception:
             left = top = width = height = 0
 
+    profile = request.values.get('profile', DEFAULT_PROFILE)
+    if profile not in ocr_models:
+        return jsonify({'error': f"Unknown or unloaded OCR profile '{profile}'",
+                        'profiles': list(ocr_models)}), 400
+
+    fmt = request.values.get('format', 'json')
+    if fmt == 'msgpack' or 'application/x-msgpack' in request.headers.get('Accept', ''):
+        fmt = 'msgpack'
+    # refuse before any decoding, OCR or coalescing rather than after the work is done
+    if fmt == 'msgpack' and msgpack is None:
+        return jsonify({'error': 'msgpack responses are not available (msgpack not installed)'}), 406
+
     debug_mode = request.args.get('mode') == 'debug'
-    save_images = DEBUG_IMAGES_ENV or debug_mode
+    # explicit ?mode=debug always captures; the env switch is sampled
+    save_images = debug_mode or (DEBUG_IMAGES_ENV and debug_writer.should_capture())
     tag = datetime.utcnow().strftime('%Y%m%dT%H%M%S_%f')
 
+    # identical uploads with identical options coalesce; debug captures are per request
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+        digest.update(chunk)
+    file.stream.seek(0)
+    coalesce_key = ('ocr', digest.hexdigest(), tuple(sorted(request.values.items(multi=True))),
+                    request.headers.get('Accept', ''))
+
     try:
-        img_stream = BytesIO(file.read())
-        full = Image.open(img_stream)
+        # Image.open only reads the header, so the size is known before decoding
+        full = Image.open(file.stream)
         print(f"[OCR] Image loaded: {full.size}, mode: {full.mode}")
         
         # Validate image
         if full.size[0] * full.size[1] > 50_000_000:  # 50 megapixels
             return jsonify({'error': 'Image too large (over 50 megapixels)'}), 400
-            
-        if save_images:
-            full_path = DEBUG_DIR / f"{tag}_full.jpg"
-            full.save(full_path)
-            print(f"[OCR] Saved full image to {full_path}")
     except Exception as e:
         print(f"[OCR] Image loading error: {type(e).__name__}: {str(e)}")
         return jsonify({'error': f'Failed to load image: {str(e)}'}), 400
 
+    footprint = image_footprint(full.width, full.height, request.content_length or 0)
+
+    def run():
+        with budget.reserve(footprint, label="/ocr"):
+            resp = make_response(_ocr_image(full, left, top, width, height, debug_mode, save_images, tag, profile, fmt))
+        # share the encoded body, not the Response object, between callers
+        return resp.get_data(), resp.status_code, resp.mimetype
+
+    try:
+        if save_images:
+            body, status, mimetype = run()
+        else:
+            (body, status, mimetype), shared = inflight.do(coalesce_key, run, timeout=130)
+            if shared:
+                print("[OCR] Shared the result of an identical in-flight request")
+        return Response(body, status=status, mimetype=mimetype)
+    except BudgetExceeded as e:
+        print(f"[OCR] Rejected by memory budget: {e}")
+        return jsonify({'error': f'Server busy: {e}'}), 503
+    except CoalesceTimeout as e:
+        return jsonify({'error': str(e)}), 504
+
+
+def _ocr_image(full: Image.Image, left: int, top: int, width: int, height: int,
+               debug_mode: bool, save_images: bool, tag: str, profile: str, fmt: str):
+    """Crop, preprocess and OCR an uploaded image inside its memory reservation."""
+    if save_images:
+        debug_writer.submit(f"{tag}_full.jpg", full)
+
     try:
         screen_w = float(request.form.get('screenWidth', 0))
         screen_h = float(request.form.get('screenHeight', 0))
@@ -229,8 +357,7 @@ def ocr():
         print(f"[OCR] ROI size: {roi.size}")
         
         if save_images:
-            crop_path = DEBUG_DIR / f"{tag}_crop.jpg"
-            roi.save(crop_path)
+            debug_writer.submit(f"{tag}_crop.jpg", roi)
     except Exception as e:
         print(f"[OCR] Cropping error: {type(e).__name__}: {str(e)}")
         return jsonify({'error': f'Image cropping failed: {str(e)}'}), 400
@@ -240,8 +367,7 @@ def ocr():
         print(f"[OCR] Scaled size: {scaled.size}")
         
         if save_images:
-            scaled_path = DEBUG_DIR / f"{tag}_scaled.jpg"
-            scaled.save(scaled_path)
+            debug_writer.submit(f"{tag}_scaled.jpg", scaled)
     except Exception as e:
         print(f"[OCR] Scaling error: {type(e).__name__}: {str(e)}")
         return jsonify({'error': f'Image scaling failed: {str(e)}'}), 400
@@ -255,8 +381,7 @@ def ocr():
             return jsonify({'error': 'Image preprocessing resulted in empty image'}), 400
             
         if save_images:
-            proc_path = DEBUG_DIR / f"{tag}_proc.jpg"
-            cv2.imwrite(str(proc_path), proc)
+            debug_writer.submit(f"{tag}_proc.jpg", proc)
     except Exception as e:
         print(f"[OCR] Preprocessing error: {type(e).__name__}: {str(e)}")
         import traceback
@@ -264,7 +389,11 @@ def ocr():
         return jsonify({'error': f'Image preprocessing failed: {str(e)}'}), 400
 
     try:
-        result = run_with_timeout(ocr_model.predict, args=(proc,), timeout=120)
+        ocr_start = time.perf_counter()
+        with model_locks[profile]:
+            result = run_with_timeout(ocr_models[profile].predict, args=(proc,), timeout=120)
+        ocr_ms = (time.perf_counter() - ocr_start) * 1000
+        print(f"[OCR] Profile '{profile}' inference took {ocr_ms:.0f}ms")
     except TimeoutError:
         return jsonify({'error': 'OCR processing timeout'}), 500
     except Exception as e:
@@ -273,22 +402,17 @@ def ocr():
         traceback.print_exc()
         return jsonify({'error': f'OCR failed: {type(e).__name__}: {str(e)}'}), 500
 
-    lines: List[Dict[str, Any]] = []
-    text_parts: List[str] = []
+    texts: List[str] = []
+    scores: List[float] = []
+    boxes: Any = []
 
     if isinstance(result, list) and len(result) > 0 and isinstance(result[0], dict):
         ocr_out = result[0]
-        texts = ocr_out.get('rec_texts', [])
+        texts = list(ocr_out.get('rec_texts', []))
         scores = ocr_out.get('rec_scores', [])
         boxes = ocr_out.get('rec_boxes', [])
-        for txt, score, box in zip(texts, scores, boxes):
-            lines.append({
-                "text": txt,
-                "confidence": float(score),
-                "box": box.tolist() if hasattr(box, 'tolist') else [list(map(float, pt)) for pt in box]
-            })
-            text_parts.append(txt)
     else:
+        boxes = []
         for block in result:
             if not block:
                 continue
@@ -299,17 +423,36 @@ def ocr():
                     score = entry[1][1]
                 except Exception:
                     continue
-                lines.append({
-                    "text": txt,
-                    "confidence": float(score),
-                    "box": [list(map(float, pt)) for pt in box]
-                })
-                text_parts.append(txt)
-
-    text = "\n".join(text_parts)
-    resp = {'lines': lines, 'text': text}
+                boxes.append(box)
+                texts.append(txt)
+                scores.append(float(score))
+
+    try:
+        min_confidence = float(request.values.get('min_confidence', OCR_MIN_CONFIDENCE))
+        min_area = float(request.values.get('min_area', OCR_MIN_BOX_AREA))
+    except ValueError:
+        min_confidence, min_area = OCR_MIN_CONFIDENCE, OCR_MIN_BOX_AREA
+
+    # ?group_lines=1 sorts boxes into reading order and joins each visual line
+    # with spaces; by default boxes keep PaddleOCR's order, one per text line
+    group = request.values.get('group_lines', '0').lower() in ('1', 'true', 'yes')
+    pp = postprocess_ocr(texts, scores, boxes, min_confidence=min_confidence, min_area=min_area, group=group)
+    print(f"[OCR] Kept {len(pp['texts'])} boxes, dropped {pp['dropped']} "
+          f"(min_confidence={min_confidence}, min_area={min_area})")
+
+    text = joined_text(pp)
+    if fmt in ('columnar', 'msgpack'):
+        resp = columnar_payload(pp)
+    else:
+        resp = {'lines': lines_payload(pp)}
+    resp['text'] = text
+    resp['profile'] = profile
+    resp['timings'] = {'ocr_ms': round(ocr_ms, 1)}
     if save_images or debug_mode:
-        resp['debug'] = {'tag': tag, 'saved_images': save_images}
+        resp['debug'] = {'tag': tag, 'saved_images': save_images, 'writer': debug_writer.stats()}
+
+    if fmt == 'msgpack':
+        return Response(msgpack.packb(resp, use_bin_type=True), status=200, mimetype='application/x-msgpack')
 
     return jsonify(resp), 200
 
@@ -317,83 +460,83 @@ def ocr():
 # PDF SDS Verification Endpoint
 # -----------------------------------------------------------------------------
 
+# Comprehensive SDS keyword list - removed product name requirement entirely
+SDS_KEYWORDS = [
+    # Core SDS Terms
+    "SDS", "MSDS", "Safety Data Sheet", "Material Safety Data Sheet",
+    "Product Safety Data Sheet", "Chemical Safety Data Sheet",
+    "Hazard Communication", "GHS",
+    
+    # Standard SDS Section Headers
+    "Product Identification", "Hazard Identification", "Composition",
+    "First Aid Measures", "Fire Fighting Measures", "Accidental Release",
+    "Handling and Storage", "Exposure Controls", "Physical and Chemical Properties",
+    "Stability and Reactivity", "Toxicological Information", "Ecological Information",
+    "Disposal Considerations", "Transport Information", "Regulatory Information",
+    
+    # Format Indicators
+    "UN Number", "CAS Number", "Dangerous Goods", "Hazard Class",
+    "Packing Group", "Signal Word", "Hazard Statement", "Precautionary Statement",
+    
+    # Section numbering (SDS documents have numbered sections 1-16)
+    "Section 1", "Section 2", "Section 3", "Section 4", "Section 5"
+]
+# Require at least 2 keyword matches to be considered a valid SDS
+# This is much more reliable than product name matching
+MIN_KEYWORD_MATCHES = 2
+# scanned PDFs are OCRed a few pages at a time; /verify-parse-sds gives up on
+# a scan after this many pages without enough keyword matches
+VERIFY_OCR_PAGES = int(os.getenv("VERIFY_OCR_PAGES", "4"))
+# seconds /verify-parse-sds may spend on one PDF
+VERIFY_PARSE_TIMEOUT = 180
+
+
+def score_sds_text(text: str, keywords=None) -> List[str]:
+    """Return the SDS keywords found in ``text`` (case-insensitive)."""
+    text = text.lower()
+    return [kw for kw in (keywords or SDS_KEYWORDS) if kw.lower() in text]
+
+
+def enough_sds_keywords(pages: List[str]) -> bool:
+    return len(score_sds_text("".join(pages))) >= MIN_KEYWORD_MATCHES
+
+
 def verify_pdf_sds(url: str, product_name: str, keywords=None) -> bool:
-    # Comprehensive SDS keyword list - removed product name requirement entirely
-    keywords = keywords or [
-        # Core SDS Terms
-        "SDS", "MSDS", "Safety Data Sheet", "Material Safety Data Sheet",
-        "Product Safety Data Sheet", "Chemical Safety Data Sheet",
-        "Hazard Communication", "GHS",
-        
-        # Standard SDS Section Headers
-        "Product Identification", "Hazard Identification", "Composition",
-        "First Aid Measures", "Fire Fighting Measures", "Accidental Release",
-        "Handling and Storage", "Exposure Controls", "Physical and Chemical Properties",
-        "Stability and Reactivity", "Toxicological Information", "Ecological Information",
-        "Disposal Considerations", "Transport Information", "Regulatory Information",
-        
-        # Format Indicators
-        "UN Number", "CAS Number", "Dangerous Goods", "Hazard Class",
-        "Packing Group", "Signal Word", "Hazard Statement", "Precautionary Statement",
-        
-        # Section numbering (SDS documents have numbered sections 1-16)
-        "Section 1", "Section 2", "Section 3", "Section 4", "Section 5"
-    ]
+    keywords = keywords or SDS_KEYWORDS
     
     try:
-        # Use streaming and size limits to prevent massive downloads
-        response = requests.get(url, timeout=30, stream=True)
-        response.raise_for_status()
-        
-        # Check content-type header first
-        content_type = response.headers.get('content-type', '').lower()
-        if 'pdf' not in content_type:
-            print(f"[verify_pdf_sds] Not a PDF: {content_type}")
-            return False
-        
-        # Limit download size to 50MB max
-        max_size = 50 * 1024 * 1024  # 50MB
-        content = BytesIO()
-        size = 0
-        
-        print(f"[verify_pdf_sds] Starting PDF download with {max_size // (1024*1024)}MB limit...")
-        
-        for chunk in response.iter_content(chunk_size=8192):
-            size += len(chunk)
-            if size > max_size:
-                print(f"[verify_pdf_sds] PDF too large: {size} bytes")
+        # Pooled, retried download with the shared size cap and PDF check;
+        # the body spills to disk past SPOOL_MAX_MB instead of living in a BytesIO
+        with spooled_buffer() as content:
+            try:
+                result = downloader.fetch(url, content)
+            except DownloadRejected as e:
+                print(f"[verify_pdf_sds] Rejected: {e}")
                 return False
-            content.write(chunk)
-            
-            # Log progress every 5MB
-            if size % (5 * 1024 * 1024) == 0:
-                print(f"[verify_pdf_sds] Downloaded {size // (1024*1024)}MB...")
-        
-        print(f"[verify_pdf_sds] Download complete: {size} bytes")
-        content.seek(0)
-        
-        # Extract text with timeout protection - check more pages for better coverage
-        print(f"[verify_pdf_sds] Extracting text from PDF (max 10 pages)...")
-        text = extract_text(content, maxpages=10).lower()  # Increased from 5 to 10 pages
-        print(f"[verify_pdf_sds] Extracted {len(text)} characters of text")
+            print(f"[verify_pdf_sds] Download complete: {result.size} bytes in {result.seconds:.2f}s")
+
+            with budget.reserve(pdf_footprint(result.size), label="verify-sds"):
+                content.seek(0)
+                # Extract text with timeout protection - check more pages for better coverage
+                print(f"[verify_pdf_sds] Extracting text from PDF (max 10 pages)...")
+                text = extract_text(content, maxpages=10).lower()  # Increased from 5 to 10 pages
+                print(f"[verify_pdf_sds] Extracted {len(text)} characters of text")
         
         # Score-based keyword matching - no product name requirement
         print(f"[verify_pdf_sds] Checking for SDS keywords in extracted text...")
-        keyword_matches = sum(1 for kw in keywords if kw.lower() in text)
+        matched_keywords = score_sds_text(text, keywords)
+        keyword_matches = len(matched_keywords)
         
         print(f"[verify_pdf_sds] Found keyword matches: {keyword_matches}/{len(keywords)}")
-        
-        # Log some of the matched keywords for debugging
-        matched_keywords = [kw for kw in keywords if kw.lower() in text]
         print(f"[verify_pdf_sds] Matched keywords: {matched_keywords[:10]}...")  # Show first 10
         
-        # Require at least 2 keyword matches to be considered a valid SDS
-        # This is much more reliable than product name matching
-        is_valid_sds = keyword_matches >= 2
+        is_valid_sds = keyword_matches >= MIN_KEYWORD_MATCHES
         
         print(f"[verify_pdf_sds] URL: {url[:100]}... Keyword matches: {keyword_matches}//{len(keywords)} - Valid SDS: {is_valid_sds}")
         return is_valid_sds
         
+    except BudgetExceeded:
+        raise
     except Exception as e:
         print(f"[verify_pdf_sds] Failed to verify {url}: {type(e).__name__}: {e}")
         import traceback
@@ -402,6 +545,7 @@ def verify_pdf_sds(url: str, product_name: str, keywords=None) -> bool:
 
 
 @app.route('/verify-sds', methods=['POST'])
+@profiled
 def verify_sds():
     data = request.json or {}
     url = data.get('url', '')
@@ -417,19 +561,36 @@ def verify_sds():
     try:
         print(f"[verify-sds] Starting verification with 120s timeout...")
         # Use cross-platform timeout protection
-        verified = run_with_timeout(verify_pdf_sds, args=(url, name), timeout=120)
-        print(f"[verify-sds] Verification complete: {verified}")
+        verified, shared = inflight.do(('verify-sds', normalise_url(url)),
+                                       lambda: run_with_timeout(verify_pdf_sds, args=(url, name), timeout=120),
+                                       timeout=130)
+        print(f"[verify-sds] Verification complete: {verified}{' (shared)' if shared else ''}")
         return jsonify({'verified': verified}), 200
         
     except TimeoutError:
         print(f"[verify-sds] Verification timeout after 120s")
         return jsonify({'error': 'Verification timeout - PDF too large or slow to process'}), 408
+    except BudgetExceeded as e:
+        print(f"[verify-sds] Rejected by memory budget: {e}")
+        return jsonify({'error': f'Server busy: {e}'}), 503
+    except CoalesceTimeout as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         print(f"[verify-sds] Verification exception: {type(e).__name__}: {e}")
         import traceback
         print(f"[verify-sds] Exception traceback: {traceback.format_exc()}")
         return jsonify({'error': f'Verification failed: {str(e)}'}), 500
 
+def requested_fields(data: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+    """The ``fields`` a parse request asks for (list or comma-separated
+    string), or None for a full parse. Raises ValueError for unknown names.
+    """
+    fields = data.get("fields")
+    if not fields or resolve_fields is None:
+        return None
+    return resolve_fields(fields)
+
+
 # -----------------------------------------------------------------------------
 # NEW: Parse SDS over HTTP (reuses parse_sds.parse_sds_pdf)
 # -----------------------------------------------------------------------------
@@ -437,10 +598,15 @@ def verify_sds():
 # NEW: Parse SDS over HTTP (reuses parse_sds.parse_sds_pdf)
 # -------------------------------------------------------------------------
 @app.route('/parse-sds', methods=['POST'])
+@profiled
 def parse_sds_http():
     """
-    Body: { "product_id": 123, "pdf_url": "https://..." }
-    Returns: Parsed fields suitable for upsert into sds_metadata.
+    Body: { "product_id": 123, "pdf_url": "https://...", "validators": {...},
+            "fields": ["section14"] }
+    Returns: Parsed fields suitable for upsert into sds_metadata, or
+    ``status: "unchanged"`` when the stored validators show nothing changed.
+    With ``fields``, only those are extracted and the response has
+    ``status: "partial"`` and ``skipped_fields``; it is not a full record.
     """
     print(f"[parse-sds] HTTP endpoint called")
     
@@ -460,11 +626,25 @@ def parse_sds_http():
     if not product_id or not pdf_url:
         print(f"[parse-sds] Missing required parameters: product_id={bool(product_id)}, pdf_url={bool(pdf_url)}")
         return jsonify({"error": "Missing product_id or pdf_url"}), 400
+    try:
+        fields = requested_fields(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         print(f"[parse-sds] Starting SDS parsing...")
-        parsed = parse_sds_pdf(pdf_url, product_id=int(product_id))
-        print(f"[parse-sds] Parsing complete")
+        def run():
+            # PDF size isn't known until parse_sds downloads it; reserve the default
+            with budget.reserve(pdf_footprint(None), label="parse-sds"):
+                return parse_sds_pdf(pdf_url, product_id=int(product_id), previous=data.get("validators"),
+                                     fields=fields)
+
+        key = ('parse-sds', normalise_url(pdf_url), json.dumps(data.get("validators"), sort_keys=True), fields)
+        parsed, shared = inflight.do(key, run)
+        if shared:
+            # another product with the same SDS URL did the work
+            parsed = dict(parsed, product_id=int(product_id))
+        print(f"[parse-sds] Parsing complete{' (shared)' if shared else ''}")
 
         def _get(attr, default=None):
             if hasattr(parsed, attr):
@@ -473,8 +653,16 @@ def parse_sds_http():
                 return parsed.get(attr, default)
             return default
 
-        return jsonify({
+        if _get("status") == "unchanged":
+            return jsonify({
+                "product_id": _get("product_id", int(product_id)),
+                "status": "unchanged",
+                "validators": _get("validators"),
+            }), 200
+
+        response = {
             "product_id": _get("product_id", int(product_id)),
+            "product_name": _get("product_name"),
             "vendor": _get("vendor"),
             "issue_date": _get("issue_date"),
             "hazardous_substance": _get("hazardous_substance"),
@@ -484,8 +672,18 @@ def parse_sds_http():
             "subsidiary_risks": _get("subsidiary_risks"),
             "hazard_statements": _get("hazard_statements", []),
             "raw_json": _get("raw_json"),
-        }), 200
-
+            "status": _get("status", "changed"),
+            "validators": _get("validators"),
+        }
+        if _get("skipped_fields"):
+            response["skipped_fields"] = _get("skipped_fields")
+        return jsonify(response), 200
+
+    except BudgetExceeded as e:
+        print(f"[parse-sds] Rejected by memory budget: {e}")
+        return jsonify({"error": f"Server busy: {e}"}), 503
+    except CoalesceTimeout as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         print(f"[parse-sds] Parsing failed: {type(e).__name__}: {e}")
         import traceback
@@ -493,15 +691,145 @@ def parse_sds_http():
         return jsonify({"error": f"parse_sds failed: {e}"}), 500
 
 
+# -----------------------------------------------------------------------------
+# Fused verify + parse: one download and one text extraction per PDF
+# -----------------------------------------------------------------------------
+def verify_and_parse_sds_pdf(pdf_url: str, product_id: int,
+                             previous: Optional[Dict[str, Any]] = None,
+                             fields: Optional[Tuple[str, ...]] = None,
+                             deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Verify that ``pdf_url`` is an SDS and, if it is, parse it.
+
+    The PDF is downloaded once (honouring stored ``previous`` validators like
+    /parse-sds) and its text is extracted once with PyMuPDF; the keyword
+    score is taken over that text and the same text is handed to the parser.
+    Parsing is skipped when verification fails. ``fields`` limits parsing
+    as for /parse-sds; verification reads the whole text layer, but a scanned
+    PDF is abandoned once ``VERIFY_OCR_PAGES`` OCR pages have too few keywords.
+
+    ``deadline`` is a ``time.monotonic()`` value checked after the download
+    and between OCR batches; past it, ``TimeoutError`` is raised. Unlike
+    ``run_with_timeout`` this works outside the main thread.
+    """
+    def check_deadline():
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError("Verify-and-parse deadline exceeded")
+
+    def scan_stop(pages: List[str]) -> bool:
+        check_deadline()
+        return len(pages) >= VERIFY_OCR_PAGES and not enough_sds_keywords(pages)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_file, validators = download_pdf(pdf_url, Path(temp_dir), previous)
+        unchanged = is_unchanged(previous, validators)
+        validators.pop('not_modified', None)
+        download_rejected = validators.pop('rejected', None)
+        if unchanged:
+            # nothing to re-verify: the stored result came from these bytes
+            return {'product_id': product_id, 'status': 'unchanged', 'verified': None, 'validators': validators}
+
+        def rejected(reason: str, matched: Optional[List[str]] = None) -> Dict[str, Any]:
+            print(f"[verify-parse-sds] Not an SDS ({reason}): {pdf_url[:100]}")
+            return {
+                'product_id': product_id,
+                'status': 'not_sds',
+                'verified': False,
+                'verification': {'score': len(matched or []), 'min_score': MIN_KEYWORD_MATCHES,
+                                 'matched_keywords': matched or [], 'reason': reason},
+                'validators': validators,
+            }
+
+        # the downloader enforces the size cap and checks the PDF header
+        if download_rejected:
+            return rejected(download_rejected)
+        if not pdf_file:
+            raise Exception("Failed to download PDF")
+        check_deadline()
+
+        with budget.reserve(pdf_footprint(pdf_file.stat().st_size), label="verify-parse-sds"):
+            try:
+                pages = extract_sds_pages(pdf_file, scan_stop=scan_stop)
+                text = "".join(pages)
+            except TimeoutError:
+                raise
+            except Exception as e:
+                return rejected(f"text extraction failed: {e}")
+            matched = score_sds_text(text)
+            if len(matched) < MIN_KEYWORD_MATCHES:
+                return rejected("too few SDS keywords", matched)
+            print(f"[verify-parse-sds] Verified with {len(matched)} keyword matches, parsing...")
+            parsed = parse_pdf_direct(pdf_file, text=text, pages=pages, fields=fields)
+
+    result = attach_status(transform_to_chemfetch_format(parsed, product_id), validators)
+    result.update({
+        'verified': True,
+        'verification': {'score': len(matched), 'min_score': MIN_KEYWORD_MATCHES, 'matched_keywords': matched},
+    })
+    return result
+
+
+@app.route('/verify-parse-sds', methods=['POST'])
+@profiled
+def verify_parse_sds_http():
+    """
+    Body: { "product_id": 123, "pdf_url": "https://...", "validators": {...},
+            "fields": [...] }
+    Returns: ``verified`` and ``verification`` (keyword score) plus, for a
+    verified SDS, the same sds_metadata fields as /parse-sds.
+    """
+    if parse_sds_pdf is None or parse_pdf_direct is None:
+        err = globals().get('_import_err') or globals().get('_direct_import_err') or "Unknown import error"
+        return jsonify({"error": f"SDS parser could not be imported: {err}"}), 500
+
+    data = request.json or {}
+    product_id = data.get("product_id")
+    pdf_url = data.get("pdf_url") or data.get("url")
+
+    print(f"[verify-parse-sds] Product ID: {product_id}, PDF URL: {pdf_url}")
+    if not product_id or not pdf_url:
+        return jsonify({"error": "Missing product_id or pdf_url"}), 400
+    try:
+        fields = requested_fields(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        key = ('verify-parse-sds', normalise_url(pdf_url), json.dumps(data.get("validators"), sort_keys=True), fields)
+        # request threads can't use SIGALRM; the downloader's timeouts and a
+        # deadline checked between OCR batches bound the work instead
+        result, shared = inflight.do(
+            key,
+            lambda: verify_and_parse_sds_pdf(pdf_url, int(product_id), data.get("validators"), fields,
+                                             deadline=time.monotonic() + VERIFY_PARSE_TIMEOUT),
+            timeout=VERIFY_PARSE_TIMEOUT + 10)
+        if shared:
+            result = dict(result, product_id=int(product_id))
+        return jsonify(result), 200
+    except TimeoutError:
+        return jsonify({'error': 'Verify-and-parse timeout - PDF too large or slow to process'}), 408
+    except CoalesceTimeout as e:
+        return jsonify({'error': str(e)}), 504
+    except BudgetExceeded as e:
+        print(f"[verify-parse-sds] Rejected by memory budget: {e}")
+        return jsonify({"error": f"Server busy: {e}"}), 503
+    except Exception as e:
+        print(f"[verify-parse-sds] Failed: {type(e).__name__}: {e}")
+        import traceback
+        print(f"[verify-parse-sds] Exception traceback: {traceback.format_exc()}")
+        return jsonify({"error": f"verify-and-parse failed: {e}"}), 500
+
+
 # -----------------------------------------------------------------------------
 # NEW: Direct PDF Parsing Endpoint (using improved parser)
 # -----------------------------------------------------------------------------
 @app.route('/parse-pdf-direct', methods=['POST'])
+@profiled
 def parse_pdf_direct_http():
     """
     Parse PDF directly using the improved parser.
-    Body: { "pdf_url": "https://...", "product_id": 123 }
-    Returns: Raw parsed fields from the improved parser.
+    Body: { "pdf_url": "https://...", "product_id": 123, "fields": [...] }
+    Returns: Raw parsed fields from the improved parser; with ``fields``,
+    only those, plus ``skipped_fields``.
     """
     if parse_pdf_direct is None:
         err_msg = f"parse_pdf_direct could not be imported: {_direct_import_err}" if '_direct_import_err' in globals() else "Direct parser not available"
@@ -513,44 +841,93 @@ def parse_pdf_direct_http():
 
     if not pdf_url:
         return jsonify({"error": "Missing pdf_url"}), 400
-
     try:
+        fields = requested_fields(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def run():
         # Download PDF to temporary file
-        import tempfile
-        import os
-        from pathlib import Path
-        
         with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-            response = requests.get(pdf_url, timeout=30, stream=True)
-            response.raise_for_status()
-            
-            for chunk in response.iter_content(chunk_size=8192):
-                tmp_file.write(chunk)
-            
             tmp_path = Path(tmp_file.name)
+            try:
+                downloader.fetch(pdf_url, tmp_file)
+            except BaseException:
+                tmp_file.close()
+                os.unlink(tmp_path)
+                raise
         
         try:
             # Parse using the new parser
-            parsed_result = parse_pdf_direct(tmp_path)
-            
+            with budget.reserve(pdf_footprint(tmp_path.stat().st_size), label="parse-pdf-direct"):
+                return parse_pdf_direct(tmp_path, fields=fields)
+        finally:
             # Clean up temporary file
-            os.unlink(tmp_path)
-            
-            return jsonify({
-                "success": True,
-                "product_id": product_id,
-                "parsed_data": parsed_result
-            }), 200
-            
-        except Exception as parse_error:
-            # Clean up temporary file on error
             if tmp_path.exists():
                 os.unlink(tmp_path)
-            raise parse_error
+
+    try:
+        parsed_result, shared = inflight.do(('parse-pdf-direct', normalise_url(pdf_url), fields), run)
+        return jsonify({
+            "success": True,
+            "product_id": product_id,
+            "parsed_data": parsed_result
+        }), 200
             
+    except BudgetExceeded as e:
+        return jsonify({"error": f"Server busy: {e}"}), 503
+    except CoalesceTimeout as e:
+        return jsonify({"error": str(e)}), 504
+    except DownloadRejected as e:
+        return jsonify({"error": f"PDF rejected: {e}"}), 422
     except Exception as e:
         return jsonify({"error": f"PDF parsing failed: {e}"}), 500
 
 
+# -----------------------------------------------------------------------------
+# Metrics: memory budget, request coalescing, PDF downloads and scanned-PDF
+# OCR backends
+# -----------------------------------------------------------------------------
+@app.route('/metrics/memory')
+def memory_metrics():
+    return jsonify(budget.stats())
+
+
+@app.route('/metrics/coalescing')
+def coalescing_metrics():
+    return jsonify(inflight.stats())
+
+
+@app.route('/metrics/downloads')
+def download_metrics():
+    return jsonify(downloader.stats())
+
+
+@app.route('/metrics/ocr-backends')
+def ocr_backend_metrics():
+    if backend_stats is None:
+        return jsonify({"error": "SDS parser not available"}), 500
+    return jsonify(backend_stats())
+
+
+
+# -----------------------------------------------------------------------------
+# Stored profiles (admin token required)
+# -----------------------------------------------------------------------------
+@app.route('/debug/profiles')
+def list_profiles():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    files = sorted(PROFILE_DIR.glob('*'), key=lambda p: p.stat().st_mtime, reverse=True) if PROFILE_DIR.exists() else []
+    return jsonify([{"file": p.name, "bytes": p.stat().st_size} for p in files])
+
+
+@app.route('/debug/profiles/<path:name>')
+def get_profile(name):
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return send_from_directory(PROFILE_DIR.resolve(), name, as_attachment=True)
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=False)
\ No newline at end of file
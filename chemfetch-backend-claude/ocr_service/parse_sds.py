@@ -8,60 +8,116 @@ import sys
 import json
 import argparse
 import tempfile
-import requests
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Tuple
 import logging
 
 # Import the new SDS extractor
-from sds_parser_new.sds_extractor import parse_pdf
+from sds_parser_new.sds_extractor import parse_pdf, parser_version
+from pdf_downloader import DownloadRejected, downloader
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
-def download_pdf(url: str, temp_dir: Path) -> Optional[Path]:
-    """Download PDF from URL to temporary file."""
+def conditional_headers(previous: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Build If-None-Match/If-Modified-Since headers from stored validators.
+
+    Conditional requests are only worthwhile when the stored result was
+    produced by the current parser; otherwise the body is needed regardless.
+    """
+    if not previous or previous.get('parser_version') != parser_version():
+        return {}
+    headers = {}
+    if previous.get('etag'):
+        headers['If-None-Match'] = previous['etag']
+    if previous.get('last_modified'):
+        headers['If-Modified-Since'] = previous['last_modified']
+    return headers
+
+
+def download_pdf(url: str, temp_dir: Path,
+                 previous: Optional[Dict[str, Any]] = None) -> Tuple[Optional[Path], Dict[str, Any]]:
+    """Download PDF from URL to temporary file.
+
+    Returns the file path (``None`` on failure or ``304 Not Modified``) and the
+    validators observed for this fetch: ETag, Last-Modified and the SHA-256 of
+    the body. A body refused by the size cap or PDF check is also ``None``,
+    with the reason under ``rejected``.
+    """
+    validators: Dict[str, Any] = {
+        'etag': None,
+        'last_modified': None,
+        'content_hash': None,
+        'parser_version': parser_version(),
+        'not_modified': False,
+    }
     try:
         logger.info(f"[PARSE_SDS] Starting PDF download from: {url}")
-        logger.info(f"[PARSE_SDS] Download timeout: 30 seconds")
         logger.info(f"[PARSE_SDS] Temp directory: {temp_dir}")
-        
-        response = requests.get(url, timeout=30, stream=True)
-        logger.info(f"[PARSE_SDS] HTTP response status: {response.status_code}")
-        response.raise_for_status()
-        
-        # Check content type
-        content_type = response.headers.get('content-type', '').lower()
-        content_length = response.headers.get('content-length', 'unknown')
-        logger.info(f"[PARSE_SDS] Content type: {content_type}")
-        logger.info(f"[PARSE_SDS] Content length: {content_length} bytes")
-        
-        if 'pdf' not in content_type:
-            logger.warning(f"[PARSE_SDS] Content type is not PDF: {content_type}")
-        
-        # Save to temporary file
+
+        headers = conditional_headers(previous)
+        if headers:
+            logger.info(f"[PARSE_SDS] Conditional request headers: {headers}")
+
         temp_file = temp_dir / f"sds_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         logger.info(f"[PARSE_SDS] Saving to temp file: {temp_file}")
-        
-        downloaded_bytes = 0
         with open(temp_file, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                downloaded_bytes += len(chunk)
-                if downloaded_bytes % (1024 * 1024) == 0:  # Log every MB
-                    logger.info(f"[PARSE_SDS] Downloaded {downloaded_bytes // (1024 * 1024)}MB...")
-        
-        logger.info(f"[PARSE_SDS] Download complete: {temp_file} ({downloaded_bytes} bytes)")
-        return temp_file
-        
+            result = downloader.fetch(url, f, headers=headers)
+        logger.info(f"[PARSE_SDS] HTTP response status: {result.status} "
+                    f"(first byte {result.ttfb * 1000:.0f}ms, attempts {result.attempts})")
+
+        if result.not_modified:
+            logger.info(f"[PARSE_SDS] Server reports PDF not modified")
+            validators.update({
+                'etag': result.headers.get('etag') or previous.get('etag'),
+                'last_modified': result.headers.get('last-modified') or previous.get('last_modified'),
+                'content_hash': previous.get('content_hash'),
+                'not_modified': True,
+            })
+            return None, validators
+
+        validators['etag'] = result.headers.get('etag')
+        validators['last_modified'] = result.headers.get('last-modified')
+        validators['content_hash'] = result.content_hash
+        logger.info(f"[PARSE_SDS] Content type: {result.headers.get('content-type', '').lower()}")
+        logger.info(f"[PARSE_SDS] Download complete: {temp_file} ({result.size} bytes in {result.seconds:.2f}s)")
+        return temp_file, validators
+
+    except DownloadRejected as e:
+        # transient marker like not_modified; callers pop it before storing validators
+        logger.warning(f"[PARSE_SDS] Download rejected: {e}")
+        validators['rejected'] = str(e)
+        return None, validators
     except Exception as e:
         logger.error(f"[PARSE_SDS] Failed to download PDF: {type(e).__name__}: {e}")
         import traceback
         logger.error(f"[PARSE_SDS] Download traceback: {traceback.format_exc()}")
-        return None
+        return None, validators
+
+
+def is_unchanged(previous: Optional[Dict[str, Any]], validators: Dict[str, Any]) -> bool:
+    """True when neither the PDF bytes nor the parser changed since ``previous``."""
+    if not previous or previous.get('parser_version') != parser_version():
+        return False
+    if validators.get('not_modified'):
+        return True
+    return bool(validators.get('content_hash')) and validators['content_hash'] == previous.get('content_hash')
+
+
+# chemfetch fields and the parser field each one is derived from
+DERIVED_FROM = {
+    'product_name': 'product_name',
+    'vendor': 'manufacturer',
+    'issue_date': 'issue_date',
+    'hazardous_substance': 'dangerous_goods_class',
+    'dangerous_good': 'dangerous_goods_class',
+    'dangerous_goods_class': 'dangerous_goods_class',
+    'packing_group': 'packing_group',
+    'subsidiary_risks': 'subsidiary_risk',
+}
 
 
 def transform_to_chemfetch_format(parsed_data: Dict[str, Any], product_id: int) -> Dict[str, Any]:
@@ -109,20 +165,48 @@ def transform_to_chemfetch_format(parsed_data: Dict[str, Any], product_id: int)
         'hazard_statements': [],  # Not extracted by current parser
         'raw_json': parsed_data
     }
+    skipped = parsed_data.get('skipped_fields')
+    if skipped:
+        # field-selective parse: a skipped field is unknown, not "no" or empty
+        for key, source in DERIVED_FROM.items():
+            if source in skipped:
+                result[key] = None
+        result['skipped_fields'] = skipped
     
     return result
 
 
-def parse_sds_pdf(pdf_url: str, product_id: int) -> Dict[str, Any]:
+def attach_status(result: Dict[str, Any], validators: Dict[str, Any]) -> Dict[str, Any]:
+    """Mark a transformed result ``changed`` or ``partial`` and attach validators.
+
+    A partial result gets ``validators: None``: stored and replayed, its
+    validators would make the next full parse report ``unchanged`` and the
+    skipped fields would never be filled in.
+    """
+    partial = bool(result.get('skipped_fields'))
+    result['status'] = 'partial' if partial else 'changed'
+    result['validators'] = None if partial else validators
+    return result
+
+
+def parse_sds_pdf(pdf_url: str, product_id: int,
+                  previous: Optional[Dict[str, Any]] = None,
+                  fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
     """
     Main function to parse SDS PDF from URL.
     
     Args:
         pdf_url: URL of the PDF to parse
         product_id: ID of the product in the database
+        previous: Validators stored from the last parse (etag, last_modified,
+            content_hash, parser_version); enables conditional revalidation
+        fields: Only extract these fields (see ``resolve_fields``); the result
+            then has ``status: "partial"``, lists ``skipped_fields`` (reported
+            as None) and carries no validators
         
     Returns:
-        Dictionary with parsed SDS data in chemfetch format
+        Dictionary with parsed SDS data in chemfetch format, or a short
+        ``status: "unchanged"`` record when the PDF and parser are unchanged
     """
     
     logger.info(f"[PARSE_SDS] Starting SDS parsing for product {product_id}")
@@ -134,9 +218,15 @@ def parse_sds_pdf(pdf_url: str, product_id: int) -> Dict[str, Any]:
         
         # Download PDF
         logger.info(f"[PARSE_SDS] Step 1: Downloading PDF...")
-        pdf_file = download_pdf(pdf_url, temp_path)
+        pdf_file, validators = download_pdf(pdf_url, temp_path, previous)
+        unchanged = is_unchanged(previous, validators)
+        validators.pop('not_modified', None)
+        rejected = validators.pop('rejected', None)
+        if unchanged:
+            logger.info(f"[PARSE_SDS] PDF and parser unchanged for product {product_id}, skipping parse")
+            return {'product_id': product_id, 'status': 'unchanged', 'validators': validators}
         if not pdf_file:
-            raise Exception("Failed to download PDF")
+            raise Exception(f"Failed to download PDF: {rejected}" if rejected else "Failed to download PDF")
         
         logger.info(f"[PARSE_SDS] Step 2: PDF downloaded successfully: {pdf_file}")
         logger.info(f"[PARSE_SDS] File size: {pdf_file.stat().st_size} bytes")
@@ -144,7 +234,7 @@ def parse_sds_pdf(pdf_url: str, product_id: int) -> Dict[str, Any]:
         # Parse PDF
         logger.info(f"[PARSE_SDS] Step 3: Starting PDF parsing...")
         try:
-            parsed_data = parse_pdf(pdf_file)
+            parsed_data = parse_pdf(pdf_file, fields=fields)
             logger.info(f"[PARSE_SDS] Step 3 complete: PDF parsing successful")
             logger.info(f"[PARSE_SDS] Parsed data keys: {list(parsed_data.keys()) if isinstance(parsed_data, dict) else 'Non-dict result'}")
         except Exception as e:
@@ -156,7 +246,7 @@ def parse_sds_pdf(pdf_url: str, product_id: int) -> Dict[str, Any]:
         # Transform to chemfetch format
         logger.info(f"[PARSE_SDS] Step 4: Transforming to chemfetch format...")
         try:
-            result = transform_to_chemfetch_format(parsed_data, product_id)
+            result = attach_status(transform_to_chemfetch_format(parsed_data, product_id), validators)
             logger.info(f"[PARSE_SDS] Step 4 complete: Transformation successful")
             logger.info(f"[PARSE_SDS] Result keys: {list(result.keys())}")
         except Exception as e:
@@ -175,6 +265,11 @@ def main():
     parser.add_argument('--product-id', type=int, required=True, help='Product ID')
     parser.add_argument('--url', required=True, help='PDF URL')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose logging')
+    parser.add_argument('--etag', help='ETag stored from the previous parse')
+    parser.add_argument('--last-modified', help='Last-Modified stored from the previous parse')
+    parser.add_argument('--content-hash', help='SHA-256 of the previously parsed PDF')
+    parser.add_argument('--parser-version', help='Parser version that produced the stored result')
+    parser.add_argument('--fields', help='Comma-separated fields or groups to extract (default: all)')
     
     args = parser.parse_args()
     
@@ -190,7 +285,15 @@ def main():
         start_time = datetime.now()
         logger.info(f"[PARSE_SDS] Starting parse at: {start_time.isoformat()}")
         
-        result = parse_sds_pdf(args.url, args.product_id)
+        previous = {
+            'etag': args.etag,
+            'last_modified': args.last_modified,
+            'content_hash': args.content_hash,
+            'parser_version': args.parser_version,
+        }
+        result = parse_sds_pdf(args.url, args.product_id,
+                               previous=previous if args.parser_version else None,
+                               fields=args.fields)
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
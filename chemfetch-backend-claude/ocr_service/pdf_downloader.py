@@ -0,0 +1,240 @@
+"""
+Shared HTTP client for every PDF download.
+
+/verify-sds, /parse-sds, /verify-parse-sds and /parse-pdf-direct all fetch
+through the one ``downloader``. Its keep-alive ``requests.Session`` keeps
+pooled connections per host, so the few vendor domains most SDSs come from
+pay for a TLS handshake once per connection instead of once per file. At
+most ``DOWNLOAD_PER_HOST`` fetches run against one host at a time.
+
+Connection errors, timeouts and 429/5xx responses are retried with
+exponential backoff (or the server's Retry-After). Bodies are requested
+compressed and read in chunks that grow from 64KB to 1MB. Every body is
+capped at ``DOWNLOAD_MAX_MB`` after decoding and must have ``%PDF`` in its
+first 1KB (readers accept junk before the header), whatever its Content-Type
+says. Bytes, time to first byte and failures are
+counted per host.
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Mapping, Optional
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+try:
+    # gzip/deflate, plus br/zstd when their decoders are installed
+    from urllib3.util.request import ACCEPT_ENCODING
+except ImportError:
+    ACCEPT_ENCODING = "gzip,deflate"
+
+MB = 1024 * 1024
+
+MAX_BYTES = int(float(os.getenv("DOWNLOAD_MAX_MB", "50")) * MB)
+PER_HOST = int(os.getenv("DOWNLOAD_PER_HOST", "4"))
+POOL_HOSTS = int(os.getenv("DOWNLOAD_POOL_HOSTS", "16"))
+RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "2"))
+BACKOFF_SECONDS = float(os.getenv("DOWNLOAD_BACKOFF_SECONDS", "0.5"))
+CONNECT_TIMEOUT = float(os.getenv("DOWNLOAD_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("DOWNLOAD_READ_TIMEOUT", "30"))
+
+CHUNK_MIN = 64 * 1024
+CHUNK_MAX = 1 * MB
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    urllib3.exceptions.ProtocolError,
+    urllib3.exceptions.ReadTimeoutError,
+)
+MAX_RETRY_AFTER = 10.0
+# vendors often mislabel the content type, so the body itself is checked
+PDF_MAGIC = b'%PDF'
+MAGIC_WINDOW = 1024
+
+
+class DownloadRejected(Exception):
+    """Raised for a body that is too large or not a PDF; never retried."""
+
+
+class Download:
+    """Outcome of one fetch. The body has already been written to the sink."""
+
+    __slots__ = ('url', 'status', 'headers', 'size', 'content_hash', 'ttfb', 'seconds', 'attempts')
+
+    def __init__(self, url: str, status: int, headers: Mapping[str, str], size: int = 0,
+                 content_hash: Optional[str] = None, ttfb: float = 0.0, seconds: float = 0.0):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.size = size
+        self.content_hash = content_hash
+        self.ttfb = ttfb
+        self.seconds = seconds
+        self.attempts = 1
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or '').lower()
+
+
+def _retry_delay(attempt: int, response: Optional[requests.Response]) -> float:
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after), MAX_RETRY_AFTER)
+    return BACKOFF_SECONDS * (2 ** (attempt - 1)) * (1 + random.random() / 2)
+
+
+class Downloader:
+    def __init__(self, max_bytes: int = MAX_BYTES, per_host: int = PER_HOST, retries: int = RETRIES):
+        self.max_bytes = max_bytes
+        self.per_host = per_host
+        self.retries = retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=per_host)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/pdf,*/*;q=0.8',
+            'Accept-Encoding': ACCEPT_ENCODING,
+        })
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._active: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _count(self, host: str, **deltas: float) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(host, {
+                'requests': 0, 'ok': 0, 'not_modified': 0, 'rejected': 0, 'failed': 0, 'retries': 0,
+                'slot_waits': 0, 'bytes': 0, 'ttfb_ms_total': 0.0, 'ttfb_ms_max': 0.0, 'seconds': 0.0,
+            })
+            for stat, value in deltas.items():
+                if stat == 'ttfb_ms_max':
+                    counts[stat] = max(counts[stat], value)
+                else:
+                    counts[stat] += value
+
+    @contextmanager
+    def _host_slot(self, host: str) -> Iterator[None]:
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        if not slot.acquire(blocking=False):
+            self._count(host, slot_waits=1)
+            slot.acquire()
+        with self._lock:
+            self._active[host] = self._active.get(host, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active[host] -= 1
+            slot.release()
+
+    def fetch(self, url: str, sink: BinaryIO, headers: Optional[Dict[str, str]] = None,
+              max_bytes: Optional[int] = None) -> Download:
+        """Download ``url`` into ``sink``, retrying transient failures.
+
+        ``headers`` carries conditional-request validators; a 304 comes back
+        as a ``Download`` with ``not_modified`` set and nothing written.
+        Raises ``DownloadRejected`` for an oversized or non-PDF body and
+        ``requests`` exceptions once the retries are used up.
+        """
+        host = _host(url)
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with self._host_slot(host):
+                    result = self._fetch_once(url, host, sink, headers, limit)
+                result.attempts = attempt
+                return result
+            except DownloadRejected:
+                self._count(host, rejected=1)
+                raise
+            except (requests.HTTPError, *RETRY_ERRORS) as e:
+                response = getattr(e, 'response', None)
+                retryable = (response.status_code in RETRY_STATUSES if isinstance(e, requests.HTTPError)
+                             else True)
+                if not retryable or attempt > self.retries:
+                    self._count(host, failed=1)
+                    raise
+                delay = _retry_delay(attempt, response)
+                self._count(host, retries=1)
+                print(f"[download] {host}: {type(e).__name__}: {e}; retry {attempt}/{self.retries} in {delay:.1f}s")
+                time.sleep(delay)
+            except Exception:
+                self._count(host, failed=1)
+                raise
+
+    def _fetch_once(self, url: str, host: str, sink: BinaryIO, headers: Optional[Dict[str, str]],
+                    limit: int) -> Download:
+        start = time.perf_counter()
+        with self.session.get(url, headers=headers, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+            # stream=True returns once the status line and headers are in
+            ttfb = time.perf_counter() - start
+            self._count(host, requests=1, ttfb_ms_total=ttfb * 1000, ttfb_ms_max=ttfb * 1000)
+            if response.status_code == 304:
+                self._count(host, not_modified=1)
+                return Download(url, 304, response.headers, ttfb=ttfb, seconds=ttfb)
+            response.raise_for_status()
+
+            content_type = response.headers.get('content-type', '')
+            length = response.headers.get('content-length', '')
+            if length.isdigit() and 'content-encoding' not in response.headers and int(length) > limit:
+                raise DownloadRejected(f"PDF too large: Content-Length {length} bytes")
+
+            # a retried attempt starts the body over
+            sink.seek(0)
+            sink.truncate()
+            digest = hashlib.sha256()
+            size = 0
+            chunk = CHUNK_MIN
+            while True:
+                data = response.raw.read(chunk, decode_content=True)
+                if not data:
+                    break
+                if size == 0 and PDF_MAGIC not in data[:MAGIC_WINDOW]:
+                    raise DownloadRejected(f"not a PDF (Content-Type: {content_type or 'none'})")
+                size += len(data)
+                if size > limit:
+                    raise DownloadRejected(f"PDF too large: over {limit // MB}MB")
+                sink.write(data)
+                digest.update(data)
+                # full reads mean the data is arriving faster than we drain it
+                if len(data) >= chunk:
+                    chunk = min(chunk * 2, CHUNK_MAX)
+            if size == 0:
+                raise DownloadRejected("empty response")
+
+        seconds = time.perf_counter() - start
+        self._count(host, ok=1, bytes=size, seconds=seconds)
+        return Download(url, response.status_code, response.headers, size, digest.hexdigest(), ttfb, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hosts = {}
+            for host, counts in self._stats.items():
+                out: Dict[str, Any] = {k: round(v, 3) if isinstance(v, float) else v for k, v in counts.items()}
+                out['in_flight'] = self._active.get(host, 0)
+                out['ttfb_ms_avg'] = round(counts['ttfb_ms_total'] / counts['requests'], 1) if counts['requests'] else None
+                out['mb_per_s'] = round(counts['bytes'] / MB / counts['seconds'], 2) if counts['seconds'] else None
+                hosts[host] = out
+        return {'hosts': hosts, 'per_host_limit': self.per_host, 'max_bytes': self.max_bytes,
+                'retries': self.retries}
+
+
+downloader = Downloader()
@@ -0,0 +1,209 @@
+"""
+Opt-in profiling of individual requests and of the whole running service.
+
+A request to a ``@profiled`` route runs under a profiler when it carries
+``X-Profile: sample`` (or ``cprofile``) together with ``X-Admin-Token``
+matching ``PROFILE_ADMIN_TOKEN``; without the token configured the hook is
+off. ``sample`` polls the request thread's stack every few milliseconds and
+keeps collapsed stacks (``frame;frame;frame count``), which flamegraph.pl and
+speedscope read directly. ``cprofile`` records every call and is saved as a
+``.pstats`` file for snakeviz or flameprof. Either way the top functions are
+added to JSON responses under ``"profile"`` and the full output is written to
+``PROFILE_DIR``.
+
+``SIGUSR1`` samples every thread for ``PROFILE_SIGNAL_SECONDS`` and writes
+the collapsed stacks to the same directory.
+"""
+
+import cProfile
+import hmac
+import io
+import itertools
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from flask import json, make_response, request
+
+ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_MS", "5")) / 1000
+SIGNAL_SECONDS = float(os.getenv("PROFILE_SIGNAL_SECONDS", "30"))
+KEEP_FILES = int(os.getenv("PROFILE_KEEP", "50"))
+TOP_N = 25
+
+MODES = ('sample', 'cprofile')
+_ids = itertools.count(1)
+
+
+def frame_label(code) -> str:
+    # ';' separates frames in the collapsed format
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+class StackSampler:
+    """Polls thread stacks from a daemon thread and counts collapsed stacks."""
+
+    def __init__(self, thread_ids: Optional[List[int]] = None, interval: float = SAMPLE_INTERVAL):
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def ms_per_sample(self) -> float:
+        # waits overshoot the nominal interval, so use the measured rate
+        return self.seconds * 1000 / self.samples if self.samples else self.interval * 1000
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        started = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            self.seconds = time.perf_counter() - started
+            self.samples += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == own or (self.thread_ids is not None and tid not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+
+
+def collapsed_text(stacks: Counter) -> str:
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def top_from_samples(stacks: Counter, ms_per_sample: float, n: int = TOP_N) -> List[Dict[str, Any]]:
+    """Hottest functions by self time, estimated from sample counts."""
+    self_counts: Counter = Counter()
+    cum_counts: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            cum_counts[frame] += count
+    ranked = sorted(cum_counts, key=lambda fn: (self_counts[fn], cum_counts[fn]), reverse=True)[:n]
+    return [
+        {'function': fn, 'self_ms': round(self_counts[fn] * ms_per_sample, 1),
+         'cum_ms': round(cum_counts[fn] * ms_per_sample, 1)}
+        for fn in ranked
+    ]
+
+
+def top_from_cprofile(profiler: cProfile.Profile, n: int = TOP_N) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profiler, stream=io.StringIO()).stats  # type: ignore[attr-defined]
+    rows = sorted(stats.items(), key=lambda kv: (kv[1][2], kv[1][3]), reverse=True)[:n]
+    return [
+        {'function': f"{func} ({os.path.basename(file)}:{line})", 'calls': nc,
+         'self_ms': round(tt * 1000, 1), 'cum_ms': round(ct * 1000, 1)}
+        for (file, line, func), (cc, nc, tt, ct, callers) in rows
+    ]
+
+
+def _save(name: str, write) -> str:
+    PROFILE_DIR.mkdir(exist_ok=True)
+    write(PROFILE_DIR / name)
+    files = sorted(PROFILE_DIR.iterdir(), key=lambda p: p.stat().st_mtime)
+    for old in files[:max(0, len(files) - KEEP_FILES)]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+    return name
+
+
+def is_admin() -> bool:
+    """True when the request carries the configured admin token."""
+    # compare bytes: compare_digest rejects non-ASCII str
+    token = request.headers.get('X-Admin-Token', '').encode()
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN.encode())
+
+
+def requested_mode() -> Optional[str]:
+    """Profiling mode asked for by the current request, if it is authorised."""
+    mode = request.headers.get('X-Profile', '').strip().lower()
+    if not mode or not is_admin():
+        return None
+    return mode if mode in MODES else 'sample'
+
+
+def profiled(view):
+    """Run ``view`` under a profiler when the request opts in."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = requested_mode()
+        if mode is None:
+            return view(*args, **kwargs)
+
+        endpoint = request.path.strip('/').replace('/', '_') or 'root'
+        profile_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{next(_ids):04d}_{endpoint}"
+        start = time.perf_counter()
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                rv = view(*args, **kwargs)
+            finally:
+                profiler.disable()
+            top = top_from_cprofile(profiler)
+            output = _save(f"{profile_id}.pstats", lambda p: profiler.dump_stats(str(p)))
+        else:
+            sampler = StackSampler([threading.get_ident()]).start()
+            try:
+                rv = view(*args, **kwargs)
+            finally:
+                stacks = sampler.stop()
+            top = top_from_samples(stacks, sampler.ms_per_sample())
+            output = _save(f"{profile_id}.collapsed", lambda p: p.write_text(collapsed_text(stacks)))
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        print(f"[profile] {request.path} ({mode}) took {elapsed_ms}ms -> {PROFILE_DIR / output}")
+
+        resp = make_response(rv)
+        resp.headers['X-Profile-Id'] = output
+        body = resp.get_json(silent=True) if resp.is_json else None
+        if isinstance(body, dict):
+            body['profile'] = {'mode': mode, 'wall_ms': elapsed_ms, 'file': output, 'top': top}
+            resp.set_data(json.dumps(body))
+        return resp
+    return wrapper
+
+
+def sample_service(seconds: float = SIGNAL_SECONDS) -> None:
+    """Sample every thread for ``seconds`` and write the collapsed stacks."""
+    def run():
+        sampler = StackSampler().start()
+        time.sleep(seconds)
+        stacks = sampler.stop()
+        name = _save(f"{time.strftime('%Y%m%d_%H%M%S')}_service.collapsed",
+                     lambda p: p.write_text(collapsed_text(stacks)))
+        print(f"[profile] Service sample ({sampler.samples} samples over {seconds:.1f}s) -> {PROFILE_DIR / name}")
+
+    threading.Thread(target=run, name="service-profile", daemon=True).start()
+
+
+def install_signal_handler() -> bool:
+    """Start a service-wide sample on SIGUSR1 (Unix, main thread only)."""
+    if not hasattr(signal, 'SIGUSR1') or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signal.SIGUSR1, lambda signum, frame: sample_service())
+    return True
@@ -2,6 +2,11 @@
 Improved SDS Parser Module for ChemFetch
 """
 
-from .sds_extractor import parse_pdf, extract_text, get_section
+from .sds_extractor import parse_pdf, parse_text, extract_text, extract_pages, get_section, extract_issue_date, PARSER_VERSION, parser_version, ALL_FIELDS, resolve_fields
+from .ocr_backends import PaddleBackend, TesseractBackend, backend_stats, get_ocr_backend, set_ocr_backend
+from .text_store import TextStore, default_store
 
-__all__ = ['parse_pdf', 'extract_text', 'get_section']
+__all__ = ['parse_pdf', 'parse_text', 'extract_text', 'extract_pages', 'get_section', 'extract_issue_date', 'PARSER_VERSION', 'parser_version',
+           'ALL_FIELDS', 'resolve_fields',
+           'PaddleBackend', 'TesseractBackend', 'backend_stats', 'get_ocr_backend', 'set_ocr_backend',
+           'TextStore', 'default_store']
@@ -0,0 +1,133 @@
+"""
+OCR backends for scanned PDFs that have no text layer.
+
+``extract_text`` renders pages and hands them to the active backend. The
+standalone/CLI path keeps Tesseract; inside ``ocr_service`` the already
+loaded PaddleOCR model is installed with ``set_ocr_backend`` so scanned
+pages are recognised in batches without spawning a Tesseract process per
+page. Each backend records pages, time and a rough text-quality score.
+"""
+
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .ocr_layout import joined_text, postprocess_ocr
+
+# tokens that look like real words rather than OCR noise
+_WORD = re.compile(r'[A-Za-z]{2,}')
+_TOKEN = re.compile(r'\S+')
+
+
+def text_quality(text: str) -> float:
+    """Share of whitespace-separated tokens that contain a real word."""
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        return 0.0
+    return sum(1 for t in tokens if _WORD.search(t)) / len(tokens)
+
+
+class OcrBackend:
+    name = 'base'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'pages': 0, 'seconds': 0.0, 'chars': 0, 'quality_sum': 0.0}
+
+    def recognise(self, images: List) -> List[str]:
+        """Return one text string per PIL page image."""
+        start = time.perf_counter()
+        texts = self._recognise(images)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['pages'] += len(images)
+            self._stats['seconds'] += elapsed
+            self._stats['chars'] += sum(len(t) for t in texts)
+            self._stats['quality_sum'] += sum(text_quality(t) for t in texts)
+        return texts
+
+    def _recognise(self, images: List) -> List[str]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            s = dict(self._stats)
+        pages = s.pop('pages')
+        quality_sum = s.pop('quality_sum')
+        return dict(
+            s,
+            pages=pages,
+            seconds=round(s['seconds'], 3),
+            ms_per_page=round(s['seconds'] * 1000 / pages, 1) if pages else None,
+            mean_quality=round(quality_sum / pages, 3) if pages else None,
+        )
+
+
+class TesseractBackend(OcrBackend):
+    name = 'tesseract'
+
+    def _recognise(self, images: List) -> List[str]:
+        import pytesseract
+        return [pytesseract.image_to_string(img) for img in images]
+
+
+class PaddleBackend(OcrBackend):
+    """Batched recognition on a resident PaddleOCR model.
+
+    ``lock`` should be the same lock the service holds around its own calls
+    to ``model.predict``, since the predictor is not thread-safe.
+    """
+    name = 'paddle'
+
+    def __init__(self, model, lock: Optional[threading.Lock] = None, batch_size: int = 4):
+        super().__init__()
+        self.model = model
+        self.model_lock = lock or threading.Lock()
+        self.batch_size = max(1, batch_size)
+
+    def _recognise(self, images: List) -> List[str]:
+        texts: List[str] = []
+        for start in range(0, len(images), self.batch_size):
+            # PaddleOCR expects BGR arrays
+            batch = [np.asarray(img.convert('RGB'))[:, :, ::-1].copy()
+                     for img in images[start:start + self.batch_size]]
+            with self.model_lock:
+                results = self.model.predict(batch)
+            texts.extend(page_text(res) for res in results)
+        return texts
+
+
+def page_text(res) -> str:
+    """Text of one PaddleOCR page result, boxes grouped into visual lines
+    the same way the /ocr endpoint joins them."""
+    if not isinstance(res, dict):
+        return ''
+    texts = list(res.get('rec_texts', []))
+    boxes = res.get('rec_boxes', [])
+    if len(boxes) != len(texts):
+        return '\n'.join(texts)
+    return joined_text(postprocess_ocr(texts, res.get('rec_scores', [1.0] * len(texts)), boxes))
+
+
+_backends: Dict[str, OcrBackend] = {'tesseract': TesseractBackend()}
+_active = 'tesseract'
+
+
+def set_ocr_backend(backend: OcrBackend) -> None:
+    """Make ``backend`` the one ``extract_text`` uses for scanned pages."""
+    global _active
+    _backends[backend.name] = backend
+    _active = backend.name
+
+
+def get_ocr_backend() -> OcrBackend:
+    return _backends[_active]
+
+
+def backend_stats() -> Dict[str, Dict[str, float]]:
+    """Per-backend timings and text quality, plus which one is active."""
+    return {name: dict(b.stats(), active=name == _active) for name, b in _backends.items()}
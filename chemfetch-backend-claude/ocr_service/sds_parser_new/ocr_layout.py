@@ -0,0 +1,98 @@
+"""
+Reading order for OCR output.
+
+PaddleOCR returns one box per detected text fragment. These helpers filter
+the boxes, sort them top to bottom and left to right, and group them into
+visual lines, so both the /ocr endpoint and the scanned-PDF backend produce
+the same text for the same page.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+def normalise_boxes(boxes: Any) -> np.ndarray:
+    """Return OCR boxes as an ``(N, P, 2)`` float32 array of corner points.
+
+    PaddleOCR 3.x ``rec_boxes`` are ``(N, 4)`` ``[x0, y0, x1, y1]`` rectangles;
+    the legacy result format gives one polygon per line.
+    """
+    arr = np.asarray(boxes, dtype=np.float32)
+    if arr.size == 0:
+        return np.zeros((0, 4, 2), dtype=np.float32)
+    if arr.ndim == 2 and arr.shape[1] == 4:
+        x0, y0, x1, y1 = arr.T
+        return np.stack([
+            np.stack([x0, y0], axis=1), np.stack([x1, y0], axis=1),
+            np.stack([x1, y1], axis=1), np.stack([x0, y1], axis=1),
+        ], axis=1)
+    return arr.reshape(len(arr), -1, 2)
+
+
+def box_areas(pts: np.ndarray) -> np.ndarray:
+    """Polygon areas of ``(N, P, 2)`` boxes (shoelace formula)."""
+    x, y = pts[:, :, 0], pts[:, :, 1]
+    return 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1))
+
+
+def group_lines(pts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Reading order and line ids for ``(N, P, 2)`` boxes.
+
+    Boxes whose vertical centres are within half a median box height of the
+    previous one share a line; lines run top to bottom, boxes left to right.
+    """
+    if len(pts) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    xmin = pts[:, :, 0].min(axis=1)
+    ymin = pts[:, :, 1].min(axis=1)
+    ymax = pts[:, :, 1].max(axis=1)
+    yc = (ymin + ymax) / 2
+    tol = max(float(np.median(ymax - ymin)) * 0.5, 1.0)
+    by_y = np.argsort(yc, kind='stable')
+    line_ids = np.empty(len(pts), dtype=np.int64)
+    line_ids[by_y] = np.concatenate(([0], np.cumsum(np.diff(yc[by_y]) > tol)))
+    order = np.lexsort((xmin, line_ids))
+    return order, line_ids[order]
+
+
+def postprocess_ocr(texts: List[str], scores: Any, boxes: Any,
+                    min_confidence: float = 0.0, min_area: float = 0.0,
+                    group: bool = True) -> Dict[str, Any]:
+    """Filter OCR output by confidence and box area, then sort it into
+    reading order and group it into visual lines, all on NumPy arrays.
+
+    With ``group=False`` the boxes keep the order PaddleOCR returned them in
+    and each box is its own line.
+    """
+    pts = normalise_boxes(boxes)
+    conf = np.asarray(scores, dtype=np.float32).reshape(-1)
+    keep = (conf >= min_confidence) & (box_areas(pts) >= min_area)
+    idx = np.flatnonzero(keep)
+    if group:
+        order, line_ids = group_lines(pts[idx])
+        idx = idx[order]
+    else:
+        line_ids = np.arange(len(idx), dtype=np.int64)
+    source = np.asarray(boxes, dtype=np.float32)
+    return {
+        'texts': [texts[i] for i in idx],
+        'scores': conf[idx],
+        'boxes': pts[idx],
+        'source_boxes': source[idx] if len(source) else source,
+        'line_ids': line_ids,
+        'grouped': group,
+        'dropped': int(len(conf) - len(idx)),
+    }
+
+
+def joined_text(pp: Dict[str, Any]) -> str:
+    """Boxes on the same visual line joined by spaces, lines by newlines."""
+    out: List[str] = []
+    prev = None
+    for txt, line_id in zip(pp['texts'], pp['line_ids'].tolist()):
+        if prev is not None:
+            out.append(' ' if line_id == prev else '\n')
+        out.append(txt)
+        prev = line_id
+    return ''.join(out)
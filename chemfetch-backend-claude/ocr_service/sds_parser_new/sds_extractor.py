@@ -1,25 +1,67 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
 import re
+from datetime import date
 from pathlib import Path
-from typing import cast
+from typing import cast, Callable, Dict, Iterable, List, Optional, Tuple
 import fitz
 from pdf2image import convert_from_path
-import pytesseract
 import logging
 
+from .ocr_backends import get_ocr_backend
+from . import section14_table
+from .section14_table import clean_transport_value, extract_section14_table
+from .text_store import remember
+
+try:
+    from dateutil import parser as dateparser
+except Exception:  # pragma: no cover - optional fallback only
+    dateparser = None
+
 # Configure logging for this module
 logger = logging.getLogger(__name__)
 
 
 # detect section headers like "Section 3" or "14:" but avoid subpoints such as "1.1"
-SECTION_PATTERN = re.compile(r'^\s*(?:section\s*)?(\d{1,2})(?:\s|:|\.)(?=\s)', re.IGNORECASE | re.MULTILINE)
+# (leading whitespace excludes newlines: ``^\s*`` rescans every run of blank
+# lines from each line start, which is quadratic in the run length)
+SECTION_PATTERN = re.compile(r'^[^\S\n]*(?:section\s*)?(\d{1,2})(?:\s|:|\.)(?=\s)', re.IGNORECASE | re.MULTILINE)
 
 # allow some text (e.g. "/ Date of revision") and optional footer lines between
-# the label and the actual date value
+# the label and the actual date value; the separator is written so that no two
+# adjacent quantifiers can both consume the same whitespace
 DATE_PATTERN = re.compile(
-    r'(\b(?:Revision(?: Date)?|Issue Date|Date of issue|Version date|SDS creation date|Date Prepared|Issued)[^\n]{0,40})\s*[:]?\s*(?:\nPage[^\n]*\n)?\s*'
-    r'((?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4})|(?:[A-Za-z]+\s+\d{1,2},?\s*\d{4})|(?:\d{4}-\d{2}-\d{2}))',
+    r'(\b(?:Revision(?: Date)?|Issue Date|Date of issue|Version date|SDS creation date|Date Prepared|Issued)[^\n]{0,40}?)\s*(?::\s*)?(?:(?<=\n)Page[^\n]*\n\s*)?'
+    r'((?:\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4})|(?:[A-Za-z]+\s+\d{1,2},?\s*\d{4})|(?:\d{1,2}\s+[A-Za-z]+\s+\d{4})|(?:\d{4}-\d{2}-\d{2}))',
     re.IGNORECASE)
 
+# date value shapes handled without dateutil
+NUMERIC_DATE = re.compile(r'^(\d{1,2})[/\-.](\d{1,2})[/\-.](\d{2,4})$')
+ISO_DATE = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$')
+TEXT_DATE = re.compile(r'^([A-Za-z]+)\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s*(\d{4})$')
+DAY_TEXT_DATE = re.compile(r'^(\d{1,2})\s+([A-Za-z]+)\.?\s+(\d{4})$')
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+# numeric dates are read day-first (DD/MM/YYYY), as Australian SDSs write
+# them; set SDS_DATE_DAYFIRST=0 for a month-first corpus
+DATE_DAYFIRST = os.getenv("SDS_DATE_DAYFIRST", "1") != "0"
+# labels that name the issue date itself rather than a revision
+ISSUE_LABEL_KEYS = ('issue', 'prepared', 'issued', 'creation')
+# characters at the top of the document treated as the header block
+HEADER_CHARS = 2000
+
+# Bounds that keep field matching linear however bad the OCR is: garbage
+# scans produce lines of tens of thousands of characters, and the label
+# scans below look ahead from every label they find
+MAX_LINE_CHARS = 500
+MAX_SECTION_CHARS = 20000
+MAX_VALUE_LOOKAHEAD = 40
+
 FIELD_LABELS = {
     'product_name': [r'Product identifier', r'Product Name', r'Trade name'],
     'manufacturer': [r'Manufacturer', r'Supplier', r'Company name of supplier', r'Producer', r'Company'],
@@ -28,13 +70,119 @@ FIELD_LABELS = {
     'dangerous_goods_class': [r'DG Class', r'Class', r'Transport hazard class', r'(?:IMDG|IATA|ADG)?\s*Hazard Class', r'Australian Dangerous Goods class'],
     'subsidiary_risk': [r'Subsidiary risk'],
     'packing_group': [r'Packing group', r'PG', r'.*packing group', r'Australian Dangerous Goods packing group'],
+    'un_number': [r'UN\s*(?:No\.?|Number)', r'UN/?ID\s*(?:No\.?|Number)?'],
 }
 
 # flattened list of all label regexes for filtering
 ALL_LABELS = [lab for labs in FIELD_LABELS.values() for lab in labs] + ['SDS no.', 'SDS number']
 
+# fields parse_text produces, grouped by the part of the document they read
+SECTION1_FIELDS = ('product_name', 'manufacturer', 'product_use')
+SECTION14_FIELDS = ('un_number', 'dangerous_goods_class', 'subsidiary_risk', 'packing_group')
+ALL_FIELDS = SECTION1_FIELDS + SECTION14_FIELDS + ('issue_date',)
+FIELD_GROUPS = {'section1': SECTION1_FIELDS, 'section14': SECTION14_FIELDS}
 
-def extract_text(path: Path) -> str:
+# value patterns for the section 14 text heuristics, tried in order per field
+SECTION14_VALUE_PATTERNS = {
+    'un_number': (r'(?:UN\s*)?\d{4}|none|not\b.*',),
+    'dangerous_goods_class': (r'\d[0-9A-Za-z\.]*|not\b.*|none',),
+    'subsidiary_risk': (r'\d[0-9A-Za-z\.]*|none|not\b.*',),
+    'packing_group': (r'I{1,3}|IV|V|N\.?/?A|none|not\b.*', r'\d+|N\.?/?A|none|not\b.*'),
+}
+
+# pages are OCR'd this many at a time when extraction can stop early
+STOP_CHECK_PAGES = 4
+
+
+def _search_form(label: str) -> str:
+    # with re.search a leading ".*" only makes matching quadratic in the line
+    # length; every label that has one also appears earlier in its list without it
+    return label[2:] if label.startswith('.*') else label
+
+
+LABEL_FULLMATCH = [re.compile(lab, re.IGNORECASE) for lab in ALL_LABELS]
+LABEL_SEARCH = [re.compile(_search_form(lab), re.IGNORECASE) for lab in ALL_LABELS]
+
+# bump when extraction logic changes in a way the rule tables don't capture
+PARSER_REVISION = 6
+
+
+@functools.lru_cache(maxsize=None)
+def parser_fingerprint(ocr_backend: str = 'tesseract') -> str:
+    """Fingerprint of the extraction rules, used to decide when to re-parse.
+
+    Derived from ``PARSER_REVISION``, the label tables and patterns, the
+    section 14 table reader's rules and the OCR backend that reads scanned
+    pages, so editing any rule or switching OCR engine invalidates
+    previously stored results.
+    """
+    h = hashlib.sha256()
+    h.update(str(PARSER_REVISION).encode())
+    h.update(f"dayfirst={DATE_DAYFIRST}".encode())
+    h.update(f"ocr={ocr_backend}".encode())
+    h.update(json.dumps(FIELD_LABELS, sort_keys=True).encode())
+    h.update(json.dumps(SECTION14_VALUE_PATTERNS, sort_keys=True).encode())
+    for pattern in (SECTION_PATTERN, DATE_PATTERN, NUMERIC_DATE, ISO_DATE, TEXT_DATE, DAY_TEXT_DATE):
+        h.update(pattern.pattern.encode())
+    h.update(f"table={section14_table.TABLE_REVISION}".encode())
+    for pattern in (section14_table.SECTION14_START, section14_table.SECTION14_END, section14_table.LABEL_NUMBER,
+                    *(p for pair in section14_table.TABLE_FIELDS.values() for p in pair)):
+        h.update(pattern.pattern.encode())
+    h.update(inspect.getsource(clean_transport_value).encode())
+    return f"{PARSER_REVISION}-{h.hexdigest()[:12]}"
+
+
+def parser_version() -> str:
+    """``parser_fingerprint`` for the OCR backend currently installed."""
+    return parser_fingerprint(get_ocr_backend().name)
+
+
+# the standalone/CLI version (Tesseract); inside ocr_service use parser_version()
+PARSER_VERSION = parser_fingerprint()
+
+
+def resolve_fields(fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Validate a requested field set (names or group names, or a comma
+    separated string); ``None`` means every field.
+    """
+    if fields is None:
+        return ALL_FIELDS
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    wanted = set()
+    for name in fields:
+        name = str(name).strip().lower()
+        if name in FIELD_GROUPS:
+            wanted.update(FIELD_GROUPS[name])
+        elif name in ALL_FIELDS:
+            wanted.add(name)
+        elif name:
+            raise ValueError(f"Unknown field '{name}'; expected any of {', '.join(ALL_FIELDS + tuple(FIELD_GROUPS))}")
+    if not wanted:
+        raise ValueError("No fields requested")
+    return tuple(f for f in ALL_FIELDS if f in wanted)
+
+
+def _section_closed(number: int) -> Callable[[List[str]], bool]:
+    """Stop condition for ``extract_pages``: the next heading after section
+    ``number`` has been read, so later pages cannot change its span.
+    """
+    def stop(pages: List[str]) -> bool:
+        text = "".join(pages)
+        span = section_span(text, number)
+        return span is not None and span[1] < len(text)
+    return stop
+
+
+def extract_pages(path: Path, stop: Optional[Callable[[List[str]], bool]] = None,
+                  scan_stop: Optional[Callable[[List[str]], bool]] = None) -> List[str]:
+    """Return the text of each page, via PyMuPDF or the OCR backend for scans.
+
+    With ``stop``, pages are read in order only until ``stop(pages)`` is true.
+    ``scan_stop`` does the same for OCR pages only, so a caller can bound the
+    expensive path without cutting short a text-layer PDF. Either way scanned
+    pages are rendered and recognised ``STOP_CHECK_PAGES`` at a time.
+    """
     logger.info(f"[SDS_EXTRACTOR] Starting text extraction from: {path}")
     logger.info(f"[SDS_EXTRACTOR] File size: {path.stat().st_size} bytes")
     
@@ -43,12 +191,17 @@ def extract_text(path: Path) -> str:
         doc = fitz.open(str(path))
         logger.info(f"[SDS_EXTRACTOR] PDF opened, pages: {len(doc)}")
         
-        text = "".join(cast(fitz.Page, page).get_text() for page in doc)  # type: ignore[attr-defined]
-        logger.info(f"[SDS_EXTRACTOR] PyMuPDF extracted {len(text)} characters")
+        pages = []
+        for page in doc:
+            pages.append(cast(fitz.Page, page).get_text())  # type: ignore[attr-defined]
+            if stop is not None and stop(pages):
+                logger.info(f"[SDS_EXTRACTOR] Stopping after page {len(pages)} of {len(doc)}")
+                break
+        logger.info(f"[SDS_EXTRACTOR] PyMuPDF extracted {sum(len(p) for p in pages)} characters")
         
-        if text.strip():
+        if any(p.strip() for p in pages):
             logger.info(f"[SDS_EXTRACTOR] PyMuPDF extraction successful")
-            return text
+            return pages
             
         logger.warning(f"[SDS_EXTRACTOR] PyMuPDF extracted empty text, falling back to OCR...")
         
@@ -57,137 +210,408 @@ def extract_text(path: Path) -> str:
         logger.info(f"[SDS_EXTRACTOR] Falling back to OCR...")
     
     try:
-        logger.info(f"[SDS_EXTRACTOR] Converting PDF to images for OCR...")
-        images = convert_from_path(str(path))
-        logger.info(f"[SDS_EXTRACTOR] Converted to {len(images)} images")
+        backend = get_ocr_backend()
+        if stop is None and scan_stop is None:
+            logger.info(f"[SDS_EXTRACTOR] Converting PDF to images for OCR...")
+            images = convert_from_path(str(path))
+            logger.info(f"[SDS_EXTRACTOR] Running OCR on {len(images)} images with the '{backend.name}' backend...")
+            pages = backend.recognise(images)
+        else:
+            logger.info(f"[SDS_EXTRACTOR] Running OCR in batches of {STOP_CHECK_PAGES} pages with the '{backend.name}' backend...")
+            pages = []
+            while True:
+                # render only the pages about to be recognised
+                first = len(pages) + 1
+                images = convert_from_path(str(path), first_page=first, last_page=first + STOP_CHECK_PAGES - 1)
+                if not images:
+                    break
+                pages.extend(backend.recognise(images))
+                if any(check is not None and check(pages) for check in (stop, scan_stop)):
+                    logger.info(f"[SDS_EXTRACTOR] Stopping OCR after page {len(pages)}")
+                    break
+                if len(images) < STOP_CHECK_PAGES:
+                    break
+        logger.info(f"[SDS_EXTRACTOR] OCR extracted {sum(len(p) for p in pages)} characters")
         
-        logger.info(f"[SDS_EXTRACTOR] Running OCR on images...")
-        ocr_text = ''.join(pytesseract.image_to_string(img) for img in images)
-        logger.info(f"[SDS_EXTRACTOR] OCR extracted {len(ocr_text)} characters")
-        
-        return ocr_text
+        return pages
         
     except Exception as e:
         logger.error(f"[SDS_EXTRACTOR] OCR extraction failed: {type(e).__name__}: {e}")
         raise Exception(f"Both PyMuPDF and OCR text extraction failed: {e}")
 
 
-def get_section(text: str, number: int) -> str:
-    pattern = re.compile(rf'^\s*(?:section\s*)?{number}\b[^\n]*', re.IGNORECASE | re.MULTILINE)
+def extract_text(path: Path) -> str:
+    return "".join(extract_pages(path))
+
+
+def section_span(text: str, number: int) -> Optional[Tuple[int, int]]:
+    """Return the ``(start, end)`` offsets of section ``number`` in ``text``."""
+    pattern = re.compile(rf'^[^\S\n]*(?:section\s*)?{number}\b[^\n]*', re.IGNORECASE | re.MULTILINE)
     match = pattern.search(text)
     if not match:
-        return ''
+        return None
     start = match.end()
     end = len(text)
+    floor = start
     for m in SECTION_PATTERN.finditer(text, start):
         num = int(m.group(1))
         if num > number:
-            end = m.start()
+            end = _blank_run_start(text, m.start(), floor)
             break
-    return text[start:end]
+        floor = m.end()
+    return start, end
+
+
+def _blank_run_start(text: str, pos: int, floor: int) -> int:
+    """First line start of the blank lines directly above line start ``pos``.
+
+    Sections have always ended before the blank lines preceding the next
+    heading; this keeps those offsets without matching ``^\\s*``.
+    """
+    i = pos
+    while i > floor and text[i - 1].isspace():
+        i -= 1
+    if i == 0 or text[i - 1] == '\n':
+        return i
+    return text.find('\n', i, pos) + 1
+
+
+def _bounded_lines(text: str) -> List[str]:
+    """Lines of ``text`` with the section and line length caps applied."""
+    return [line[:MAX_LINE_CHARS] for line in text[:MAX_SECTION_CHARS].splitlines()]
+
+
+def get_section(text: str, number: int) -> str:
+    span = section_span(text, number)
+    if span is None:
+        return ''
+    return text[span[0]:span[1]]
+
+
+def _two_digit_year(year: int) -> int:
+    if year >= 100:
+        return year
+    return 2000 + year if year < 70 else 1900 + year
+
+
+def _month_number(name: str) -> Optional[int]:
+    name = name.lower()
+    return MONTHS.get(name[:4]) or MONTHS.get(name[:3])
+
+
+def normalise_date(value: str, dayfirst: Optional[bool] = None) -> Optional[date]:
+    """Parse a date string of the shapes matched by ``DATE_PATTERN``.
+
+    The common numeric, ISO, "Month DD, YYYY" and "DD Month YYYY" forms are
+    handled with the precompiled patterns above; anything else falls back to
+    dateutil when it is installed. Numeric dates are read in one order only
+    (``DATE_DAYFIRST`` by default): a value that is only valid the other way
+    round returns None rather than having its day and month swapped.
+    """
+    if dayfirst is None:
+        dayfirst = DATE_DAYFIRST
+    value = value.strip()
+    try:
+        m = ISO_DATE.match(value)
+        if m:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        m = NUMERIC_DATE.match(value)
+        if m:
+            first, second = int(m.group(1)), int(m.group(2))
+            year = _two_digit_year(int(m.group(3)))
+            day, month = (first, second) if dayfirst else (second, first)
+            return date(year, month, day)
+        m = TEXT_DATE.match(value)
+        if m:
+            month = _month_number(m.group(1))
+            if month:
+                return date(int(m.group(3)), month, int(m.group(2)))
+        m = DAY_TEXT_DATE.match(value)
+        if m:
+            month = _month_number(m.group(2))
+            if month:
+                return date(int(m.group(3)), month, int(m.group(1)))
+    except ValueError:
+        return None
+    if dateparser is None:
+        return None
+    try:
+        return dateparser.parse(value, dayfirst=dayfirst).date()
+    except Exception:
+        return None
+
+
+def _date_scopes(text: str) -> List[Tuple[int, int]]:
+    """Merged offsets of the header block and sections 1 and 16."""
+    spans = [(0, min(len(text), HEADER_CHARS))]
+    for number in (1, 16):
+        span = section_span(text, number)
+        if span:
+            spans.append(span)
+    spans.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _pick_date(text: str, spans: List[Tuple[int, int]], today: date) -> Optional[Dict[str, str]]:
+    chosen = None
+    unparsed = None
+    for start, end in spans:
+        for m in DATE_PATTERN.finditer(text, start, end):
+            label = m.group(1).strip()
+            raw = m.group(2).strip()
+            parsed = normalise_date(raw)
+            if parsed is None:
+                # e.g. 05/13/2020 when reading day-first: keep the raw text
+                # for review but don't guess the order
+                unparsed = unparsed or {'value': None, 'raw': raw, 'label': label}
+                continue
+            if parsed > today:
+                continue
+            candidate = {'value': parsed.isoformat(), 'raw': raw, 'label': label}
+            if any(key in label.lower() for key in ISSUE_LABEL_KEYS):
+                return candidate
+            if not chosen:
+                chosen = candidate
+    return chosen or unparsed
+
+
+def extract_issue_date(text: str) -> Dict[str, object]:
+    """Find the SDS issue date and return it as an ISO ``YYYY-MM-DD`` string.
+
+    The header block and sections 1 and 16 are searched first; the rest of
+    the document is only scanned when none of those yields a usable date.
+    The returned field also carries the matched label and the raw string; a
+    date that cannot be read in the configured day/month order is returned
+    with its raw string but no value.
+    """
+    today = date.today()
+    scopes = _date_scopes(text)
+    found = _pick_date(text, scopes, today)
+    if not found or found['value'] is None:
+        rest = []
+        pos = 0
+        for start, end in scopes:
+            if start > pos:
+                rest.append((pos, start))
+            pos = end
+        if pos < len(text):
+            rest.append((pos, len(text)))
+        more = _pick_date(text, rest, today)
+        if more and (more['value'] or not found):
+            found = more
+    if not found:
+        return {'value': None, 'confidence': 0.0, 'label': None, 'raw': None}
+    confidence = 1.0 if found['value'] else 0.0
+    return {'value': found['value'], 'confidence': confidence, 'label': found['label'], 'raw': found['raw']}
 
 
 def extract_after_label(section_text: str, labels):
-    lines = section_text.splitlines()
-    for i, line in enumerate(lines):
-        clean = line.strip()
+    lines = [line.strip() for line in _bounded_lines(section_text)]
+    # whether each line is itself a label, worked out once rather than per lookahead
+    is_label = [any(r.fullmatch(line) for r in LABEL_FULLMATCH) for line in lines]
+    for i, clean in enumerate(lines):
         label_part = clean.split(':', 1)[0]
         for label in labels:
             if re.fullmatch(label, label_part, re.IGNORECASE):
                 # try same line after colon
                 if ':' in clean:
                     after = clean.split(':', 1)[1].strip()
-                    if after and not any(re.fullmatch(lab, after, re.IGNORECASE) for lab in ALL_LABELS):
+                    if after and not any(r.fullmatch(after) for r in LABEL_FULLMATCH):
                         return after
                 # look at subsequent lines for value
-                j = i + 1
-                while j < len(lines):
-                    candidate = lines[j].strip()
+                for j in range(i + 1, min(len(lines), i + 1 + MAX_VALUE_LOOKAHEAD)):
+                    candidate = lines[j]
                     if candidate and not candidate.startswith(':') and not re.match(r'^[:\-]+$', candidate, re.IGNORECASE):
-                        if not any(re.fullmatch(lab, candidate, re.IGNORECASE) for lab in ALL_LABELS):
+                        if not is_label[j]:
                             return candidate
-                    j += 1
     return None
 
 
 def extract_section14_field(sec14: str, labels, value_pattern):
-    lines = sec14.splitlines()
+    # one space per whitespace run: a pattern with \s* (or an optional prefix
+    # before one) then never rescans a long run from every start position
+    lines = [' '.join(line.split()) for line in _bounded_lines(sec14)]
     value_re = re.compile(value_pattern, re.IGNORECASE)
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        for lab in labels:
+    label_res = [re.compile(_search_form(lab), re.IGNORECASE) for lab in labels]
+    same_line_res = [re.compile(rf'{_search_form(lab)}\s*(?:[:\-]\s*)?({value_pattern})', re.IGNORECASE)
+                     for lab in labels]
+    # whether each line mentions any label, worked out once rather than per lookahead
+    mentions_label = [bool(line) and any(r.search(line) for r in LABEL_SEARCH) for line in lines]
+
+    def value_after(start: int) -> Optional[str]:
+        for j in range(start, min(len(lines), start + MAX_VALUE_LOOKAHEAD)):
+            candidate = lines[j]
+            if candidate and not candidate.startswith(':') and not mentions_label[j]:
+                if not re.match(r'^\d+\.[A-Za-z]', candidate):
+                    if value_re.fullmatch(candidate):
+                        return candidate
+        return None
+
+    for i, stripped in enumerate(lines):
+        for lab, same_line_re in zip(label_res, same_line_res):
             # handle "Label: value" on the same line
-            same_line = re.search(rf'{lab}\s*[:\-]?\s*({value_pattern})', stripped, re.IGNORECASE)
+            same_line = same_line_re.search(stripped)
             if same_line:
                 candidate = same_line.group(1).strip()
                 if value_re.fullmatch(candidate):
                     return candidate
             # label present in this line, value on subsequent line
-            if re.search(lab, stripped, re.IGNORECASE):
-                j = i + 1
-                while j < len(lines):
-                    candidate = lines[j].strip()
-                    if candidate and not candidate.startswith(':') and not any(re.search(l, candidate, re.IGNORECASE) for l in ALL_LABELS):
-                        if not re.match(r'^\d+\.[A-Za-z]', candidate):
-                            if value_re.fullmatch(candidate):
-                                return candidate
-                    j += 1
+            if lab.search(stripped):
+                value = value_after(i + 1)
+                if value:
+                    return value
             # handle label split across two lines
             if i + 1 < len(lines):
-                combined = stripped + " " + lines[i + 1].strip()
-                if re.search(lab, combined, re.IGNORECASE):
-                    j = i + 2
-                    while j < len(lines):
-                        candidate = lines[j].strip()
-                        if candidate and not candidate.startswith(':') and not any(re.search(l, candidate, re.IGNORECASE) for l in ALL_LABELS):
-                            if not re.match(r'^\d+\.[A-Za-z]', candidate):
-                                if value_re.fullmatch(candidate):
-                                    return candidate
-                        j += 1
+                combined = stripped + " " + lines[i + 1]
+                if lab.search(combined):
+                    value = value_after(i + 2)
+                    if value:
+                        return value
     # fallback: search across entire section text
-    compact = ' '.join(lines)
-    for lab in labels:
-        m = re.search(rf'{lab}\s*[:\-]?\s*({value_pattern})', compact, re.IGNORECASE)
+    compact = ' '.join(line for line in lines if line)
+    for same_line_re in same_line_res:
+        m = same_line_re.search(compact)
         if m:
             return m.group(1).strip()
     if labels is FIELD_LABELS.get('dangerous_goods_class'):
-        for line in lines:
-            cand = line.strip()
+        for cand in lines:
             if value_re.fullmatch(cand):
                 return cand
     return None
 
 
-def parse_pdf(path: Path):
+def parse_pdf(path: Path, text: Optional[str] = None, pages: Optional[List[str]] = None,
+              fields: Optional[Iterable[str]] = None):
+    """Parse the SDS at ``path``; pass ``pages`` (or ``text``) when already extracted.
+
+    ``fields`` limits the work to those fields (see ``resolve_fields``): pages
+    after the last section they need are not read, and the section 14 table
+    is only read for section 14 fields. The issue date can come from section
+    16 or anywhere else, so asking for it still reads every page.
+    """
     logger.info(f"[SDS_EXTRACTOR] Starting PDF parsing: {path}")
+    fields = resolve_fields(fields)
     
     # Step 1: Extract text
-    logger.info(f"[SDS_EXTRACTOR] Step 1: Extracting text from PDF...")
-    text = extract_text(path)
-    logger.info(f"[SDS_EXTRACTOR] Text extraction complete, total length: {len(text)}")
+    complete = True
+    if pages is None and text is None:
+        logger.info(f"[SDS_EXTRACTOR] Step 1: Extracting text from PDF...")
+        stop = None
+        if 'issue_date' not in fields:
+            stop = _section_closed(14 if any(f in SECTION14_FIELDS for f in fields) else 1)
+        pages = extract_pages(path, stop=stop)
+        complete = stop is None
+    if text is None:
+        text = "".join(pages)
+        logger.info(f"[SDS_EXTRACTOR] Text extraction complete, total length: {len(text)}")
+    else:
+        logger.info(f"[SDS_EXTRACTOR] Step 1: Using supplied text, total length: {len(text)}")
+
+    # Keep the text and section offsets so later extractors can run without
+    # the PDF (only for whole documents: the store keeps the first version)
+    if complete:
+        spans = {n: span for n in range(1, 17) if (span := section_span(text, n)) is not None}
+        remember(path, pages if pages is not None else [text], spans, parser_version())
     
     if len(text) < 100:
         logger.warning(f"[SDS_EXTRACTOR] Very short text extracted ({len(text)} chars), may indicate extraction failure")
-    
+
+    # Section 14 fields: read the table from word coordinates first, then
+    # fall back to the text heuristics for anything not found in a cell
+    table = extract_section14_table(path) if any(f in SECTION14_FIELDS for f in fields) else None
+    return parse_text(text, table, fields)
+
+
+def parse_text(text: str, table: Optional[Dict[str, Optional[str]]] = None,
+               fields: Optional[Iterable[str]] = None):
+    """Run the field extractors over already extracted document text.
+
+    ``table`` holds section 14 values read from the PDF's word layout, if any.
+    Only the extractors for ``fields`` run (default: all); the others are
+    listed under ``skipped_fields``.
+    """
+    table = table or {}
+    fields = resolve_fields(fields)
     result = {}
     
     # Step 2: Extract sections
     logger.info(f"[SDS_EXTRACTOR] Step 2: Extracting sections...")
-    sec1 = get_section(text, 1)
-    sec14 = get_section(text, 14)
+    sec1 = get_section(text, 1) if any(f in SECTION1_FIELDS for f in fields) else None
+    sec14 = get_section(text, 14) if any(f in SECTION14_FIELDS for f in fields) else None
+    
+    if sec1 is not None:
+        logger.info(f"[SDS_EXTRACTOR] Section 1 length: {len(sec1)} chars")
+        if len(sec1) == 0:
+            logger.warning(f"[SDS_EXTRACTOR] Section 1 not found or empty")
+    if sec14 is not None:
+        logger.info(f"[SDS_EXTRACTOR] Section 14 length: {len(sec14)} chars")
+        if len(sec14) == 0:
+            logger.warning(f"[SDS_EXTRACTOR] Section 14 not found or empty")
+    if sec1 is not None:
+        _section1_fields(sec1, fields, result)
+    if sec14 is not None:
+        _section14_fields(sec14, table, fields, result)
+    if 'issue_date' in fields:
+        result['issue_date'] = extract_issue_date(text)
+    skipped = [f for f in ALL_FIELDS if f not in fields]
+    if skipped:
+        result['skipped_fields'] = skipped
     
-    logger.info(f"[SDS_EXTRACTOR] Section 1 length: {len(sec1)} chars")
-    logger.info(f"[SDS_EXTRACTOR] Section 14 length: {len(sec14)} chars")
+    # Step 5: Summary
+    logger.info(f"[SDS_EXTRACTOR] Parsing complete. Results:")
+    for key, value in result.items():
+        conf = value.get('confidence', 0) if isinstance(value, dict) else 0
+        val = value.get('value', value) if isinstance(value, dict) else value
+        logger.info(f"[SDS_EXTRACTOR]   {key}: '{val}' (confidence: {conf})")
     
-    if len(sec1) == 0:
-        logger.warning(f"[SDS_EXTRACTOR] Section 1 not found or empty")
-    if len(sec14) == 0:
-        logger.warning(f"[SDS_EXTRACTOR] Section 14 not found or empty")
+    return result
+
+
+def _section1_fields(sec1: str, fields: Tuple[str, ...], result: Dict[str, object]) -> None:
+    if 'product_name' in fields:
+        result['product_name'] = _product_name(sec1)
+    if 'manufacturer' in fields:
+        manufacturer = extract_after_label(sec1, FIELD_LABELS['manufacturer'])
+        if not manufacturer:
+            m = re.search(r'Details of the supplier[^\n]*\n([^\n]+)', sec1, re.IGNORECASE)
+            if m:
+                manufacturer = m.group(1).strip()
+        result['manufacturer'] = {'value': manufacturer, 'confidence': 1.0 if manufacturer else 0.0}
+    if 'product_use' in fields:
+        value = extract_after_label(sec1, FIELD_LABELS['product_use'])
+        result['product_use'] = {'value': value, 'confidence': 1.0 if value else 0.0}
+
+
+def _section14_fields(sec14: str, table: Dict[str, Optional[str]], fields: Tuple[str, ...],
+                      result: Dict[str, object]) -> None:
+    for field in SECTION14_FIELDS:
+        if field in fields:
+            # table and text values go through the same normalisation
+            value = table.get(field) or clean_transport_value(field, section14_text_value(sec14, field))
+            result[field] = {'value': value, 'confidence': 1.0 if value else 0.0}
+
+
+def section14_text_value(sec14: str, field: str) -> Optional[str]:
+    """Raw section 14 value for ``field`` from the text heuristics alone."""
+    for pattern in SECTION14_VALUE_PATTERNS[field]:
+        value = extract_section14_field(sec14, FIELD_LABELS[field], pattern)
+        if value:
+            return value
+    return None
+
+
+def _product_name(sec1: str) -> Dict[str, object]:
     # product name with fallback
     product_name = extract_after_label(sec1, FIELD_LABELS['product_name'])
     if not product_name or 'sds' in product_name.lower() or 'use' in product_name.lower():
         candidates = []
-        for l in sec1.splitlines():
+        for l in _bounded_lines(sec1):
             l = l.strip()
             if not l or l.startswith(':'):
                 continue
@@ -199,58 +623,11 @@ def parse_pdf(path: Path):
                 continue
             candidates.append(l)
         product_name = candidates[-1] if candidates else None
-    result['product_name'] = {'value': product_name, 'confidence': 1.0 if product_name else 0.0}
-    manufacturer = extract_after_label(sec1, FIELD_LABELS['manufacturer'])
-    if not manufacturer:
-        m = re.search(r'Details of the supplier[^\n]*\n([^\n]+)', sec1, re.IGNORECASE)
-        if m:
-            manufacturer = m.group(1).strip()
-    result['manufacturer'] = {'value': manufacturer, 'confidence': 1.0 if manufacturer else 0.0}
-    value = extract_after_label(sec1, FIELD_LABELS['product_use'])
-    result['product_use'] = {'value': value, 'confidence': 1.0 if value else 0.0}
-    # Section 14 fields: allow table-style layouts
-    value = extract_section14_field(sec14, FIELD_LABELS['dangerous_goods_class'], r'\d[0-9A-Za-z\.]*|not\b.*|none')
-    result['dangerous_goods_class'] = {'value': value, 'confidence': 1.0 if value else 0.0}
-    value = extract_section14_field(sec14, FIELD_LABELS['subsidiary_risk'], r'\d[0-9A-Za-z\.]*|none|not\b.*')
-    result['subsidiary_risk'] = {'value': value, 'confidence': 1.0 if value else 0.0}
-    value = extract_section14_field(sec14, FIELD_LABELS['packing_group'], r'I{1,3}|IV|V|N\.?/?A|none|not\b.*')
-    if not value:
-        value = extract_section14_field(sec14, FIELD_LABELS['packing_group'], r'\d+|N\.?/?A|none|not\b.*')
-    result['packing_group'] = {'value': value, 'confidence': 1.0 if value else 0.0}
-    matches = list(DATE_PATTERN.finditer(text))
-    chosen = None
-    if matches:
-        from datetime import date
-        from dateutil import parser as dateparser
-        today = date.today()
-        for m in matches:
-            label = m.group(1).lower()
-            candidate = m.group(2).strip()
-            try:
-                d = dateparser.parse(candidate, dayfirst=False).date()
-                if d > today:
-                    continue
-            except Exception:
-                pass
-            if any(key in label for key in ['issue', 'prepared', 'issued', 'creation']):
-                chosen = candidate
-                break
-            if not chosen:
-                chosen = candidate
-    result['issue_date'] = {'value': chosen, 'confidence': 1.0 if chosen else 0.0}
-    
-    # Step 5: Summary
-    logger.info(f"[SDS_EXTRACTOR] Parsing complete. Results:")
-    for key, value in result.items():
-        conf = value.get('confidence', 0) if isinstance(value, dict) else 0
-        val = value.get('value', value) if isinstance(value, dict) else value
-        logger.info(f"[SDS_EXTRACTOR]   {key}: '{val}' (confidence: {conf})")
-    
-    return result
+    return {'value': product_name, 'confidence': 1.0 if product_name else 0.0}
 
 
 if __name__ == '__main__':
-    import json, sys
+    import sys
     for pdf in sys.argv[1:]:
         res = parse_pdf(Path(pdf))
         print(pdf)
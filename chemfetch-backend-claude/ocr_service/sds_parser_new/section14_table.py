@@ -0,0 +1,223 @@
+"""
+Layout-aware reader for the section 14 (transport information) table.
+
+``page.get_text()`` flattens the ADG/IMDG/IATA table into a stream of lines,
+which is why ``extract_section14_field`` has to guess which value belongs to
+which label. Here the word boxes from ``page.get_text("words")`` are grouped
+into rows and cells with NumPy so each value is read from the cell next to
+(or under) its label in a single pass.
+"""
+
+import re
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import fitz
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# headings only ("14. Transport information", "SECTION 14"), never a line that
+# merely starts with the number, such as "14 days" or a page-15 footer
+SECTION14_START = re.compile(r'^\s*(?:section\s*14\b|14\s*[.:]?\s*transport)', re.IGNORECASE)
+SECTION14_END = re.compile(r'^\s*(?:section\s*1[5-6]\b|15\s*[.:]?\s*regulatory|16\s*[.:]?\s*other)',
+                           re.IGNORECASE)
+
+# subsection numbering in front of a label, e.g. "14.1 UN number"
+LABEL_NUMBER = re.compile(r'^14\.\d+\.?\s*')
+
+# label regex and value regex per field, matched against whole cells
+TABLE_FIELDS = {
+    'un_number': (
+        re.compile(r'UN\s*(?:No\.?|Number)|UN/?ID\s*(?:No\.?|Number)?', re.IGNORECASE),
+        re.compile(r'(?:UN\s*)?\d{4}|none|not\b.*', re.IGNORECASE),
+    ),
+    'dangerous_goods_class': (
+        re.compile(r'(?:(?:Australian|ADG|IMDG|IATA|DG|Transport hazard|Dangerous Goods|Hazard)\s*)*class(?:\(es\))?',
+                   re.IGNORECASE),
+        re.compile(r'\d[0-9A-Za-z\.]*|none|not\b.*', re.IGNORECASE),
+    ),
+    'subsidiary_risk': (
+        re.compile(r'Sub(?:sidiary|\.)?\s*(?:risk|hazard)s?(?:\(s\))?', re.IGNORECASE),
+        re.compile(r'\d[0-9A-Za-z\.]*|none|not\b.*|-', re.IGNORECASE),
+    ),
+    'packing_group': (
+        re.compile(r'(?:(?:Australian|ADG|IMDG|IATA|Dangerous Goods)\s*)*Packing\s*group|PG', re.IGNORECASE),
+        re.compile(r'I{1,3}|IV|N\.?/?A|none|not\b.*|-', re.IGNORECASE),
+    ),
+}
+
+# bump when the table reader changes in a way its patterns don't capture;
+# part of the parser fingerprint
+TABLE_REVISION = 1
+
+# vertical offset applied per page so rows from consecutive pages stay ordered
+PAGE_STRIDE = 10_000.0
+
+
+def _heading_y(words, pattern, after: float = -1.0) -> Optional[float]:
+    """Top of the first line matching ``pattern`` below ``after``."""
+    lines: Dict[Tuple[int, int], List] = {}
+    for w in words:
+        lines.setdefault((w[5], w[6]), []).append(w)
+    hits = [
+        min(w[1] for w in line)
+        for line in lines.values()
+        if pattern.match(' '.join(w[4] for w in line))
+    ]
+    hits = [y for y in hits if y > after]
+    return min(hits) if hits else None
+
+
+def _section14_words(doc) -> List[Tuple[float, float, float, float, str]]:
+    """Collect word boxes between the section 14 and section 15 headings."""
+    collected: List[Tuple[float, float, float, float, str]] = []
+    started = False
+    for page_no in range(len(doc)):
+        words = doc[page_no].get_text("words")
+        if not words:
+            continue
+        start_y = -1.0
+        if not started:
+            found = _heading_y(words, SECTION14_START)
+            if found is None:
+                continue
+            start_y = found
+            started = True
+        end_y = _heading_y(words, SECTION14_END, after=start_y)
+        offset = page_no * PAGE_STRIDE
+        for w in words:
+            if w[1] <= start_y or (end_y is not None and w[1] >= end_y):
+                continue
+            collected.append((w[0], w[1] + offset, w[2], w[3] + offset, w[4]))
+        if end_y is not None:
+            break
+    return collected
+
+
+def _cells(words: List[Tuple[float, float, float, float, str]]) -> List[List[Tuple[float, float, str]]]:
+    """Group words into rows of ``(x0, x1, text)`` cells.
+
+    Rows are split where the sorted vertical centres jump by more than half
+    a median word height; cells are split where the horizontal gap between
+    neighbouring words exceeds a few median character widths.
+    """
+    boxes = np.array([w[:4] for w in words], dtype=np.float64)
+    texts = [w[4] for w in words]
+    x0, y0, x1, y1 = boxes.T
+    yc = (y0 + y1) / 2
+    heights = y1 - y0
+    char_w = (x1 - x0) / np.maximum([len(t) for t in texts], 1)
+
+    by_y = np.argsort(yc, kind='stable')
+    row_tol = max(float(np.median(heights)) * 0.5, 1.0)
+    row_breaks = np.diff(yc[by_y]) > row_tol
+    row_id = np.empty(len(words), dtype=np.int64)
+    row_id[by_y] = np.concatenate(([0], np.cumsum(row_breaks)))
+
+    order = np.lexsort((x0, row_id))
+    cell_gap = max(float(np.median(char_w)) * 2.5, 6.0)
+    gaps = x0[order][1:] - x1[order][:-1]
+    new_row = np.diff(row_id[order]) != 0
+    new_cell = np.concatenate(([True], new_row | (gaps > cell_gap)))
+    new_row = np.concatenate(([True], new_row))
+
+    rows: List[List[Tuple[float, float, str]]] = []
+    for pos, idx in enumerate(order):
+        if new_row[pos]:
+            rows.append([])
+        if new_cell[pos]:
+            rows[-1].append([x0[idx], x1[idx], texts[idx]])
+        else:
+            cell = rows[-1][-1]
+            cell[1] = max(cell[1], x1[idx])
+            cell[2] = f"{cell[2]} {texts[idx]}"
+    return [[(c[0], c[1], c[2].strip()) for c in row] for row in rows]
+
+
+def _label_of(text: str) -> Optional[str]:
+    text = LABEL_NUMBER.sub('', text.strip().rstrip(':').strip())
+    for field, (label_re, _) in TABLE_FIELDS.items():
+        if label_re.fullmatch(text):
+            return field
+    return None
+
+
+def clean_transport_value(field: str, value: Optional[str]) -> Optional[str]:
+    """Normalise a section 14 value, however it was found: ``-`` becomes
+    ``none`` and UN numbers become ``UN1234``.
+    """
+    if value is None:
+        return None
+    value = value.strip().lstrip(':').strip()
+    if value == '-':
+        return 'none'
+    if field == 'un_number':
+        digits = re.fullmatch(r'(?:UN\s*)?(\d{4})', value, re.IGNORECASE)
+        if digits:
+            return f"UN{digits.group(1)}"
+    return value
+
+
+def _first_value(field: str, cells: List[Tuple[float, float, str]]) -> Optional[str]:
+    value_re = TABLE_FIELDS[field][1]
+    for _, _, text in cells:
+        text = text.strip().lstrip(':').strip()
+        if text and value_re.fullmatch(text):
+            return clean_transport_value(field, text)
+    return None
+
+
+def _read_rows(rows: List[List[Tuple[float, float, str]]]) -> Dict[str, Optional[str]]:
+    found: Dict[str, Optional[str]] = {field: None for field in TABLE_FIELDS}
+    for i, row in enumerate(rows):
+        header_fields = [_label_of(cell[2]) for cell in row]
+        labelled = [(cell, f) for cell, f in zip(row, header_fields) if f]
+
+        # header row of labels (one column per field): read the row below by column overlap
+        if len(labelled) >= 2 and i + 1 < len(rows):
+            for cell, field in labelled:
+                if found[field]:
+                    continue
+                below = [c for c in rows[i + 1] if c[0] < cell[1] and c[1] > cell[0]]
+                found[field] = _first_value(field, below)
+            continue
+
+        # label in the first cell, one value per transport regime to its right
+        field = header_fields[0] if row else None
+        values = row[1:]
+        if not field and row and ':' in row[0][2]:
+            # label and first value share a cell, e.g. "Class: 3"
+            label, value = row[0][2].split(':', 1)
+            field = _label_of(label)
+            values = [(row[0][0], row[0][1], value)] + row[1:]
+        if not field and i + 1 < len(rows) and rows[i + 1]:
+            # label wrapped onto the next line, e.g. "Packing" / "group"
+            field = _label_of(f"{row[0][2]} {rows[i + 1][0][2]}") if row else None
+            values = row[1:] + rows[i + 1][1:]
+        if field and not found[field]:
+            found[field] = _first_value(field, values)
+    return found
+
+
+def extract_section14_table(path: Path) -> Dict[str, Optional[str]]:
+    """Read UN number, class, subsidiary risk and packing group from the
+    section 14 table of the PDF at ``path``.
+
+    Fields that cannot be located in a cell are returned as ``None`` so the
+    caller can fall back to the text heuristics.
+    """
+    empty: Dict[str, Optional[str]] = {field: None for field in TABLE_FIELDS}
+    try:
+        with fitz.open(str(path)) as doc:
+            words = _section14_words(doc)
+    except Exception as e:
+        logger.warning(f"[SECTION14_TABLE] Could not read word boxes: {type(e).__name__}: {e}")
+        return empty
+    if not words:
+        logger.info("[SECTION14_TABLE] No section 14 words found")
+        return empty
+    found = _read_rows(_cells(words))
+    logger.info(f"[SECTION14_TABLE] Table fields: {found}")
+    return found
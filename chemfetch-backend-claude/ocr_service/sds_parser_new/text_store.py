@@ -0,0 +1,263 @@
+"""
+Persistent store of extracted SDS text, keyed by the PDF's SHA-256.
+
+``parse_pdf`` records every document it reads: the text of each page, where
+each page starts in the joined text, and the offsets of sections 1-16. New
+or improved extractors can then run over the whole corpus from this SQLite
+file without downloading or opening a single PDF, and an FTS5 index over the
+page text gives fast full-text lookup.
+
+Only text is stored. Section 14 values that a live parse reads from the
+PDF's table layout (``section14_table``) cannot be recovered here, so
+``reextract`` reports the text-derived value, normalised the same way, and
+null where only the table had it.
+
+``SDS_TEXT_STORE`` sets the database path (default ``sds_text_store.sqlite``);
+set it to an empty string to turn the store off.
+
+Command line:
+    python -m sds_parser_new.text_store search '"packing group" AND III'
+    python -m sds_parser_new.text_store reextract hazard_codes > codes.jsonl
+    python -m sds_parser_new.text_store stats
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    content_hash TEXT PRIMARY KEY,
+    page_count INTEGER NOT NULL,
+    char_count INTEGER NOT NULL,
+    parser_version TEXT,
+    stored_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    page_no INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (content_hash, page_no)
+);
+CREATE TABLE IF NOT EXISTS sections (
+    content_hash TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    PRIMARY KEY (content_hash, number)
+);
+"""
+# external-content index keyed on the declared pages.id (an implicit rowid
+# may be renumbered by VACUUM); the triggers keep it in step with pages
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(text, content='pages', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS pages_fts_insert AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_fts_delete AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_fts_update AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TextStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:  # SQLite built without FTS5
+                self.fts = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # one short-lived connection per call keeps this safe across request
+        # threads and the parse_sds.py processes the Node backend spawns
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def has(self, content_hash: str) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM documents WHERE content_hash = ?", (content_hash,)).fetchone() is not None
+
+    def put(self, content_hash: str, pages: List[str], sections: Dict[int, Tuple[int, int]],
+            parser_version: Optional[str] = None) -> bool:
+        """Store a document; returns False if it was already stored."""
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO documents VALUES (?, ?, ?, ?, ?)",
+                (content_hash, len(pages), sum(len(p) for p in pages), parser_version,
+                 datetime.now(timezone.utc).isoformat(timespec='seconds')))
+            if cur.rowcount == 0:
+                return False
+            start = 0
+            for page_no, text in enumerate(pages, start=1):
+                conn.execute("INSERT INTO pages (content_hash, page_no, start, text) VALUES (?, ?, ?, ?)",
+                             (content_hash, page_no, start, text))
+                start += len(text)
+            conn.executemany("INSERT INTO sections VALUES (?, ?, ?, ?)",
+                             [(content_hash, n, s, e) for n, (s, e) in sorted(sections.items())])
+        return True
+
+    def pages(self, content_hash: str) -> List[str]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT text FROM pages WHERE content_hash = ? ORDER BY page_no", (content_hash,))
+            return [r[0] for r in rows]
+
+    def text(self, content_hash: str) -> str:
+        """The joined document text, as ``extract_text`` returned it."""
+        return "".join(self.pages(content_hash))
+
+    def sections(self, content_hash: str) -> Dict[int, Tuple[int, int]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT number, start, end FROM sections WHERE content_hash = ?", (content_hash,))
+            return {n: (s, e) for n, s, e in rows}
+
+    def documents(self) -> Iterator[Tuple[str, str, Dict[int, Tuple[int, int]]]]:
+        """Yield ``(content_hash, text, sections)`` for every stored document."""
+        with closing(self._connect()) as conn:
+            hashes = [r[0] for r in conn.execute("SELECT content_hash FROM documents ORDER BY stored_at")]
+        for content_hash in hashes:
+            yield content_hash, self.text(content_hash), self.sections(content_hash)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over page text (FTS5 query syntax when available)."""
+        with closing(self._connect()) as conn:
+            if self.fts:
+                rows = conn.execute(
+                    "SELECT p.content_hash, p.page_no, snippet(pages_fts, 0, '[', ']', '...', 12) "
+                    "FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid "
+                    "WHERE pages_fts MATCH ? ORDER BY rank LIMIT ?", (query, limit))
+            else:
+                rows = conn.execute(
+                    "SELECT content_hash, page_no, substr(text, max(1, instr(lower(text), lower(?)) - 40), 100) "
+                    "FROM pages WHERE instr(lower(text), lower(?)) > 0 LIMIT ?", (query, query, limit))
+            return [{'content_hash': h, 'page': n, 'snippet': snip} for h, n, snip in rows]
+
+    def reextract(self, extractor: Callable[[str, Dict[int, Tuple[int, int]]], Any]) -> Iterator[Tuple[str, Any]]:
+        """Run ``extractor(text, sections)`` over every stored document."""
+        for content_hash, text, sections in self.documents():
+            try:
+                yield content_hash, extractor(text, sections)
+            except Exception as e:
+                logger.warning(f"[TEXT_STORE] Extractor failed on {content_hash[:12]}: {type(e).__name__}: {e}")
+                yield content_hash, None
+
+    def stats(self) -> Dict[str, Any]:
+        with closing(self._connect()) as conn:
+            docs, chars = conn.execute("SELECT count(*), coalesce(sum(char_count), 0) FROM documents").fetchone()
+            pages = conn.execute("SELECT count(*) FROM pages").fetchone()[0]
+        return {'documents': docs, 'pages': pages, 'chars': chars, 'fts5': self.fts,
+                'bytes': self.path.stat().st_size if self.path.exists() else 0}
+
+
+_store: Optional[TextStore] = None
+
+
+def default_store() -> Optional[TextStore]:
+    """The store configured by ``SDS_TEXT_STORE``, or None when disabled."""
+    global _store
+    path = os.getenv("SDS_TEXT_STORE", "sds_text_store.sqlite")
+    if not path:
+        return None
+    if _store is None or _store.path != Path(path):
+        _store = TextStore(Path(path))
+    return _store
+
+
+def remember(path: Path, pages: List[str], sections: Dict[int, Tuple[int, int]],
+             parser_version: Optional[str] = None) -> Optional[str]:
+    """Record a parsed PDF in the default store; never raises."""
+    try:
+        store = default_store()
+        if store is None:
+            return None
+        content_hash = file_hash(path)
+        if store.put(content_hash, pages, sections, parser_version):
+            logger.info(f"[TEXT_STORE] Stored {len(pages)} pages for {content_hash[:12]}")
+        return content_hash
+    except Exception as e:
+        logger.warning(f"[TEXT_STORE] Could not store text for {path}: {type(e).__name__}: {e}")
+        return None
+
+
+def _section(text: str, sections: Dict[int, Tuple[int, int]], number: int) -> str:
+    span = sections.get(number)
+    return text[span[0]:span[1]] if span else ''
+
+
+def _extractors() -> Dict[str, Callable[[str, Dict[int, Tuple[int, int]]], Any]]:
+    import re
+    from .sds_extractor import extract_issue_date, section14_text_value
+    from .section14_table import clean_transport_value
+
+    def section14(field: str):
+        # the text half of a live parse; table-only values need the PDF
+        return lambda text, secs: clean_transport_value(field, section14_text_value(_section(text, secs, 14), field))
+
+    return {
+        'issue_date': lambda text, secs: extract_issue_date(text)['value'],
+        'un_number': section14('un_number'),
+        'dangerous_goods_class': section14('dangerous_goods_class'),
+        'subsidiary_risk': section14('subsidiary_risk'),
+        'packing_group': section14('packing_group'),
+        'hazard_codes': lambda text, secs: sorted(set(re.findall(
+            r'\b(?:EU)?H\d{3}[A-Za-z]{0,2}\b', _section(text, secs, 2) or text))),
+        'precautionary_codes': lambda text, secs: sorted(set(re.findall(
+            r'\bP\d{3}(?:\s*\+\s*P\d{3})*\b', _section(text, secs, 2) or text))),
+    }
+
+
+def main(argv: Optional[list] = None) -> int:
+    extractors = _extractors()
+    parser = argparse.ArgumentParser(description='Query and re-extract the stored SDS text corpus')
+    parser.add_argument('--db', default=os.getenv("SDS_TEXT_STORE") or "sds_text_store.sqlite")
+    sub = parser.add_subparsers(dest='command', required=True)
+    search = sub.add_parser('search', help='full-text search over page text')
+    search.add_argument('query')
+    search.add_argument('--limit', type=int, default=20)
+    reextract = sub.add_parser('reextract', help='run an extractor over every stored document (JSON lines)')
+    reextract.add_argument('field', choices=sorted(extractors))
+    sub.add_parser('stats')
+    args = parser.parse_args(argv)
+
+    store = TextStore(Path(args.db))
+    if args.command == 'search':
+        for hit in store.search(args.query, args.limit):
+            print(json.dumps(hit, ensure_ascii=False))
+    elif args.command == 'reextract':
+        for content_hash, value in store.reextract(extractors[args.field]):
+            print(json.dumps({'content_hash': content_hash, args.field: value}, ensure_ascii=False))
+    else:
+        print(json.dumps(store.stats(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
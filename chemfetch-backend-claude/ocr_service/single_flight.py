@@ -0,0 +1,101 @@
+"""
+Single-flight coalescing of identical in-progress requests.
+
+When several callers ask to verify or parse the same PDF (or OCR the same
+upload) at the same moment, the first one runs the work and the rest wait
+for its result instead of downloading and parsing the file again. Keys are
+``(endpoint, ...)`` tuples built from the normalised URL or the upload's
+SHA-256; a waiter gives up after the per-call timeout. Results and
+exceptions are shared as-is, so callers must not mutate what they get back.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class CoalesceTimeout(Exception):
+    """Raised to a waiter whose in-flight leader did not finish in time."""
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, timeout: float = 180.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _group(key: Hashable) -> str:
+        return str(key[0]) if isinstance(key, tuple) and key else 'default'
+
+    def _count(self, key: Hashable, stat: str) -> None:
+        counts = self._stats.setdefault(self._group(key), {'executed': 0, 'coalesced': 0, 'failed': 0, 'wait_timeouts': 0})
+        counts[stat] += 1
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Run ``fn`` once per concurrent ``key``; return ``(result, shared)``."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._count(key, 'executed')
+            else:
+                call.waiters += 1
+                self._count(key, 'coalesced')
+
+        if not leader:
+            if not call.done.wait(self.timeout if timeout is None else timeout):
+                with self._lock:
+                    self._count(key, 'wait_timeouts')
+                raise CoalesceTimeout(f"Timed out waiting for an identical in-flight request ({self._group(key)})")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._count(key, 'failed')
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {group: dict(counts) for group, counts in self._stats.items()}
+            out['in_flight'] = len(self._calls)
+            out['waiting'] = sum(c.waiters for c in self._calls.values())
+        return out
+
+
+def normalise_url(url: str) -> str:
+    """Canonical form of ``url`` for coalescing: case, default port, query order."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    userinfo = parts.netloc.rpartition('@')[0]
+    if userinfo:
+        host = f"{userinfo}@{host}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
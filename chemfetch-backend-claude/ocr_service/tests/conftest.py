@@ -0,0 +1,10 @@
+"""Shared setup for the OCR service tests: run from ocr_service/ with
+``python -m pytest``. Nothing here writes the local SDS text store unless a
+test points ``SDS_TEXT_STORE`` at a temporary file."""
+
+import os
+import sys
+from pathlib import Path
+
+os.environ["SDS_TEXT_STORE"] = ""
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
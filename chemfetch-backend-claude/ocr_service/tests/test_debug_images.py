@@ -0,0 +1,39 @@
+import numpy as np
+from PIL import Image
+
+from debug_images import DebugImageWriter
+from memory_budget import MemoryBudget
+
+
+def test_queued_capture_held_against_budget_until_written(tmp_path):
+    budget = MemoryBudget(total_bytes=1_000_000, wait_seconds=0)
+    writer = DebugImageWriter(tmp_path, budget=budget)
+    image = Image.new('RGB', (100, 100), 'white')
+
+    assert writer.submit('a.jpg', image)
+    writer._queue.join()
+    assert (tmp_path / 'a.jpg').exists()
+    assert budget.stats()['in_use_bytes'] == 0
+    assert budget.stats()['peak_bytes'] >= 100 * 100 * 3
+    assert budget.stats()['admitted'] == 0
+
+
+def test_capture_dropped_when_budget_full(tmp_path):
+    budget = MemoryBudget(total_bytes=10_000, wait_seconds=0)
+    writer = DebugImageWriter(tmp_path, budget=budget)
+
+    assert not writer.submit('big.jpg', np.zeros((100, 100, 3), dtype=np.uint8))
+    assert writer.stats()['dropped'] == 1
+    assert budget.stats()['in_use_bytes'] == 0
+    assert budget.stats()['rejected'] == 0
+
+
+def test_capture_dropped_when_queue_full_releases_budget(tmp_path):
+    budget = MemoryBudget(total_bytes=1_000_000, wait_seconds=0)
+    writer = DebugImageWriter(tmp_path, max_queue=1, budget=budget)
+    writer._thread = object()  # keep the writer thread from draining the queue
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+
+    assert writer.submit('1.jpg', image)
+    assert not writer.submit('2.jpg', image)
+    assert budget.stats()['in_use_bytes'] == image.nbytes
@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+from sds_parser_new.sds_extractor import extract_section14_field, FIELD_LABELS, parse_text
+
+HEAD = "1. IDENTIFICATION\nProduct Name: Bench Solvent\n14. TRANSPORT INFORMATION\n"
+
+
+@pytest.mark.parametrize("body", [
+    " \n" * 10000,
+    "\t\t\t\n" * 5000,
+    " \t" * 10000 + "\n",
+    ("x" + "\t" * 498 + "x\n") * 40,
+], ids=['whitespace lines', 'tab lines', 'whitespace line', 'tab runs inside lines'])
+def test_whitespace_only_section14_is_fast(body):
+    start = time.perf_counter()
+    result = parse_text(HEAD + body, fields=['section14'])
+    assert time.perf_counter() - start < 1.0
+    assert result['un_number']['value'] is None
+
+
+def test_whitespace_runs_do_not_hide_values():
+    sec14 = "UN Number:\t\t   1993\n\n\t\nADG   Hazard \t Class:   3\n"
+    assert extract_section14_field(sec14, FIELD_LABELS['un_number'], r'(?:UN\s*)?\d{4}') == '1993'
+    assert extract_section14_field(sec14, FIELD_LABELS['dangerous_goods_class'], r'\d[0-9A-Za-z\.]*') == '3'
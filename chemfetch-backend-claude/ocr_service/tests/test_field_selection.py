@@ -0,0 +1,60 @@
+import pytest
+
+import parse_sds
+from parse_sds import attach_status, transform_to_chemfetch_format
+from sds_parser_new.sds_extractor import ALL_FIELDS, parse_text, resolve_fields
+
+SDS = ("1. IDENTIFICATION\nProduct Name: Thinner\nManufacturer: Acme Chemicals\n"
+       "14. TRANSPORT INFORMATION\nUN Number: 1993\nClass: 3\nPacking Group: II\n15. REGULATORY\n")
+VALIDATORS = {'etag': '"v1"', 'content_hash': 'abc', 'parser_version': parse_sds.parser_version()}
+
+
+def test_resolve_fields_expands_groups():
+    assert resolve_fields(None) == ALL_FIELDS
+    assert resolve_fields('section14,issue_date') == (
+        'un_number', 'dangerous_goods_class', 'subsidiary_risk', 'packing_group', 'issue_date')
+    with pytest.raises(ValueError):
+        resolve_fields(['colour'])
+
+
+def test_selective_parse_lists_skipped_fields():
+    result = parse_text(SDS, fields=['dangerous_goods_class'])
+    assert result['dangerous_goods_class']['value'] == '3'
+    assert 'manufacturer' not in result
+    assert set(result['skipped_fields']) == set(ALL_FIELDS) - {'dangerous_goods_class'}
+
+
+def test_full_parse_has_no_skipped_fields():
+    assert 'skipped_fields' not in parse_text(SDS)
+
+
+def test_skipped_fields_are_unknown_not_false():
+    out = transform_to_chemfetch_format(parse_text(SDS, fields=['packing_group']), 7)
+    assert out['packing_group'] == 'II'
+    for key in ('vendor', 'product_name', 'issue_date', 'hazardous_substance', 'dangerous_good',
+                'dangerous_goods_class', 'subsidiary_risks'):
+        assert out[key] is None, key
+
+
+def test_full_transform_keeps_defaults():
+    out = transform_to_chemfetch_format(parse_text(SDS), 7)
+    assert out['vendor'] == 'Acme Chemicals'
+    assert out['dangerous_good'] is True and out['subsidiary_risks'] == []
+
+
+def test_partial_result_carries_no_validators():
+    partial = attach_status(transform_to_chemfetch_format(parse_text(SDS, fields=['section1']), 7), VALIDATORS)
+    assert partial['status'] == 'partial' and partial['validators'] is None
+    full = attach_status(transform_to_chemfetch_format(parse_text(SDS), 7), VALIDATORS)
+    assert full['status'] == 'changed' and full['validators'] == VALIDATORS
+
+
+def test_parse_sds_pdf_partial(monkeypatch, tmp_path):
+    pdf = tmp_path / "sds.pdf"
+    pdf.write_bytes(b'%PDF-1.4')
+    monkeypatch.setattr(parse_sds, 'download_pdf', lambda url, temp_dir, previous=None: (pdf, dict(VALIDATORS)))
+    monkeypatch.setattr(parse_sds, 'parse_pdf', lambda path, fields=None: parse_text(SDS, fields=fields))
+    result = parse_sds.parse_sds_pdf("https://example.com/sds.pdf", 7, fields=['section14'])
+    assert result['status'] == 'partial'
+    assert result['validators'] is None
+    assert result['vendor'] is None and result['dangerous_goods_class'] == '3'
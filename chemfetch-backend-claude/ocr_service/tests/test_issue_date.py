@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+
+from sds_parser_new import sds_extractor
+from sds_parser_new.sds_extractor import extract_issue_date, normalise_date
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("03/05/2020", date(2020, 5, 3)),
+    ("13/05/2020", date(2020, 5, 13)),
+    ("05.03.2020", date(2020, 3, 5)),
+    ("5-3-20", date(2020, 3, 5)),
+    ("2020-05-03", date(2020, 5, 3)),
+    ("May 3, 2020", date(2020, 5, 3)),
+    ("3 May 2020", date(2020, 5, 3)),
+])
+def test_numeric_dates_are_day_first(raw, expected):
+    assert normalise_date(raw) == expected
+
+
+def test_every_numeric_date_uses_the_same_order():
+    # the old month-first reading gave 2020-03-05 for one and 2020-05-13 for the other
+    assert normalise_date("03/05/2020").month == normalise_date("13/05/2020").month == 5
+
+
+def test_wrong_order_is_not_swapped():
+    assert normalise_date("05/13/2020") is None
+    assert normalise_date("05/13/2020", dayfirst=False) == date(2020, 5, 13)
+
+
+def test_month_first_setting(monkeypatch):
+    monkeypatch.setattr(sds_extractor, "DATE_DAYFIRST", False)
+    assert normalise_date("03/05/2020") == date(2020, 3, 5)
+    assert normalise_date("13/05/2020") is None
+
+
+def test_issue_date_from_header():
+    text = "SAFETY DATA SHEET\nIssue Date: 03/05/2020\n1. IDENTIFICATION\nProduct Name: Thinner\n"
+    found = extract_issue_date(text)
+    assert found == {'value': '2020-05-03', 'confidence': 1.0, 'label': 'Issue Date', 'raw': '03/05/2020'}
+
+
+def test_issue_label_preferred_over_revision():
+    text = "Revision Date: 01/02/2021\nDate of issue: 15/06/2019\n1. IDENTIFICATION\n"
+    assert extract_issue_date(text)['value'] == '2019-06-15'
+
+
+def test_ambiguous_date_left_unnormalised():
+    found = extract_issue_date("Issue Date: 05/13/2020\n1. IDENTIFICATION\n")
+    assert found['value'] is None
+    assert found['confidence'] == 0.0
+    assert found['raw'] == '05/13/2020'
+
+
+def test_readable_date_later_in_document_beats_unreadable_one():
+    text = "Issue Date: 05/13/2020\n1. IDENTIFICATION\n" + "filler\n" * 50 + "Revision Date: 01/02/2021\n"
+    assert extract_issue_date(text)['value'] == '2021-02-01'
+
+
+def test_future_dates_ignored():
+    assert extract_issue_date("Issue Date: 01/01/2999\n")['value'] is None
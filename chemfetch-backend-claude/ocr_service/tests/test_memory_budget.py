@@ -0,0 +1,41 @@
+import pytest
+
+import ocr_profiles
+from memory_budget import MB, BudgetExceeded, MemoryBudget
+
+
+def test_reserve_releases_on_exit():
+    budget = MemoryBudget(total_bytes=10 * MB, wait_seconds=0)
+    with budget.reserve(6 * MB):
+        assert budget.stats()['in_use_bytes'] == 6 * MB
+        with pytest.raises(BudgetExceeded):
+            with budget.reserve(6 * MB):
+                pass
+    assert budget.stats()['in_use_bytes'] == 0
+
+
+def test_set_aside_shrinks_what_requests_can_reserve():
+    budget = MemoryBudget(total_bytes=10 * MB, wait_seconds=0)
+    budget.set_aside(4 * MB, "extra models")
+    assert budget.stats()['total_bytes'] == 6 * MB
+    assert budget.stats()['set_aside_bytes'] == 4 * MB
+    with pytest.raises(BudgetExceeded):
+        with budget.reserve(7 * MB):
+            pass
+
+
+def test_load_profiles_records_resident_growth(monkeypatch):
+    rss = iter([100 * MB, 140 * MB, 140 * MB, 400 * MB])
+    monkeypatch.setattr(ocr_profiles, 'current_rss_bytes', lambda: next(rss))
+    monkeypatch.setattr(ocr_profiles, 'build_model', lambda name: object())
+    monkeypatch.setattr(ocr_profiles, 'MODEL_BYTES', {})
+    ocr_profiles.load_profiles(['fast', 'accurate'])
+    assert ocr_profiles.MODEL_BYTES == {'fast': 40 * MB, 'accurate': 260 * MB}
+
+
+def test_load_profiles_falls_back_without_rss(monkeypatch):
+    monkeypatch.setattr(ocr_profiles, 'current_rss_bytes', lambda: None)
+    monkeypatch.setattr(ocr_profiles, 'build_model', lambda name: object())
+    monkeypatch.setattr(ocr_profiles, 'MODEL_BYTES', {})
+    ocr_profiles.load_profiles(['fast'])
+    assert ocr_profiles.MODEL_BYTES == {'fast': ocr_profiles.MODEL_BYTES_FALLBACK}
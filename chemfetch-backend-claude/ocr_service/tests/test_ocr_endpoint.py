@@ -0,0 +1,94 @@
+import io
+
+import pytest
+from PIL import Image
+
+import ocr_service
+
+
+@pytest.fixture
+def client():
+    return ocr_service.app.test_client()
+
+
+def png_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (40, 20), 'white').save(buf, format='PNG')
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("query, headers", [
+    ({'format': 'msgpack'}, {}),
+    ({}, {'Accept': 'application/x-msgpack'}),
+])
+def test_msgpack_unavailable_rejected_before_work(client, monkeypatch, query, headers):
+    def no_work(*args, **kwargs):
+        raise AssertionError("OCR work started for an unanswerable request")
+
+    monkeypatch.setattr(ocr_service, 'msgpack', None)
+    monkeypatch.setattr(ocr_service.inflight, 'do', no_work)
+    monkeypatch.setattr(ocr_service, '_ocr_image', no_work)
+    resp = client.post('/ocr', query_string=query, headers=headers,
+                       data={'image': (io.BytesIO(png_bytes()), 'label.png')},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 406
+    assert 'msgpack' in resp.get_json()['error']
+
+
+def test_columnar_payload_matches_lines_payload():
+    pp = ocr_service.postprocess_ocr(['Class:', '3', 'UN1993'], [0.91, 0.8, 0.95],
+                                     [[10, 10, 60, 30], [80, 12, 90, 30], [10, 50, 70, 70]])
+    columnar = ocr_service.columnar_payload(pp)
+    lines = ocr_service.lines_payload(pp)
+    assert columnar['texts'] == [line['text'] for line in lines] == ['Class:', '3', 'UN1993']
+    assert columnar['line_ids'] == [line['line'] for line in lines] == [0, 0, 1]
+    assert columnar['boxes'][0] == [10.0, 10.0, 60.0, 30.0]
+    assert columnar['scores'] == [0.91, 0.8, 0.95]
+
+
+def test_low_confidence_and_tiny_boxes_dropped():
+    pp = ocr_service.postprocess_ocr(['keep', 'faint', 'speck'], [0.9, 0.2, 0.9],
+                                     [[0, 0, 50, 20], [0, 30, 50, 50], [0, 60, 2, 62]],
+                                     min_confidence=0.5, min_area=10)
+    assert pp['texts'] == ['keep'] and pp['dropped'] == 2
+
+
+def test_ungrouped_output_keeps_paddle_order():
+    boxes = [[80, 12, 90, 30], [10, 10, 60, 30], [10, 50, 70, 70]]
+    pp = ocr_service.postprocess_ocr(['3', 'Class:', 'UN1993'], [0.8, 0.91, 0.95], boxes, group=False)
+    assert ocr_service.joined_text(pp) == '3\nClass:\nUN1993'
+    lines = ocr_service.lines_payload(pp)
+    assert [line['text'] for line in lines] == ['3', 'Class:', 'UN1993']
+    assert all(set(line) == {'text', 'confidence', 'box'} for line in lines)
+
+
+@pytest.mark.parametrize("query, text, has_line", [
+    ({}, '3\nClass:', False),
+    ({'group_lines': '1'}, 'Class: 3', True),
+])
+def test_line_grouping_is_opt_in(client, monkeypatch, query, text, has_line):
+    class Model:
+        def predict(self, img):
+            return [{'rec_texts': ['3', 'Class:'], 'rec_scores': [0.9, 0.9],
+                     'rec_boxes': [[80, 10, 90, 30], [10, 10, 60, 30]]}]
+
+    monkeypatch.setitem(ocr_service.ocr_models, ocr_service.DEFAULT_PROFILE, Model())
+    resp = client.post('/ocr', query_string=query,
+                       data={'image': (io.BytesIO(png_bytes()), 'label.png')},
+                       content_type='multipart/form-data')
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body['text'] == text
+    assert all(('line' in line) == has_line for line in body['lines'])
+
+
+def test_parse_sds_returns_the_cli_fields(client, monkeypatch):
+    def parse(url, product_id, previous=None, fields=None):
+        return {'product_id': product_id, 'product_name': 'Isocol', 'vendor': 'Acme',
+                'status': 'changed', 'validators': {'content_hash': 'h'}}
+
+    monkeypatch.setattr(ocr_service, 'parse_sds_pdf', parse)
+    resp = client.post('/parse-sds', json={'product_id': 7, 'pdf_url': 'https://example.com/a.pdf'})
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body['product_name'] == 'Isocol' and body['validators'] == {'content_hash': 'h'}
@@ -0,0 +1,45 @@
+import numpy as np
+from PIL import Image
+
+from sds_parser_new.ocr_backends import PaddleBackend, page_text
+from sds_parser_new.ocr_layout import group_lines, joined_text, postprocess_ocr
+
+
+def test_boxes_on_one_line_join_with_spaces():
+    # [x0, y0, x1, y1] rectangles, deliberately out of reading order
+    boxes = [[120, 10, 200, 30], [10, 12, 100, 30], [10, 50, 90, 70]]
+    pp = postprocess_ocr(['Number:', 'UN', '1993'], [0.9, 0.9, 0.9], boxes)
+    assert joined_text(pp) == 'UN Number:\n1993'
+
+
+def test_group_lines_empty():
+    order, line_ids = group_lines(np.zeros((0, 4, 2), dtype=np.float32))
+    assert len(order) == 0 and len(line_ids) == 0
+
+
+def test_page_text_uses_line_grouping():
+    res = {'rec_texts': ['3', 'Class:'], 'rec_scores': [0.9, 0.9],
+           'rec_boxes': np.array([[80, 10, 90, 30], [10, 10, 60, 30]])}
+    assert page_text(res) == 'Class: 3'
+
+
+def test_page_text_without_boxes_keeps_one_line_per_text():
+    assert page_text({'rec_texts': ['a', 'b']}) == 'a\nb'
+    assert page_text(None) == ''
+
+
+def test_paddle_backend_batches_pages():
+    class Model:
+        def __init__(self):
+            self.batches = []
+
+        def predict(self, batch):
+            self.batches.append(len(batch))
+            return [{'rec_texts': ['UN', '1993'], 'rec_scores': [1, 1],
+                     'rec_boxes': [[0, 0, 20, 10], [30, 0, 60, 10]]} for _ in batch]
+
+    model = Model()
+    backend = PaddleBackend(model, batch_size=2)
+    pages = [Image.new('RGB', (20, 20)) for _ in range(3)]
+    assert backend.recognise(pages) == ['UN 1993'] * 3
+    assert model.batches == [2, 1]
@@ -0,0 +1,28 @@
+import importlib
+
+import pytest
+
+import ocr_profiles
+
+
+@pytest.fixture
+def reload_profiles(monkeypatch):
+    def reload(**env):
+        for name in ('OCR_PROFILE', 'OCR_PROFILES'):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(ocr_profiles)
+    yield reload
+    monkeypatch.undo()
+    importlib.reload(ocr_profiles)
+
+
+def test_only_default_profile_enabled_by_default(reload_profiles):
+    assert reload_profiles().ENABLED_PROFILES == ['balanced']
+    assert reload_profiles(OCR_PROFILE='fast').ENABLED_PROFILES == ['fast']
+
+
+def test_extra_profiles_are_opt_in(reload_profiles):
+    module = reload_profiles(OCR_PROFILES='balanced, accurate')
+    assert module.ENABLED_PROFILES == ['balanced', 'accurate']
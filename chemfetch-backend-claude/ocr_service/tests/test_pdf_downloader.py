@@ -0,0 +1,122 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import pdf_downloader
+from pdf_downloader import Downloader, DownloadRejected
+
+PDF = b'%PDF-1.4\n' + b'x' * 2000 + b'\n%%EOF\n'
+
+
+class Handler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body, status=200, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if 'Content-Length' not in (headers or {}):
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        hits = Handler.hits[self.path] = Handler.hits.get(self.path, 0) + 1
+        if self.path == '/sds.pdf':
+            self.send_body(PDF, headers={'ETag': '"v1"'})
+        elif self.path == '/conditional.pdf':
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_body(b'', 304)
+            else:
+                self.send_body(PDF, headers={'ETag': '"v1"'})
+        elif self.path == '/bom.pdf':
+            self.send_body(b'\xef\xbb\xbf\r\n' + PDF)
+        elif self.path == '/page.html':
+            self.send_body(b'<html>not a pdf</html>', headers={'Content-Type': 'application/pdf'})
+        elif self.path == '/flaky.pdf':
+            self.send_body(PDF) if hits > 2 else self.send_body(b'busy', 503)
+        elif self.path == '/down.pdf':
+            self.send_body(b'busy', 503)
+        elif self.path == '/missing.pdf':
+            self.send_body(b'gone', 404)
+        elif self.path == '/big-declared.pdf':
+            self.send_body(PDF, headers={'Content-Length': str(10 * 1024 * 1024)})
+        elif self.path == '/big.pdf':
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(PDF + b'y' * 100_000)
+            self.close_connection = True
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+@pytest.fixture
+def downloader(monkeypatch):
+    monkeypatch.setattr(pdf_downloader, 'BACKOFF_SECONDS', 0.0)
+    Handler.hits.clear()
+    d = Downloader(max_bytes=50_000, retries=2)
+    d.session.trust_env = False  # no proxies for the local server
+    return d
+
+
+def test_fetch_writes_body_and_hash(server, downloader):
+    sink = io.BytesIO()
+    result = downloader.fetch(f"{server}/sds.pdf", sink)
+    assert sink.getvalue() == PDF
+    assert (result.status, result.size, result.attempts) == (200, len(PDF), 1)
+    assert result.content_hash and result.headers['ETag'] == '"v1"'
+
+
+def test_not_modified(server, downloader):
+    result = downloader.fetch(f"{server}/conditional.pdf", io.BytesIO(), headers={'If-None-Match': '"v1"'})
+    assert result.not_modified and result.size == 0
+
+
+def test_header_after_leading_bytes_accepted(server, downloader):
+    sink = io.BytesIO()
+    downloader.fetch(f"{server}/bom.pdf", sink)
+    assert sink.getvalue().endswith(PDF)
+
+
+def test_non_pdf_rejected_without_retry(server, downloader):
+    with pytest.raises(DownloadRejected, match='not a PDF'):
+        downloader.fetch(f"{server}/page.html", io.BytesIO())
+    assert Handler.hits['/page.html'] == 1
+
+
+def test_transient_errors_retried(server, downloader):
+    sink = io.BytesIO()
+    result = downloader.fetch(f"{server}/flaky.pdf", sink)
+    assert result.attempts == 3 and sink.getvalue() == PDF
+    assert downloader.stats()['hosts']['127.0.0.1']['retries'] == 2
+
+
+def test_retries_give_up(server, downloader):
+    with pytest.raises(requests.HTTPError):
+        downloader.fetch(f"{server}/down.pdf", io.BytesIO())
+    assert Handler.hits['/down.pdf'] == 3
+
+
+def test_client_errors_not_retried(server, downloader):
+    with pytest.raises(requests.HTTPError):
+        downloader.fetch(f"{server}/missing.pdf", io.BytesIO())
+    assert Handler.hits['/missing.pdf'] == 1
+
+
+@pytest.mark.parametrize('path', ['/big-declared.pdf', '/big.pdf'])
+def test_size_cap(server, downloader, path):
+    with pytest.raises(DownloadRejected, match='too large'):
+        downloader.fetch(f"{server}{path}", io.BytesIO())
+    assert Handler.hits[path] == 1
@@ -0,0 +1,55 @@
+import pytest
+from flask import Flask, jsonify
+
+import request_profiler
+from request_profiler import profiled
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(request_profiler, 'ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(request_profiler, 'PROFILE_DIR', tmp_path)
+    app = Flask(__name__)
+
+    @app.route('/work')
+    @profiled
+    def work():
+        return jsonify({'total': sum(i * i for i in range(20000))})
+
+    return app.test_client()
+
+
+def test_unprofiled_without_token(client):
+    resp = client.get('/work', headers={'X-Profile': 'cprofile'})
+    assert 'profile' not in resp.get_json()
+    assert 'X-Profile-Id' not in resp.headers
+
+
+@pytest.mark.parametrize('token', ['guess', 'sécret'])
+def test_unprofiled_with_wrong_token(client, token):
+    resp = client.get('/work', headers={'X-Profile': 'cprofile', 'X-Admin-Token': token})
+    assert resp.status_code == 200
+    assert 'profile' not in resp.get_json()
+
+
+def test_non_ascii_admin_token(client, monkeypatch):
+    monkeypatch.setattr(request_profiler, 'ADMIN_TOKEN', 'sécret')
+    resp = client.get('/work', headers={'X-Profile': 'cprofile', 'X-Admin-Token': 'sécret'})
+    assert resp.get_json()['profile']['mode'] == 'cprofile'
+
+
+@pytest.mark.parametrize('mode, suffix', [('cprofile', '.pstats'), ('sample', '.collapsed')])
+def test_profile_attached_and_saved(client, tmp_path, mode, suffix):
+    resp = client.get('/work', headers={'X-Profile': mode, 'X-Admin-Token': 'secret'})
+    body = resp.get_json()
+    assert body['total'] == sum(i * i for i in range(20000))
+    assert body['profile']['mode'] == mode
+    assert resp.headers['X-Profile-Id'].endswith(suffix)
+    assert (tmp_path / resp.headers['X-Profile-Id']).exists()
+
+
+def test_top_from_samples_ranks_self_time():
+    stacks = {'main;parse;regex': 8, 'main;parse': 2, 'main;download': 5}
+    top = request_profiler.top_from_samples(stacks, ms_per_sample=1.0)
+    assert top[0] == {'function': 'regex', 'self_ms': 8.0, 'cum_ms': 8.0}
+    assert {'function': 'main', 'self_ms': 0.0, 'cum_ms': 15.0} in top
@@ -0,0 +1,50 @@
+from parse_sds import conditional_headers, is_unchanged, parser_version
+
+STORED = {'etag': '"v1"', 'last_modified': 'Tue, 01 Aug 2023 00:00:00 GMT',
+          'content_hash': 'abc', 'parser_version': parser_version()}
+
+
+def test_conditional_headers_replay_stored_validators():
+    assert conditional_headers(STORED) == {'If-None-Match': '"v1"',
+                                           'If-Modified-Since': 'Tue, 01 Aug 2023 00:00:00 GMT'}
+
+
+def test_no_conditional_request_after_parser_change():
+    assert conditional_headers(dict(STORED, parser_version='0-old')) == {}
+    assert conditional_headers(None) == {}
+
+
+def test_not_modified_is_unchanged():
+    assert is_unchanged(STORED, {'not_modified': True})
+
+
+def test_same_bytes_are_unchanged():
+    assert is_unchanged(STORED, {'content_hash': 'abc'})
+    assert not is_unchanged(STORED, {'content_hash': 'def'})
+
+
+def test_parser_change_forces_reparse():
+    assert not is_unchanged(dict(STORED, parser_version='0-old'), {'not_modified': True})
+
+
+def test_fingerprint_covers_ocr_backend_and_table_rules(monkeypatch):
+    from sds_parser_new import sds_extractor, section14_table
+
+    base = sds_extractor.parser_fingerprint('tesseract')
+    assert sds_extractor.parser_fingerprint('paddle') != base
+    sds_extractor.parser_fingerprint.cache_clear()
+    monkeypatch.setattr(section14_table, 'TABLE_REVISION', section14_table.TABLE_REVISION + 1)
+    try:
+        assert sds_extractor.parser_fingerprint('tesseract') != base
+    finally:
+        sds_extractor.parser_fingerprint.cache_clear()
+
+
+def test_parser_version_follows_the_active_backend(monkeypatch):
+    from sds_parser_new import ocr_backends, sds_extractor
+
+    monkeypatch.setattr(ocr_backends, '_active', 'tesseract')
+    assert sds_extractor.parser_version() == sds_extractor.PARSER_VERSION
+    monkeypatch.setitem(ocr_backends._backends, 'paddle', ocr_backends.PaddleBackend(model=None))
+    monkeypatch.setattr(ocr_backends, '_active', 'paddle')
+    assert sds_extractor.parser_version() == sds_extractor.parser_fingerprint('paddle') != sds_extractor.PARSER_VERSION
@@ -0,0 +1,106 @@
+import threading
+
+import fitz
+import pytest
+
+import ocr_service
+from sds_parser_new import sds_extractor
+
+
+class FakeScan:
+    """Stands in for pdf2image and the OCR backend: page n reads as ``texts[n - 1]``."""
+    name = 'fake'
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.rendered = []
+
+    def convert_from_path(self, path, first_page=1, last_page=None):
+        last = min(last_page or len(self.texts), len(self.texts))
+        self.rendered.append((first_page, last))
+        return list(range(first_page, last + 1))
+
+    def recognise(self, images):
+        return [self.texts[n - 1] for n in images]
+
+
+def blank_pdf(pages):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page()
+    return doc.tobytes()
+
+
+@pytest.fixture
+def scan(monkeypatch):
+    def install(texts):
+        fake = FakeScan(texts)
+        monkeypatch.setattr(sds_extractor, 'convert_from_path', fake.convert_from_path)
+        monkeypatch.setattr(sds_extractor, 'get_ocr_backend', lambda: fake)
+        return fake
+    return install
+
+
+def test_scan_rendered_and_recognised_in_batches_until_stop(tmp_path, scan):
+    fake = scan([f"page {n}" for n in range(1, 11)])
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(blank_pdf(10))
+    pages = sds_extractor.extract_pages(path, scan_stop=lambda pages: len(pages) >= 4)
+    assert pages == ["page 1", "page 2", "page 3", "page 4"]
+    assert fake.rendered == [(1, 4)]
+
+
+def test_scan_read_to_the_end_without_a_verdict(tmp_path, scan):
+    fake = scan([f"page {n}" for n in range(1, 9)])
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(blank_pdf(8))
+    assert len(sds_extractor.extract_pages(path, scan_stop=lambda pages: False)) == 8
+    assert fake.rendered == [(1, 4), (5, 8), (9, 8)]
+
+
+def test_scan_stop_does_not_cut_a_text_layer_short(tmp_path, scan):
+    fake = scan([])
+    doc = fitz.open()
+    for n in range(3):
+        doc.new_page().insert_text((50, 60), f"Section {n + 1}")
+    path = tmp_path / "text.pdf"
+    doc.save(str(path))
+    assert len(sds_extractor.extract_pages(path, scan_stop=lambda pages: True)) == 3
+    assert fake.rendered == []
+
+
+@pytest.fixture
+def fused(monkeypatch, tmp_path, scan):
+    """/verify-parse-sds on a 12-page scan whose first pages read as an SDS."""
+    scan(["Safety Data Sheet", "Section 1 Identification"] + ["text"] * 10)
+
+    def download(url, temp_dir, previous=None):
+        path = temp_dir / "scan.pdf"
+        path.write_bytes(blank_pdf(12))
+        return path, {'content_hash': 'h'}
+
+    monkeypatch.setattr(ocr_service, 'download_pdf', download)
+    monkeypatch.setattr(ocr_service, 'parse_pdf_direct', lambda path, **kwargs: {})
+    client = ocr_service.app.test_client()
+
+    def call_from_thread():
+        # Flask's threaded server runs each request off the main thread
+        out = {}
+        t = threading.Thread(target=lambda: out.update(resp=client.post(
+            '/verify-parse-sds', json={'product_id': 7, 'pdf_url': 'https://example.com/scan.pdf'})))
+        t.start()
+        t.join(10)
+        return out['resp']
+    return call_from_thread
+
+
+def test_verify_parse_runs_outside_the_main_thread(fused):
+    resp = fused()
+    assert resp.status_code == 200
+    assert resp.get_json()['verified'] is True
+
+
+def test_verify_parse_deadline_enforced_outside_the_main_thread(monkeypatch, fused):
+    monkeypatch.setattr(ocr_service, 'VERIFY_PARSE_TIMEOUT', -1)
+    resp = fused()
+    assert resp.status_code == 408
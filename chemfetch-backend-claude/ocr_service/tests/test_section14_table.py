@@ -0,0 +1,118 @@
+import fitz
+import pytest
+
+from sds_parser_new.section14_table import _label_of, clean_transport_value, extract_section14_table
+from sds_parser_new.sds_extractor import parse_text
+
+
+def make_pdf(tmp_path, rows, heading="14. TRANSPORT INFORMATION", x_value=300):
+    """One-page PDF with a section 14 label/value table, one row per (label, value)."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 60), heading, fontsize=11)
+    y = 90
+    for label, value in rows:
+        page.insert_text((50, y), label, fontsize=10)
+        page.insert_text((x_value, y), value, fontsize=10)
+        y += 20
+    page.insert_text((50, y + 20), "15. REGULATORY INFORMATION", fontsize=11)
+    path = tmp_path / "sds.pdf"
+    doc.save(str(path))
+    return path
+
+
+@pytest.mark.parametrize("label, field", [
+    ("UN number", 'un_number'),
+    ("14.1 UN number", 'un_number'),
+    ("14.1. UN No.", 'un_number'),
+    ("14.3 Transport hazard class(es)", 'dangerous_goods_class'),
+    ("Australian Dangerous Goods class", 'dangerous_goods_class'),
+    ("14.4 Packing group", 'packing_group'),
+    ("Australian Dangerous Goods packing group", 'packing_group'),
+    ("Subsidiary risk(s):", 'subsidiary_risk'),
+    ("14.2 UN proper shipping name", None),
+])
+def test_label_forms(label, field):
+    assert _label_of(label) == field
+
+
+def test_numbered_table(tmp_path):
+    path = make_pdf(tmp_path, [
+        ("14.1 UN number", "1993"),
+        ("14.2 UN proper shipping name", "FLAMMABLE LIQUID, N.O.S."),
+        ("14.3 Transport hazard class(es)", "3"),
+        ("14.4 Packing group", "III"),
+    ])
+    found = extract_section14_table(path)
+    assert found['un_number'] == 'UN1993'
+    assert found['dangerous_goods_class'] == '3'
+    assert found['packing_group'] == 'III'
+
+
+def test_australian_labels(tmp_path):
+    path = make_pdf(tmp_path, [
+        ("Australian Dangerous Goods class", "8"),
+        ("Subsidiary risk", "-"),
+        ("Australian Dangerous Goods packing group", "II"),
+    ])
+    found = extract_section14_table(path)
+    assert found['dangerous_goods_class'] == '8'
+    assert found['subsidiary_risk'] == 'none'
+    assert found['packing_group'] == 'II'
+
+
+def test_no_section14_gives_empty_fields(tmp_path):
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 60), "1. IDENTIFICATION", fontsize=11)
+    path = tmp_path / "no14.pdf"
+    doc.save(str(path))
+    assert set(extract_section14_table(path).values()) == {None}
+
+
+@pytest.mark.parametrize("field, raw, expected", [
+    ('un_number', '1993', 'UN1993'),
+    ('un_number', 'UN 1993', 'UN1993'),
+    ('un_number', ': un1993', 'UN1993'),
+    ('subsidiary_risk', '-', 'none'),
+    ('packing_group', ' II ', 'II'),
+    ('packing_group', None, None),
+])
+def test_clean_transport_value(field, raw, expected):
+    assert clean_transport_value(field, raw) == expected
+
+
+def test_text_fallback_normalised_like_table():
+    text = "1. IDENTIFICATION\nProduct Name: Thinner\n14. TRANSPORT INFORMATION\nUN Number: 1993\nClass: 3\n15. REGULATORY\n"
+    result = parse_text(text, fields=['un_number', 'dangerous_goods_class'])
+    assert result['un_number']['value'] == 'UN1993'
+    assert result['dangerous_goods_class']['value'] == '3'
+
+
+def test_stray_number_lines_do_not_move_the_table(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page()
+    rows = [
+        (60, "14 days after opening keep tightly closed", None),
+        (80, "Class", "8"),
+        (110, "14. TRANSPORT INFORMATION", None),
+        (140, "UN number", "1993"),
+        (160, "15 minutes exposure", None),
+        (180, "Class", "3"),
+        (210, "15. REGULATORY INFORMATION", None),
+    ]
+    for y, label, value in rows:
+        page.insert_text((50, y), label, fontsize=10)
+        if value:
+            page.insert_text((300, y), value, fontsize=10)
+    path = tmp_path / "stray.pdf"
+    doc.save(str(path))
+    found = extract_section14_table(path)
+    assert found['un_number'] == 'UN1993'
+    assert found['dangerous_goods_class'] == '3'
+
+
+@pytest.mark.parametrize("heading", ["SECTION 14: Transport information", "14 TRANSPORT INFORMATION",
+                                     "Section 14 - Transport"])
+def test_heading_forms(tmp_path, heading):
+    path = make_pdf(tmp_path, [("Class", "3")], heading=heading)
+    assert extract_section14_table(path)['dangerous_goods_class'] == '3'
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import CoalesceTimeout, SingleFlight, normalise_url
+
+
+def run_concurrently(n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def test_identical_calls_run_once():
+    flight = SingleFlight(timeout=5)
+    release = threading.Event()
+    calls, results = [], []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return 'parsed'
+
+    threads = run_concurrently(5, lambda: results.append(flight.do(('parse-sds', 'u'), work)))
+    while flight.stats()['waiting'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {value for value, _ in results} == {'parsed'}
+    assert flight.stats()['parse-sds'] == {'executed': 1, 'coalesced': 4, 'failed': 0, 'wait_timeouts': 0}
+
+
+def test_leader_error_shared_with_waiters():
+    flight = SingleFlight(timeout=5)
+    release = threading.Event()
+    errors = []
+
+    def work():
+        release.wait(5)
+        raise ValueError("bad pdf")
+
+    def call():
+        try:
+            flight.do(('verify-sds', 'u'), work)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = run_concurrently(3, call)
+    while flight.stats()['waiting'] < 2:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(errors) == 3 and len({id(e) for e in errors}) == 1
+
+
+def test_waiter_times_out_and_key_is_reusable():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do(('ocr', 'k'), lambda: release.wait(5)))
+    leader.start()
+    while flight.stats()['in_flight'] < 1:
+        time.sleep(0.01)
+    with pytest.raises(CoalesceTimeout):
+        flight.do(('ocr', 'k'), lambda: None, timeout=0.05)
+    release.set()
+    leader.join()
+    assert flight.do(('ocr', 'k'), lambda: 'again') == ('again', False)
+
+
+@pytest.mark.parametrize('a, b', [
+    ('HTTPS://Vendor.COM:443/sds.pdf?b=2&a=1', 'https://vendor.com/sds.pdf?a=1&b=2'),
+    ('http://vendor.com', 'http://vendor.com:80/'),
+    ('https://vendor.com/sds.pdf#page=2', 'https://vendor.com/sds.pdf'),
+])
+def test_normalise_url_equivalents(a, b):
+    assert normalise_url(a) == normalise_url(b)
+
+
+def test_normalise_url_keeps_distinct_urls_apart():
+    assert normalise_url('https://vendor.com:8443/sds.pdf') != normalise_url('https://vendor.com/sds.pdf')
+    assert normalise_url('https://vendor.com/SDS.pdf') != normalise_url('https://vendor.com/sds.pdf')
@@ -0,0 +1,42 @@
+import sqlite3
+from contextlib import closing
+
+from sds_parser_new.text_store import TextStore, _extractors
+
+SDS = ("1. IDENTIFICATION\nProduct Name: Thinner\n"
+       "14. TRANSPORT INFORMATION\nUN Number: 1993\nClass: 3\nPacking Group: II\n15. REGULATORY\n")
+
+
+def store_with(tmp_path, docs):
+    store = TextStore(tmp_path / "store.sqlite")
+    for content_hash, pages in docs.items():
+        text = "".join(pages)
+        start = text.index("14. TRANSPORT") if "14. TRANSPORT" in text else None
+        sections = {14: (start, text.index("15. REGULATORY"))} if start is not None else {}
+        store.put(content_hash, pages, sections)
+    return store
+
+
+def test_search_maps_hits_to_their_page_after_vacuum(tmp_path):
+    store = store_with(tmp_path, {'a' * 64: ["first page", "flammable liquid"], 'b' * 64: ["corrosive solid"]})
+    with closing(sqlite3.connect(str(store.path))) as conn:
+        conn.execute("DELETE FROM pages WHERE content_hash = ?", ('a' * 64,))
+        conn.commit()
+        conn.execute("VACUUM")
+    assert store.search("flammable") == []
+    [hit] = store.search("corrosive")
+    assert (hit['content_hash'], hit['page']) == ('b' * 64, 1)
+
+
+def test_put_is_idempotent(tmp_path):
+    store = store_with(tmp_path, {'a' * 64: ["page"]})
+    assert not store.put('a' * 64, ["page"], {})
+    assert store.stats()['pages'] == 1
+
+
+def test_reextract_normalises_like_a_live_parse(tmp_path):
+    store = store_with(tmp_path, {'a' * 64: [SDS]})
+    extractors = _extractors()
+    assert dict(store.reextract(extractors['un_number'])) == {'a' * 64: 'UN1993'}
+    assert dict(store.reextract(extractors['dangerous_goods_class'])) == {'a' * 64: '3'}
+    assert dict(store.reextract(extractors['packing_group'])) == {'a' * 64: 'II'}
@@ -1,9 +1,12 @@
 // scripts/forceReprocessSds.ts
 // Force reprocess ALL existing products with SDS URLs
+// By default each SDS is revalidated: the stored ETag/Last-Modified/content hash
+// and parser version are replayed and unchanged documents are skipped.
+// Pass --full to re-download and re-parse everything regardless.
 import { createServiceRoleClient } from '../server/utils/supabaseClient.js';
-import { triggerAutoSdsParsing } from '../server/utils/autoSdsParsing.js';
+import { revalidateProducts, triggerAutoSdsParsing } from '../server/utils/autoSdsParsing.js';
 
-async function forceReprocessAllProducts() {
+async function forceReprocessAllProducts(full: boolean = false) {
   try {
     console.log('🔥 FORCE REPROCESSING ALL PRODUCTS WITH SDS URLs');
     console.log('==================================================\n');
@@ -27,7 +30,15 @@ async function forceReprocessAllProducts() {
     }
 
     console.log(`📦 Found ${products.length} products with SDS URLs`);
-    console.log('🔄 Will reprocess ALL products (force=true)\n');
+
+    if (!full) {
+      console.log('🔄 Revalidating ALL products (unchanged SDS and parser are skipped)\n');
+      // Run sequentially: each revalidation waits for its parse to finish
+      await revalidateProducts(products);
+      return;
+    }
+
+    console.log('🔄 Will reprocess ALL products (force=true, --full)\n');
 
     console.log('🚀 Starting force reprocessing...');
 
@@ -83,7 +94,9 @@ if (
   process.argv[1].endsWith('forceReprocessSds.ts') ||
   process.argv[1].endsWith('forceReprocessSds.js')
 ) {
-  forceReprocessAllProducts()
+  const full = process.argv.some(arg => arg === '--full');
+
+  forceReprocessAllProducts(full)
     .then(() => {
       console.log('\n✨ Force reprocessing script completed successfully');
       console.log('📈 Monitor your backend server logs to see the parsing progress.');
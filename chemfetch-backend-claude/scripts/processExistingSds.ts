@@ -1,7 +1,7 @@
 // scripts/processExistingSds.ts
 // Run this script to process all existing products with SDS URLs
 import { createServiceRoleClient } from '../server/utils/supabaseClient.js';
-import { triggerAutoSdsParsing } from '../server/utils/autoSdsParsing.js';
+import { revalidateProducts, triggerAutoSdsParsing } from '../server/utils/autoSdsParsing.js';
 
 async function processExistingProducts(force: boolean = false) {
   try {
@@ -51,7 +51,10 @@ async function processExistingProducts(force: boolean = false) {
         return;
       }
     } else {
-      console.log(`🔄 FORCE MODE: Reprocessing all ${products.length} products`);
+      console.log(`🔄 FORCE MODE: Revalidating all ${products.length} products`);
+      // Stored validators let unchanged SDS documents be skipped without a re-parse
+      await revalidateProducts(products);
+      return;
     }
 
     console.log('🚀 Starting batch processing...');
@@ -122,7 +125,7 @@ if (
       console.log('\n✨ Script completed successfully');
       console.log('\n💡 Usage:');
       console.log('   npm run process-existing-sds        # Process only new products');
-      console.log('   npm run process-existing-sds --force # Reprocess ALL products');
+      console.log('   npm run process-existing-sds --force # Revalidate ALL products (skips unchanged)');
       process.exit(0);
     })
     .catch(error => {
@@ -1,16 +1,33 @@
 // server/utils/autoSdsParsing.ts
 import { createServiceRoleClient } from './supabaseClient';
 import logger from './logger';
+import axios from 'axios';
 import { spawn } from 'child_process';
 import path from 'path';
 
 // Use Node's built-in __dirname for CommonJS compatibility
 
+const OCR_SERVICE_URL = process.env.OCR_SERVICE_URL || 'http://127.0.0.1:5001';
+const PARSE_TIMEOUT_MS = 3 * 60 * 1000;
+
 interface AutoParseOptions {
   force?: boolean;
   delay?: number; // Optional delay in milliseconds before parsing
 }
 
+/**
+ * Validators recorded by parse_sds.py alongside each parse, stored in
+ * sds_metadata.raw_json.validators and replayed for conditional revalidation
+ */
+export interface SdsValidators {
+  etag?: string | null;
+  last_modified?: string | null;
+  content_hash?: string | null;
+  parser_version?: string | null;
+}
+
+export type SdsParseOutcome = 'changed' | 'unchanged' | 'failed';
+
 /**
  * Automatically triggers SDS parsing for a product if it has an SDS URL
  * but no existing metadata (unless force=true)
@@ -70,9 +87,238 @@ export async function triggerAutoSdsParsing(
 }
 
 /**
- * Executes the actual SDS parsing in the background
+ * Re-parse a product's SDS only if the PDF or the parser changed.
+ * Replays stored validators so parse_sds.py can issue a conditional GET and
+ * skip unchanged documents. Resolves once parsing (or the skip) is complete.
+ */
+export async function revalidateSdsParsing(productId: number): Promise<SdsParseOutcome> {
+  try {
+    const supabase = createServiceRoleClient();
+
+    const { data: product, error: productError } = await supabase
+      .from('product')
+      .select('id, name, sds_url')
+      .eq('id', productId)
+      .single();
+
+    if (productError || !product?.sds_url) {
+      logger.debug(`Auto-SDS: No SDS URL for product ${productId}`);
+      return 'failed';
+    }
+
+    const { data: existingMetadata } = await supabase
+      .from('sds_metadata')
+      .select('raw_json')
+      .eq('product_id', productId)
+      .single();
+
+    const validators = (existingMetadata?.raw_json as { validators?: SdsValidators } | null)
+      ?.validators;
+
+    return await executeSdsParsing(productId, product.sds_url, validators);
+  } catch (error) {
+    logger.error(
+      { error, productId },
+      `Auto-SDS: Failed to revalidate SDS for product ${productId}`
+    );
+    return 'failed';
+  }
+}
+
+function validatorArgs(validators?: SdsValidators): string[] {
+  if (!validators?.parser_version) {
+    return [];
+  }
+  const args = ['--parser-version', validators.parser_version];
+  if (validators.etag) args.push('--etag', validators.etag);
+  if (validators.last_modified) args.push('--last-modified', validators.last_modified);
+  if (validators.content_hash) args.push('--content-hash', validators.content_hash);
+  return args;
+}
+
+function validatorsChanged(stored: SdsValidators | undefined, fresh?: SdsValidators): boolean {
+  if (!fresh) return false;
+  return (
+    (stored?.etag ?? null) !== (fresh.etag ?? null) ||
+    (stored?.last_modified ?? null) !== (fresh.last_modified ?? null) ||
+    (stored?.content_hash ?? null) !== (fresh.content_hash ?? null)
+  );
+}
+
+/**
+ * Replace the validators stored in raw_json, leaving the parsed metadata as is.
+ * A failure here only costs a full download next time, so it is logged, not raised.
+ */
+async function storeValidators(productId: number, validators: SdsValidators): Promise<void> {
+  const supabase = createServiceRoleClient();
+  const { data, error } = await supabase
+    .from('sds_metadata')
+    .select('raw_json')
+    .eq('product_id', productId)
+    .single();
+  if (error || !data) {
+    logger.warn(
+      { error, productId },
+      `Auto-SDS: Could not read stored validators for product ${productId}`
+    );
+    return;
+  }
+
+  const rawJson = (data.raw_json ?? {}) as Record<string, unknown>;
+  const { error: updateError } = await supabase
+    .from('sds_metadata')
+    .update({ raw_json: { ...rawJson, validators } })
+    .eq('product_id', productId);
+  if (updateError) {
+    logger.warn(
+      { error: updateError, productId },
+      `Auto-SDS: Failed to store refreshed validators for product ${productId}`
+    );
+    return;
+  }
+  logger.info(`Auto-SDS: Stored refreshed validators for product ${productId}`);
+}
+
+/**
+ * Executes the actual SDS parsing in the background.
+ * The OCR service parses first so scanned PDFs are read by its resident
+ * PaddleOCR model; the parse_sds.py CLI (Tesseract) is the fallback when
+ * the service can't be reached.
+ */
+async function executeSdsParsing(
+  productId: number,
+  sdsUrl: string,
+  validators?: SdsValidators
+): Promise<SdsParseOutcome> {
+  const parsedMetadata = await parseWithService(productId, sdsUrl, validators);
+  if (parsedMetadata) {
+    return applyParseResult(productId, validators, parsedMetadata);
+  }
+  return new Promise<SdsParseOutcome>(resolve => {
+    runSdsParsing(productId, sdsUrl, validators, resolve);
+  });
+}
+
+/**
+ * POST the SDS to the OCR service's /parse-sds. Resolves to null when the
+ * service is unreachable so the caller can fall back to the CLI.
+ */
+async function parseWithService(
+  productId: number,
+  sdsUrl: string,
+  validators?: SdsValidators
+): Promise<any | null> {
+  try {
+    logger.info(`Auto-SDS: Parsing product ${productId} with the OCR service`);
+    const resp = await axios.post(
+      `${OCR_SERVICE_URL}/parse-sds`,
+      {
+        product_id: productId,
+        pdf_url: sdsUrl,
+        validators: validators?.parser_version ? validators : null,
+      },
+      { timeout: PARSE_TIMEOUT_MS, validateStatus: () => true }
+    );
+    if (resp.status !== 200) {
+      return { error: resp.data?.error || `OCR service returned ${resp.status}` };
+    }
+    return resp.data;
+  } catch (error) {
+    logger.warn(
+      { error, productId },
+      `Auto-SDS: OCR service unavailable for product ${productId}, falling back to parse_sds.py`
+    );
+    return null;
+  }
+}
+
+/**
+ * Store a parse result from the service or the CLI: refresh validators when
+ * unchanged, otherwise upsert the metadata and update watch lists.
  */
-async function executeSdsParsing(productId: number, sdsUrl: string): Promise<void> {
+async function applyParseResult(
+  productId: number,
+  validators: SdsValidators | undefined,
+  parsedMetadata: any
+): Promise<SdsParseOutcome> {
+  try {
+    if (parsedMetadata.error) {
+      logger.error(
+        { error: parsedMetadata.error, productId },
+        `Auto-SDS: Parse error for product ${productId}`
+      );
+      return 'failed';
+    }
+
+    if (parsedMetadata.status === 'unchanged') {
+      logger.info(`Auto-SDS: SDS and parser unchanged for product ${productId}, skipping`);
+      // a 304 or same-hash response can still carry a new ETag/Last-Modified;
+      // keep them so the next run's conditional GET can match
+      if (validatorsChanged(validators, parsedMetadata.validators)) {
+        await storeValidators(productId, parsedMetadata.validators);
+      }
+      return 'unchanged';
+    }
+
+    logger.debug(
+      { parsedMetadata, productId },
+      `Auto-SDS: Parsed metadata for product ${productId}`
+    );
+
+    // Store metadata in database
+    const supabase = createServiceRoleClient();
+    const { error: upsertError } = await supabase.from('sds_metadata').upsert({
+      product_id: productId,
+      vendor: parsedMetadata.vendor,
+      issue_date: parsedMetadata.issue_date,
+      hazardous_substance: parsedMetadata.hazardous_substance,
+      dangerous_good: parsedMetadata.dangerous_good,
+      dangerous_goods_class: parsedMetadata.dangerous_goods_class,
+      description: parsedMetadata.product_name,
+      packing_group: parsedMetadata.packing_group,
+      subsidiary_risks: parsedMetadata.subsidiary_risks,
+      raw_json: parsedMetadata,
+    });
+
+    if (upsertError) {
+      logger.error(
+        { error: upsertError, productId },
+        `Auto-SDS: Failed to store metadata for product ${productId}`
+      );
+      return 'failed';
+    }
+
+    // Update user watch lists
+    await supabase
+      .from('user_chemical_watch_list')
+      .update({
+        sds_available: true,
+        sds_issue_date: parsedMetadata.issue_date,
+        hazardous_substance: parsedMetadata.hazardous_substance,
+        dangerous_good: parsedMetadata.dangerous_good,
+        dangerous_goods_class: parsedMetadata.dangerous_goods_class,
+        packing_group: parsedMetadata.packing_group,
+        subsidiary_risks: parsedMetadata.subsidiary_risks,
+      })
+      .eq('product_id', productId);
+
+    logger.info(`Auto-SDS: Successfully parsed and stored metadata for product ${productId}`);
+    return 'changed';
+  } catch (dbError) {
+    logger.error(
+      { error: dbError, productId },
+      `Auto-SDS: Database error for product ${productId}`
+    );
+    return 'failed';
+  }
+}
+
+function runSdsParsing(
+  productId: number,
+  sdsUrl: string,
+  validators: SdsValidators | undefined,
+  resolve: (outcome: SdsParseOutcome) => void
+): void {
   try {
     logger.info(`Auto-SDS: Starting background parsing for product ${productId}`);
     logger.info(`Auto-SDS: SDS URL: ${sdsUrl}`);
@@ -87,6 +333,7 @@ async function executeSdsParsing(productId: number, sdsUrl: string): Promise<voi
       '--url',
       sdsUrl,
       '--verbose',
+      ...validatorArgs(validators),
     ];
     logger.info(`Auto-SDS: Python command: python ${pythonArgs.join(' ')}`);
 
@@ -108,6 +355,16 @@ async function executeSdsParsing(productId: number, sdsUrl: string): Promise<voi
       logger.warn(`Auto-SDS: Python stderr chunk for product ${productId}: ${chunk.trim()}`);
     });
 
+    pythonProcess.on('error', error => {
+      logger.error(
+        { error, productId },
+        `Auto-SDS: Failed to spawn parser for product ${productId}`
+      );
+      // 'close' may never follow a spawn failure; don't leave callers waiting for the timeout
+      clearTimeout(timeoutHandle);
+      resolve('failed');
+    });
+
     pythonProcess.on('close', async code => {
       logger.info(
         `Auto-SDS: Python process closed for product ${productId} with exit code ${code}`
@@ -120,70 +377,23 @@ async function executeSdsParsing(productId: number, sdsUrl: string): Promise<voi
         );
         logger.error(`Auto-SDS: stderr: ${stderr}`);
         logger.error(`Auto-SDS: stdout: ${stdout}`);
+        resolve('failed');
         return;
       }
 
+      let parsedMetadata: any;
       try {
         logger.debug(`Auto-SDS: Raw stdout for product ${productId}: ${stdout.trim()}`);
-        const parsedMetadata = JSON.parse(stdout.trim());
-
-        if (parsedMetadata.error) {
-          logger.error(
-            { error: parsedMetadata.error, productId },
-            `Auto-SDS: Parse error for product ${productId}`
-          );
-          return;
-        }
-
-        logger.debug(
-          { parsedMetadata, productId },
-          `Auto-SDS: Parsed metadata for product ${productId}`
-        );
-
-        // Store metadata in database
-        const supabase = createServiceRoleClient();
-        const { error: upsertError } = await supabase.from('sds_metadata').upsert({
-          product_id: productId,
-          vendor: parsedMetadata.vendor,
-          issue_date: parsedMetadata.issue_date,
-          hazardous_substance: parsedMetadata.hazardous_substance,
-          dangerous_good: parsedMetadata.dangerous_good,
-          dangerous_goods_class: parsedMetadata.dangerous_goods_class,
-          description: parsedMetadata.product_name,
-          packing_group: parsedMetadata.packing_group,
-          subsidiary_risks: parsedMetadata.subsidiary_risks,
-          raw_json: parsedMetadata,
-        });
-
-        if (upsertError) {
-          logger.error(
-            { error: upsertError, productId },
-            `Auto-SDS: Failed to store metadata for product ${productId}`
-          );
-          return;
-        }
-
-        // Update user watch lists
-        await supabase
-          .from('user_chemical_watch_list')
-          .update({
-            sds_available: true,
-            sds_issue_date: parsedMetadata.issue_date,
-            hazardous_substance: parsedMetadata.hazardous_substance,
-            dangerous_good: parsedMetadata.dangerous_good,
-            dangerous_goods_class: parsedMetadata.dangerous_goods_class,
-            packing_group: parsedMetadata.packing_group,
-            subsidiary_risks: parsedMetadata.subsidiary_risks,
-          })
-          .eq('product_id', productId);
-
-        logger.info(`Auto-SDS: Successfully parsed and stored metadata for product ${productId}`);
-      } catch (dbError) {
+        parsedMetadata = JSON.parse(stdout.trim());
+      } catch (parseError) {
         logger.error(
-          { error: dbError, productId },
-          `Auto-SDS: Database error for product ${productId}`
+          { error: parseError, productId },
+          `Auto-SDS: Unreadable parser output for product ${productId}`
         );
+        resolve('failed');
+        return;
       }
+      resolve(await applyParseResult(productId, validators, parsedMetadata));
     });
 
     const startTime = Date.now();
@@ -201,9 +411,10 @@ async function executeSdsParsing(productId: number, sdsUrl: string): Promise<voi
 
           pythonProcess.kill('SIGKILL'); // Force kill
           logger.warn(`Auto-SDS: Timeout parsing product ${productId}`);
+          resolve('failed');
         }
       },
-      3 * 60 * 1000
+      PARSE_TIMEOUT_MS
     );
 
     // Clear timeout when process completes
@@ -212,9 +423,44 @@ async function executeSdsParsing(productId: number, sdsUrl: string): Promise<voi
     });
   } catch (error) {
     logger.error({ error, productId }, `Auto-SDS: Execution error for product ${productId}`);
+    resolve('failed');
   }
 }
 
+export interface RevalidationTarget {
+  id: number;
+  name?: string | null;
+  barcode?: string | null;
+}
+
+/**
+ * Revalidate products one after another (each waits for its parse to finish)
+ * and print a summary of the outcomes. Used by the reprocessing scripts.
+ */
+export async function revalidateProducts(
+  products: RevalidationTarget[]
+): Promise<Record<SdsParseOutcome, number>> {
+  const counts: Record<SdsParseOutcome, number> = { changed: 0, unchanged: 0, failed: 0 };
+
+  for (let i = 0; i < products.length; i++) {
+    const product = products[i];
+    console.log(
+      `📋 [${i + 1}/${products.length}] Revalidating: ${product.name || product.barcode} (ID: ${product.id})`
+    );
+
+    const outcome = await revalidateSdsParsing(product.id);
+    counts[outcome]++;
+    console.log(`   → ${outcome}`);
+  }
+
+  console.log(`\n📊 Revalidation Summary:`);
+  console.log(`   • Changed (re-parsed): ${counts.changed}`);
+  console.log(`   • Skipped (unchanged): ${counts.unchanged}`);
+  console.log(`   • Failed: ${counts.failed}`);
+  console.log(`   • Total: ${products.length}`);
+  return counts;
+}
+
 /**
  * Batch process all products with SDS URLs but no metadata
  */